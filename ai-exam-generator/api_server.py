@@ -14,6 +14,7 @@ import numpy as np
 import faiss
 
 from src.models import Chunk, GlobalConfig, CognitiveRatios, DifficultyRatios
+from src.chunking import ChunkingEngine
 from exam_pipeline import ExamPipeline
 
 # Setup Flask
@@ -80,44 +81,9 @@ def generate_with_ollama(prompt: str, system: str = "") -> str:
 
 
 def chunk_text(text: str, chunk_size: int = 500) -> List[Chunk]:
-    """Chia văn bản thành chunks"""
-    chunks = []
-    lines = text.strip().split('\n')
-    current_chunk = ""
-    current_section = ""
-    chunk_id = 0
-    char_pos = 0
-    
-    for line in lines:
-        if line.startswith("CHƯƠNG") or line.startswith("Chapter"):
-            current_section = line
-        
-        if len(current_chunk) + len(line) > chunk_size and current_chunk:
-            chunk_text_val = current_chunk.strip()
-            chunks.append(Chunk(
-                chunk_id=f"c{chunk_id:03d}",
-                page=1,
-                section=current_section,
-                text=chunk_text_val,
-                char_start=char_pos,
-                char_end=char_pos + len(chunk_text_val)
-            ))
-            char_pos += len(chunk_text_val)
-            chunk_id += 1
-            current_chunk = line + "\n"
-        else:
-            current_chunk += line + "\n"
-    
-    if current_chunk.strip():
-        chunk_text_val = current_chunk.strip()
-        chunks.append(Chunk(
-            chunk_id=f"c{chunk_id:03d}",
-            page=1,
-            section=current_section,
-            text=chunk_text_val,
-            char_start=char_pos,
-            char_end=char_pos + len(chunk_text_val)
-        ))
+    """Chia văn bản thành chunks (ChunkingEngine dùng chung, không chồng lấn)"""
+    engine = ChunkingEngine.from_settings(chunk_size=chunk_size, chunk_overlap=0)
+    chunks = engine.chunk_text(text)
     
     logger.info(f"✅ Created {len(chunks)} chunks")
     return chunks
@@ -0,0 +1,3 @@
+"""
+Benchmark cho các bước xử lý tài liệu
+"""
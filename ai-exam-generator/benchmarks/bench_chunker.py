@@ -0,0 +1,99 @@
+"""
+Benchmark thông lượng ChunkingEngine theo từng strategy và cấu hình của các nơi gọi
+
+Chạy từ thư mục ai-exam-generator (cần file BPE của tiktoken, tải lần đầu):
+    python -m benchmarks.bench_chunker --pages 2000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from loguru import logger
+
+from src.models import DocumentPage
+from src.chunking import ChunkingEngine, SlidingWindowStrategy, TokenBudgetStrategy, get_encoding
+from benchmarks.corpus import make_page_texts
+
+
+def _run(chunker: ChunkingEngine, pages):
+    t0 = time.perf_counter()
+    chunks = list(chunker.chunk_pages(pages))
+    return chunks, time.perf_counter() - t0
+
+
+def _token_stats(encoding, chunks) -> dict:
+    """Phân bố số token mỗi chunk (đếm bằng tokenizer của model embedding)"""
+    counts = sorted(len(encoding.encode(c.text, disallowed_special=())) for c in chunks)
+    if not counts:
+        return {}
+    return {
+        'min': counts[0],
+        'mean': round(statistics.mean(counts), 1),
+        'p95': counts[int(0.95 * (len(counts) - 1))],
+        'max': counts[-1],
+        'stdev': round(statistics.pstdev(counts), 1),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark ChunkingEngine")
+    arg_parser.add_argument('--pages', type=int, default=2000, help='Số trang')
+    arg_parser.add_argument('--chunk-chars', type=int, default=1000, help='chunk_size chế độ ký tự')
+    arg_parser.add_argument('--overlap-chars', type=int, default=200, help='chunk_overlap chế độ ký tự')
+    arg_parser.add_argument('--chunk-tokens', type=int, default=256, help='chunk_size chế độ token')
+    arg_parser.add_argument('--overlap-tokens', type=int, default=48, help='chunk_overlap chế độ token')
+    arg_parser.add_argument('--model', default='text-embedding-3-small', help='Model embedding (chọn tokenizer)')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Số lần chạy, lấy lần nhanh nhất')
+    args = arg_parser.parse_args()
+
+    logger.remove()
+
+    # Một "trang" lớn = cả tài liệu nối lại, để thấy chi phí theo độ dài text
+    texts = make_page_texts(args.pages)
+    sizes = {'per_page': [DocumentPage(page=i + 1, text=t) for i, t in enumerate(texts)]}
+    for fraction in (4, 1):
+        joined = '\n\n'.join(texts[:max(1, args.pages // fraction)])
+        sizes[f'single_page_{len(joined)}_chars'] = [DocumentPage(page=1, text=joined)]
+
+    chunkers = {
+        'sliding_window': ChunkingEngine(SlidingWindowStrategy(args.chunk_chars, args.overlap_chars)),
+        'token_budget': ChunkingEngine(
+            TokenBudgetStrategy(args.chunk_tokens, args.overlap_tokens, encoding_model=args.model)
+        ),
+        # TextChunker (main.py, demo.py)
+        'section_chars': ChunkingEngine.from_settings(args.chunk_chars, args.overlap_chars),
+        'section_tokens': ChunkingEngine.from_settings(
+            args.chunk_tokens, args.overlap_tokens, unit='tokens', encoding_model=args.model
+        ),
+        # ExamPipeline, api_server, demo_local
+        'section_500_no_overlap': ChunkingEngine.from_settings(500, 0),
+    }
+    encoding = get_encoding(args.model)
+
+    results = {}
+    for mode, chunker in chunkers.items():
+        results[mode] = {}
+        for size_name, pages in sizes.items():
+            best, chunks = float('inf'), []
+            for _ in range(args.repeat):
+                chunks, seconds = _run(chunker, pages)
+                best = min(best, seconds)
+            chars = sum(len(p.text) for p in pages)
+            results[mode][size_name] = {
+                'seconds': round(best, 4),
+                'chunks': len(chunks),
+                'mb_per_sec': round(chars / best / 1e6, 2),
+                'tokens_per_chunk': _token_stats(encoding, chunks),
+            }
+
+    print(json.dumps({
+        'pages': args.pages,
+        'model': args.model,
+        'encoding': encoding.name,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
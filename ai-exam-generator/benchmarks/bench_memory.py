@@ -0,0 +1,138 @@
+"""
+Kiểm tra RSS khi parse PDF lớn ở chế độ bounded-memory
+
+Corpus là PDF có hình ở mọi trang (make_figure_pdf): pdfminer giữ ảnh,
+content stream của mọi trang đã đọc, MuPDF giữ ảnh trong store, nên lần
+parse thường tăng RSS theo số trang. Mỗi lần parse chạy trong process con
+riêng; RSS hiện tại được lấy mẫu sau mỗi trang và so với mức nền sau một
+lượt parse khởi động (thư viện, font đã nạp). Lần bounded-memory ghi cả
+ParseCache. Với mỗi backend, thoát với mã 1 nếu:
+
+- lần parse thường không tăng quá --target-mb (corpus quá nhỏ, không đo được gì),
+- bounded-memory tăng quá --target-mb, hoặc đỉnh RSS không thấp hơn lần parse thường,
+- process con lỗi, chết hoặc quá --timeout.
+
+Chạy từ thư mục ai-exam-generator:
+    python -m benchmarks.bench_memory --pages 500 --target-mb 25
+    python -m benchmarks.bench_memory --backends pdfplumber
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from queue import Empty
+
+from loguru import logger
+
+from benchmarks.corpus import make_figure_pdf
+
+
+def _parse_and_report(pdf_path: str, backend: str, bounded: bool, target_mb: int, queue) -> None:
+    """Chạy trong process con: parse, duyệt hết trang, trả về RSS tăng thêm (MB)"""
+    logger.remove()
+    from src.parse_cache import ParseCache
+    from src.pdf_parser import PDFParser, _current_rss_mb
+
+    try:
+        # Lượt khởi động: nạp thư viện, font... trước khi lấy mức nền
+        with PDFParser(backend=backend, ocr_workers=0) as parser:
+            parser.parse(pdf_path, page_ranges=[(1, 2)])
+        gc.collect()
+        baseline_mb = _current_rss_mb()
+        samples = [baseline_mb]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            parser = PDFParser(
+                backend=backend,
+                ocr_workers=0,
+                bounded_memory=bounded,
+                memory_target_mb=int(baseline_mb + target_mb) if bounded else None,
+                cache=ParseCache(cache_dir) if bounded else None,
+                progress=lambda *args: samples.append(_current_rss_mb())
+            )
+            with parser:
+                document = parser.parse(pdf_path)
+                samples.append(_current_rss_mb())
+                chars = sum(len(page.text) for page in document.pages)
+                samples.append(_current_rss_mb())
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+        return
+
+    peak_mb = max(samples)
+    queue.put({
+        'pages': len(document.pages),
+        'chars': chars,
+        'baseline_rss_mb': round(baseline_mb, 1),
+        'peak_rss_mb': round(peak_mb, 1),
+        'growth_mb': round(peak_mb - baseline_mb, 1),
+    })
+
+
+def measure(pdf_path: str, backend: str, bounded: bool, target_mb: int, timeout: float) -> dict:
+    """Chạy một lần parse trong process con; lỗi/treo/crash trả về {'error': ...}"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_parse_and_report, args=(pdf_path, backend, bounded, target_mb, queue))
+    proc.start()
+
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1.0)
+        except Empty:
+            # Process con chết mà không gửi kết quả (crash, bị OOM killer...)
+            if not proc.is_alive():
+                result = {'error': f"process con thoát với mã {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.kill()
+                result = {'error': f"quá {timeout:.0f}s"}
+
+    proc.join()
+    return result
+
+
+def compare(default: dict, bounded: dict, target_mb: int) -> dict:
+    """Các điều kiện phải đúng của một backend (rỗng nếu có lần parse lỗi)"""
+    if 'error' in default or 'error' in bounded:
+        return {}
+    return {
+        'default_exceeds_target': default['growth_mb'] > target_mb,
+        'bounded_within_target': bounded['growth_mb'] <= target_mb,
+        'bounded_below_default': bounded['peak_rss_mb'] < default['peak_rss_mb'],
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Đo RSS khi parse PDF lớn")
+    arg_parser.add_argument('--pages', type=int, default=500, help='Số trang PDF tổng hợp')
+    arg_parser.add_argument('--target-mb', type=int, default=25,
+                            help='RSS tối đa bounded-memory được dùng thêm so với mức nền (MB)')
+    arg_parser.add_argument('--backends', default='pdfplumber,pymupdf', help='Backend của PDFParser, ngăn bởi dấu phẩy')
+    arg_parser.add_argument('--timeout', type=float, default=1800, help='Giây tối đa cho mỗi lần parse')
+    args = arg_parser.parse_args()
+
+    backends = [b for b in args.backends.split(',') if b]
+    report = {'pages': args.pages, 'target_mb': args.target_mb, 'backends': {}}
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = make_figure_pdf(str(Path(tmp_dir) / 'large.pdf'), args.pages)
+        for backend in backends:
+            print(f"... {backend}", file=sys.stderr)
+            default = measure(pdf_path, backend, False, args.target_mb, args.timeout)
+            bounded = measure(pdf_path, backend, True, args.target_mb, args.timeout)
+            checks = compare(default, bounded, args.target_mb)
+            report['backends'][backend] = {'default': default, 'bounded': bounded, **checks}
+            ok = ok and bool(checks) and all(checks.values())
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+So sánh backend pdfplumber và PyMuPDF fast path của PDFParser
+
+Chạy từ thư mục ai-exam-generator:
+    python -m benchmarks.bench_pdf_backends --pages 50
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from src.pdf_parser import PDFParser
+from benchmarks.corpus import make_text_pdf, make_table_pdf
+
+
+def _time_parse(backend: str, pdf_path: str, repeat: int) -> float:
+    parser = PDFParser(backend=backend, ocr_workers=0)
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        parser.parse(pdf_path)
+        best = min(best, time.perf_counter() - t0)
+    parser.close()
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark backend của PDFParser")
+    arg_parser.add_argument('--pages', type=int, default=50, help='Số trang mỗi PDF')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Số lần chạy, lấy lần nhanh nhất')
+    args = arg_parser.parse_args()
+
+    logger.remove()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = {
+            'text_only': make_text_pdf(str(Path(tmp_dir) / 'text.pdf'), args.pages),
+            'table_heavy': make_table_pdf(str(Path(tmp_dir) / 'tables.pdf'), args.pages),
+        }
+        for name, pdf_path in corpus.items():
+            row = {}
+            for backend in PDFParser.BACKENDS:
+                seconds = _time_parse(backend, pdf_path, args.repeat)
+                row[backend] = {
+                    'seconds': round(seconds, 4),
+                    'pages_per_sec': round(args.pages / seconds, 1),
+                }
+            row['speedup'] = round(row['pdfplumber']['seconds'] / row['pymupdf']['seconds'], 2)
+            results[name] = row
+
+    print(json.dumps({'pages': args.pages, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Kiểm tra ExamPipeline.iter_chunks tăng tuyến tính theo số trang và gán đúng trang/offset
+
+Chạy từ thư mục ai-exam-generator:
+    python -m benchmarks.bench_pipeline_chunking --pages 1000
+
+Thoát với mã 1 nếu offset/trang của chunk sai hoặc thời gian mỗi trang ở
+tài liệu lớn nhất vượt quá --max-ratio lần tài liệu nhỏ nhất. Pytest kiểm
+tra cùng điều kiện (N và 2N trang) trong tests/test_pipeline_chunking.py.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import List
+
+from loguru import logger
+
+from src.models import Chunk, DocumentPage
+from exam_pipeline import ExamPipeline
+from benchmarks.corpus import make_page_texts
+
+
+def _legacy_chunk(pages, chunk_size: int = 500) -> List[Chunk]:
+    """ExamPipeline.chunk_document trước khi chunk theo trang (để so sánh)"""
+    chunks = []
+    full_text = '\n'.join([p.text for p in pages])
+    current_chunk = ""
+    current_section = ""
+    char_pos = 0
+
+    def add(text: str) -> None:
+        nonlocal char_pos
+        chunks.append(Chunk(
+            chunk_id=f"chunk_{len(chunks):04d}", page=1, section=current_section, text=text,
+            char_start=char_pos, char_end=char_pos + len(text)
+        ))
+        char_pos += len(text)
+
+    for line in full_text.split('\n'):
+        if any(keyword in line.upper() for keyword in ["CHƯƠNG", "BÀI", "MỤC TIÊU", "NỘI DUNG"]):
+            current_section = line.strip()
+        if len(current_chunk) + len(line) > chunk_size and current_chunk:
+            add(current_chunk.strip())
+            current_chunk = line + "\n"
+        else:
+            current_chunk += line + "\n"
+    if current_chunk.strip():
+        add(current_chunk.strip())
+    return chunks
+
+
+def _check(pages, chunks) -> list:
+    """Lỗi offset/trang: text phải khớp đúng đoạn [char_start, char_end) của trang"""
+    texts = {page.page: page.text for page in pages}
+    errors = []
+    for chunk in chunks:
+        if texts[chunk.page][chunk.char_start:chunk.char_end] != chunk.text:
+            errors.append(f"{chunk.chunk_id}: offset không khớp text trang {chunk.page}")
+    return errors
+
+
+def _best_of(repeat: int, run):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = run()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark ExamPipeline chunking")
+    arg_parser.add_argument('--pages', type=int, default=1000, help='Số trang của tài liệu lớn nhất')
+    arg_parser.add_argument('--chunk-size', type=int, default=500, help='chunk_size (ký tự)')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Số lần chạy, lấy lần nhanh nhất')
+    arg_parser.add_argument('--max-ratio', type=float, default=1.5,
+                            help='Tỷ lệ thời gian/trang tối đa giữa tài liệu lớn nhất và nhỏ nhất')
+    args = arg_parser.parse_args()
+
+    logger.remove()
+    texts = make_page_texts(args.pages)
+
+    results, errors = {}, []
+    for fraction in (4, 2, 1):
+        num_pages = max(1, args.pages // fraction)
+        pages = [DocumentPage(page=i + 1, text=t) for i, t in enumerate(texts[:num_pages])]
+
+        seconds, chunks = _best_of(
+            args.repeat, lambda: list(ExamPipeline.iter_chunks(pages, args.chunk_size))
+        )
+        legacy_seconds, legacy = _best_of(args.repeat, lambda: _legacy_chunk(pages, args.chunk_size))
+        errors += _check(pages, chunks)
+
+        results[num_pages] = {
+            'seconds': round(seconds, 4),
+            'us_per_page': round(seconds / num_pages * 1e6, 1),
+            'chunks': len(chunks),
+            'distinct_pages': len({c.page for c in chunks}),
+            'legacy_seconds': round(legacy_seconds, 4),
+            'legacy_distinct_pages': len({c.page for c in legacy}),
+        }
+
+    per_page = [r['us_per_page'] for r in results.values()]
+    ratio = per_page[-1] / per_page[0] if per_page[0] else 0.0
+    linear = ratio <= args.max_ratio
+
+    print(json.dumps({
+        'chunk_size': args.chunk_size,
+        'results': results,
+        'per_page_ratio': round(ratio, 2),
+        'linear': linear,
+        'errors': errors[:20],
+    }, indent=2))
+
+    if errors or not linear:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
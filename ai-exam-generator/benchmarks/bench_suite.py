@@ -0,0 +1,177 @@
+"""
+Bộ benchmark PDFParser + TextCleaner trên corpus PDF tiếng Việt tổng hợp
+
+Corpus (deterministic theo --seed) gồm PDF chỉ text, nhiều bảng, scan và
+trộn lẫn, ở các cỡ --sizes trang. Mỗi file được parse trong một process
+con riêng để đo đỉnh RSS độc lập. Kết quả in ra (hoặc ghi --out) dạng JSON,
+kèm commit hiện tại để so sánh giữa các commit.
+
+Chạy từ thư mục ai-exam-generator:
+    python -m benchmarks.bench_suite --sizes 5,50,500 --out bench.json
+    python -m benchmarks.bench_suite --kinds text,table --backend pymupdf
+
+Lưu ý: trang scan cần Tesseract (tesserocr/pytesseract), OCR 500 trang
+mất khá lâu; dùng --kinds để bỏ bớt.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from queue import Empty
+
+from loguru import logger
+
+from benchmarks.corpus import CORPUS_KINDS, build_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    """Đỉnh RSS của process hiện tại (MB), None nếu không đo được"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS trả về byte, Linux trả về KB
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _run_one(pdf_path: str, options: dict, queue) -> None:
+    """Chạy trong process con: parse + làm sạch một file, gửi số liệu về"""
+    logger.remove()
+    from src.pdf_parser import PDFParser, TextCleaner
+
+    try:
+        with PDFParser(**options) as parser:
+            t0 = time.perf_counter()
+            document = parser.parse(pdf_path)
+            parse_seconds = time.perf_counter() - t0
+
+            t1 = time.perf_counter()
+            TextCleaner.clean_document(document)
+            clean_seconds = time.perf_counter() - t1
+
+            timings = parser.page_timings
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+        return
+
+    pages = len(document.pages)
+    total = parse_seconds + clean_seconds
+    ocr_seconds = sum(t.ocr_time for t in timings)
+    queue.put({
+        'pages': pages,
+        'chars': sum(len(page.text) for page in document.pages),
+        'parse_seconds': round(parse_seconds, 4),
+        'clean_seconds': round(clean_seconds, 4),
+        'pages_per_sec': round(pages / total, 2) if total else None,
+        'ocr_pages': sum(1 for t in timings if t.ocr_time > 0),
+        'ocr_seconds': round(ocr_seconds, 4),
+        # Tổng thời gian OCR của mọi worker chia thời gian thực: > 1 khi OCR song song
+        'ocr_seconds_per_wall_second': round(ocr_seconds / parse_seconds, 3) if parse_seconds else 0.0,
+        'peak_rss_mb': _peak_rss_mb(),
+    })
+
+
+def _measure(pdf_path: str, options: dict, timeout: float) -> dict:
+    """Chạy _run_one trong process con; crash/treo trả về {'error': ...}"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_one, args=(pdf_path, options, queue))
+    proc.start()
+
+    deadline = time.monotonic() + timeout
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=1.0)
+        except Empty:
+            # Process con chết mà không gửi kết quả (segfault trong PyMuPDF, OOM killer...)
+            if not proc.is_alive():
+                result = {'error': f"process con thoát với mã {proc.exitcode}"}
+            elif time.monotonic() > deadline:
+                proc.kill()
+                result = {'error': f"quá {timeout:.0f}s"}
+
+    proc.join()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ocr_available() -> bool:
+    try:
+        import tesserocr  # noqa: F401
+        return True
+    except ImportError:
+        return shutil.which('tesseract') is not None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark PDFParser trên corpus tổng hợp")
+    arg_parser.add_argument('--kinds', default=','.join(CORPUS_KINDS), help='Loại PDF, ngăn bởi dấu phẩy')
+    arg_parser.add_argument('--sizes', default='5,50,500', help='Số trang mỗi PDF, ngăn bởi dấu phẩy')
+    arg_parser.add_argument('--seed', type=int, default=0, help='Seed sinh corpus')
+    arg_parser.add_argument('--corpus-dir', default='./cache/bench_corpus', help='Thư mục lưu corpus')
+    arg_parser.add_argument('--backend', default='pdfplumber', help='Backend của PDFParser')
+    arg_parser.add_argument('--workers', type=int, default=1, help='Số process trích xuất trang')
+    arg_parser.add_argument('--ocr-workers', type=int, default=2, help='Số worker OCR')
+    arg_parser.add_argument('--timeout', type=float, default=3600, help='Giây tối đa cho mỗi file')
+    arg_parser.add_argument('--out', help='Ghi JSON ra file thay vì stdout')
+    args = arg_parser.parse_args()
+
+    kinds = [k for k in args.kinds.split(',') if k]
+    unknown = set(kinds) - set(CORPUS_KINDS)
+    if unknown:
+        arg_parser.error(f"Loại không hợp lệ: {', '.join(sorted(unknown))}")
+    sizes = [int(n) for n in args.sizes.split(',') if n]
+
+    options = {
+        'backend': args.backend,
+        'workers': args.workers,
+        'ocr_workers': args.ocr_workers,
+    }
+
+    # Sinh corpus trong process riêng: process con spawn thừa hưởng ru_maxrss của
+    # process cha, nên process cha phải giữ nhỏ để đỉnh RSS từng file đo đúng
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        corpus = pool.apply(build_corpus, (args.corpus_dir, kinds, sizes, args.seed))
+    results = {}
+    for name, pdf_path in corpus.items():
+        print(f"... {name}", file=sys.stderr)
+        results[name] = _measure(pdf_path, options, args.timeout)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ocr_available': _ocr_available(),
+        'seed': args.seed,
+        'options': options,
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
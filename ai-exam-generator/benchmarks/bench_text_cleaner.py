@@ -0,0 +1,77 @@
+"""
+Micro-benchmark TextCleaner: clean() từng trang kiểu cũ so với clean_pages()
+
+Chạy từ thư mục ai-exam-generator:
+    python -m benchmarks.bench_text_cleaner --pages 500
+"""
+import argparse
+import json
+import re
+import time
+
+from loguru import logger
+
+from src.models import DocumentPage
+from src.pdf_parser import TextCleaner
+from benchmarks.corpus import make_page_texts
+
+
+def _legacy_clean(text: str) -> str:
+    """TextCleaner.clean trước khi dùng pattern biên dịch sẵn (để so sánh)"""
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+    text = re.sub(r'(?:^|\n)\s*(?:Trang|Page)\s+\d+\s*(?:\n|$)', '\n', text)
+    lines = text.split('\n')
+    if len(lines) > 10:
+        if len(lines[0]) < 50 and len(lines[1]) < 50:
+            lines = lines[2:]
+        if len(lines[-1]) < 50 and len(lines[-2]) < 50:
+            lines = lines[:-2]
+    return '\n'.join(lines).strip()
+
+
+def _best_of(repeat: int, run) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark TextCleaner")
+    arg_parser.add_argument('--pages', type=int, default=500, help='Số trang')
+    arg_parser.add_argument('--workers', type=int, default=4, help='Số process cho clean_pages')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Số lần chạy, lấy lần nhanh nhất')
+    args = arg_parser.parse_args()
+
+    logger.remove()
+    texts = make_page_texts(args.pages)
+
+    def pages():
+        return [DocumentPage(page=i + 1, text=text) for i, text in enumerate(texts)]
+
+    cases = {
+        # Cách cũ: mỗi trang một lần gọi, re.sub với pattern dạng chuỗi
+        'legacy_per_page': lambda: [_legacy_clean(text) for text in texts],
+        'clean_per_page': lambda: [TextCleaner.clean(text) for text in texts],
+        'clean_pages_no_dedup': lambda: TextCleaner.clean_pages(pages(), remove_repeated=False),
+        # Kèm bước xóa header/footer lặp lại (việc mà cách cũ không làm)
+        'clean_pages': lambda: TextCleaner.clean_pages(pages()),
+        f'clean_pages_{args.workers}_workers': lambda: TextCleaner.clean_pages(pages(), workers=args.workers),
+    }
+
+    results = {}
+    for name, run in cases.items():
+        seconds = _best_of(args.repeat, run)
+        results[name] = {
+            'seconds': round(seconds, 4),
+            'pages_per_sec': round(args.pages / seconds, 1),
+        }
+
+    print(json.dumps({'pages': args.pages, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Kiểm tra output của ChunkingEngine không đổi so với bản golden đã duyệt
+
+Mỗi cấu hình (strategy + tham số của các nơi gọi) chạy trên một bộ trang cố
+định; ranh giới chunk (chunk_id, page, section, char_start, char_end) phải
+khớp benchmarks/golden/chunking.json. Tối ưu engine không được làm đổi output;
+khi cố ý đổi thuật toán thì duyệt diff rồi ghi lại golden:
+
+    python -m benchmarks.check_chunking_golden            # kiểm tra, mã thoát 1 nếu lệch
+    python -m benchmarks.check_chunking_golden --update   # ghi lại golden
+
+Các cấu hình theo token dùng bảng BPE cố định trong repo (benchmarks/golden_encoding.py)
+nên chạy được offline. Cấu hình chưa có trong golden cũng làm kiểm tra thất bại.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+from src.models import DocumentPage, HeadingMark
+from src.chunking import ChunkingEngine, SlidingWindowStrategy, TokenBudgetStrategy
+from benchmarks.corpus import make_page_texts
+from benchmarks.golden_encoding import GOLDEN_ENCODING, load_golden_encoding
+
+
+GOLDEN_PATH = Path(__file__).parent / 'golden' / 'chunking.json'
+
+DEMO_TEXT = """
+CHƯƠNG 1: HỆ PHƯƠNG TRÌNH BẬC NHẤT HAI ẨN
+
+I. MỤC TIÊU
+- Học sinh biết khái niệm phương trình bậc nhất hai ẩn, hệ phương trình bậc nhất hai ẩn
+- Học sinh biết cách giải hệ phương trình bằng phương pháp thế và phương pháp cộng đại số
+
+II. NỘI DUNG
+1. Phương trình bậc nhất hai ẩn. Dạng tổng quát: ax + by = c. Nghiệm của phương trình.
+2. Hệ phương trình bậc nhất hai ẩn. Hệ có nghiệm duy nhất, vô nghiệm hoặc vô số nghiệm.
+
+CHƯƠNG 2: HÀM SỐ BẬC NHẤT
+I. Khái niệm
+- Hàm số y = ax + b (a ≠ 0). Tính chất đồng biến, nghịch biến.
+"""
+
+
+def golden_pages() -> List[DocumentPage]:
+    """Bộ trang cố định: text tổng hợp, tiêu đề theo font, bảng, dòng dài không có điểm ngắt"""
+    pages = [DocumentPage(page=i + 1, text=text) for i, text in enumerate(make_page_texts(12))]
+
+    title = "BÀI 3. PHƯƠNG TRÌNH BẬC HAI"
+    text = f"Phần cuối của bài trước.\n{title}\nCông thức nghiệm: x = (-b ± √Δ) / 2a.\n" * 3
+    start = text.index(title)
+    pages.append(DocumentPage(
+        page=len(pages) + 1,
+        text=text,
+        headings=[
+            HeadingMark(level=2, title=title, char_start=start, char_end=start + len(title)),
+            # Tiêu đề đã bị TextCleaner xóa khỏi text
+            HeadingMark(level=3, title="Mục không còn trong text", char_start=0, char_end=10),
+        ]
+    ))
+    pages.append(DocumentPage(
+        page=len(pages) + 1,
+        text="Bảng ma trận đề kiểm tra.\n",
+        tables=[{'data': [["Nội dung", "Nhận biết"], ["Hệ phương trình", "2"], [None, ""]]}],
+        has_tables=True
+    ))
+    pages.append(DocumentPage(page=len(pages) + 1, text="x" * 2500 + " đuôi không dấu chấm"))
+    pages.append(DocumentPage(page=len(pages) + 1, text=DEMO_TEXT))
+    pages.append(DocumentPage(page=len(pages) + 1, text="   \n\n  "))
+    return pages
+
+
+def golden_cases() -> Dict[str, Callable[[], ChunkingEngine]]:
+    """Cấu hình của các nơi gọi và từng strategy riêng lẻ"""
+    return {
+        # TextChunker mặc định (main.py, src/main.py)
+        'text_chunker_chars_1000_200': lambda: ChunkingEngine.from_settings(1000, 200, include_tables=True),
+        # ExamPipeline.chunk_document, api_server.chunk_text, demo_local.chunk_text
+        'section_chars_500_0': lambda: ChunkingEngine.from_settings(500, 0),
+        # demo.py
+        'section_chars_500_100': lambda: ChunkingEngine.from_settings(500, 100),
+        'sliding_window_300_60': lambda: ChunkingEngine(SlidingWindowStrategy(300, 60)),
+        # Theo token: BPE cố định thay cho tokenizer của model embedding
+        'text_chunker_tokens_256_48': lambda: ChunkingEngine.from_settings(
+            256, 48, unit='tokens', encoding_model=GOLDEN_ENCODING
+        ),
+        'token_budget_64_16': lambda: ChunkingEngine(
+            TokenBudgetStrategy(64, 16, encoding_model=GOLDEN_ENCODING)
+        ),
+    }
+
+
+def run_case(engine: ChunkingEngine, pages: List[DocumentPage]) -> List[list]:
+    """Ranh giới chunk; kiểm tra luôn text chunk khớp offset trong trang"""
+    texts = {page.page: page.text for page in pages}
+    rows = []
+    for chunk in engine.chunk_pages(pages):
+        # Chunk bảng (p<trang>_t..) không lấy từ page.text
+        if chunk.chunk_id.startswith(f"p{chunk.page}_c"):
+            expected = texts[chunk.page][chunk.char_start:chunk.char_end]
+            if chunk.text != expected:
+                raise AssertionError(f"{chunk.chunk_id}: text không khớp [char_start, char_end)")
+        rows.append([chunk.chunk_id, chunk.page, chunk.section, chunk.char_start, chunk.char_end])
+    return rows
+
+
+def _dump(golden: Dict[str, List[list]]) -> str:
+    """JSON mỗi chunk một dòng, để diff golden dễ đọc"""
+    parts = []
+    for name, rows in golden.items():
+        lines = ',\n'.join('    ' + json.dumps(row, ensure_ascii=False) for row in rows)
+        parts.append(f'  {json.dumps(name)}: [\n{lines}\n  ]')
+    return '{\n' + ',\n'.join(parts) + '\n}\n'
+
+
+def _first_difference(expected: List[list], actual: List[list]) -> dict:
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return {'index': i, 'expected': a, 'actual': b}
+    return {'index': min(len(expected), len(actual)), 'expected_count': len(expected), 'actual_count': len(actual)}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Kiểm tra golden output của ChunkingEngine")
+    arg_parser.add_argument('--update', action='store_true', help='Ghi lại golden từ output hiện tại')
+    args = arg_parser.parse_args()
+
+    logger.remove()
+    pages = golden_pages()
+    golden = json.loads(GOLDEN_PATH.read_text(encoding='utf-8')) if GOLDEN_PATH.exists() else {}
+
+    load_golden_encoding()
+
+    report, actual_all = {}, {}
+    for name, make_engine in golden_cases().items():
+        actual = run_case(make_engine(), pages)
+        actual_all[name] = actual
+        if name not in golden:
+            report[name] = {'missing': 'chạy --update'}
+        elif golden[name] == actual:
+            report[name] = 'ok'
+        else:
+            report[name] = {'mismatch': _first_difference(golden[name], actual)}
+
+    if args.update:
+        GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+        GOLDEN_PATH.write_text(_dump(actual_all), encoding='utf-8')
+
+    print(json.dumps({'golden': str(GOLDEN_PATH), 'updated': args.update, 'cases': report},
+                     ensure_ascii=False, indent=2))
+
+    if not args.update and any(status != 'ok' for status in report.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
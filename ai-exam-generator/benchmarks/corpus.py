@@ -0,0 +1,205 @@
+"""
+Sinh PDF tiếng Việt tổng hợp (deterministic) để benchmark parser
+"""
+import os
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import fitz  # PyMuPDF
+
+
+SAMPLE_LINES = [
+    "CHƯƠNG {n}: HỆ PHƯƠNG TRÌNH BẬC NHẤT HAI ẨN",
+    "Học sinh biết khái niệm phương trình bậc nhất hai ẩn và tập nghiệm của nó.",
+    "Giải hệ phương trình bằng phương pháp thế và phương pháp cộng đại số.",
+    "Vận dụng hệ phương trình để giải bài toán thực tế về chuyển động.",
+    "Hàm số y = ax + b (a ≠ 0) đồng biến khi a > 0, nghịch biến khi a < 0.",
+    "Đồ thị hàm số bậc nhất là một đường thẳng cắt trục tung tại điểm (0; b).",
+    "Yêu cầu cần đạt: nhận biết, thông hiểu, vận dụng và vận dụng cao.",
+    "Ma trận đề kiểm tra được xây dựng theo Công văn 7991/BGDĐT-GDTrH.",
+]
+
+TABLE_HEADER = ["Nội dung", "Nhận biết", "Thông hiểu", "Vận dụng", "Tổng"]
+
+
+def load_font() -> fitz.Font:
+    """
+    Font có dấu tiếng Việt
+
+    Đặt biến môi trường BENCH_FONT trỏ tới file .ttf để dùng font riêng,
+    mặc định dùng font fallback có sẵn trong PyMuPDF.
+    """
+    font_file = os.environ.get('BENCH_FONT')
+    if font_file and Path(font_file).exists():
+        return fitz.Font(fontfile=font_file)
+    return fitz.Font("cjk")
+
+
+def _page_lines(rng: random.Random, page_no: int, count: int):
+    lines = [SAMPLE_LINES[0].format(n=page_no // 10 + 1)]
+    # Đánh số mục để các dòng không trùng nhau giữa các trang (như nội dung thật)
+    lines += [f"{j + 1}. {rng.choice(SAMPLE_LINES[1:])} (trang {page_no + 1})" for j in range(count)]
+    return lines
+
+
+def _write_lines(page: fitz.Page, font: fitz.Font, lines, top: float = 60, size: float = 10):
+    writer = fitz.TextWriter(page.rect)
+    y = top
+    for line in lines:
+        writer.append((56, y), line, font=font, fontsize=size)
+        y += size * 1.5
+    writer.write_text(page)
+    return y
+
+
+def _draw_table(page: fitz.Page, font: fitz.Font, rng: random.Random, top: float, rows: int = 8):
+    col_widths = [200, 70, 70, 70, 60]
+    writer = fitz.TextWriter(page.rect)
+    for r in range(rows):
+        x = 56
+        cells = TABLE_HEADER if r == 0 else [f"Chủ đề {r}"] + [str(rng.randint(1, 9)) for _ in range(4)]
+        for width, value in zip(col_widths, cells):
+            rect = fitz.Rect(x, top + r * 18, x + width, top + (r + 1) * 18)
+            page.draw_rect(rect, width=0.5)
+            writer.append((rect.x0 + 3, rect.y1 - 5), value, font=font, fontsize=8)
+            x += width
+    writer.write_text(page)
+
+
+def make_text_pdf(path: str, num_pages: int, seed: int = 0) -> str:
+    """PDF chỉ có text"""
+    rng = random.Random(seed)
+    font = load_font()
+    doc = fitz.open()
+    for n in range(num_pages):
+        page = doc.new_page(width=595, height=842)
+        _write_lines(page, font, _page_lines(rng, n, 40))
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def make_table_pdf(path: str, num_pages: int, seed: int = 0) -> str:
+    """PDF mỗi trang có đoạn text ngắn và hai bảng kẻ ô"""
+    rng = random.Random(seed)
+    font = load_font()
+    doc = fitz.open()
+    for n in range(num_pages):
+        page = doc.new_page(width=595, height=842)
+        y = _write_lines(page, font, _page_lines(rng, n, 8))
+        _draw_table(page, font, rng, y + 20)
+        _draw_table(page, font, rng, y + 200)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def make_figure_pdf(path: str, num_pages: int, seed: int = 0, figure_px: int = 256) -> str:
+    """PDF mỗi trang có đoạn text và một hình riêng (ảnh nhiễu, không nén được)"""
+    rng = random.Random(seed)
+    font = load_font()
+    doc = fitz.open()
+    for n in range(num_pages):
+        page = doc.new_page(width=595, height=842)
+        y = _write_lines(page, font, _page_lines(rng, n, 12))
+        figure = fitz.Pixmap(fitz.csRGB, figure_px, figure_px, rng.randbytes(figure_px * figure_px * 3), 0)
+        page.insert_image(fitz.Rect(56, y + 20, 56 + figure_px, y + 20 + figure_px), pixmap=figure)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def _scan_page(doc: fitz.Document, source: fitz.Page, dpi: int) -> None:
+    """Thêm vào doc một trang chỉ có ảnh xám của trang nguồn (giả lập bản scan)"""
+    pix = source.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    page = doc.new_page(width=source.rect.width, height=source.rect.height)
+    page.insert_image(page.rect, stream=pix.tobytes('png'))
+
+
+def make_scanned_pdf(path: str, num_pages: int, seed: int = 0, dpi: int = 150) -> str:
+    """PDF scan: mỗi trang là ảnh của một trang text, không có lớp text"""
+    rng = random.Random(seed)
+    font = load_font()
+    doc = fitz.open()
+    scratch = fitz.open()
+    for n in range(num_pages):
+        source = scratch.new_page(width=595, height=842)
+        _write_lines(source, font, _page_lines(rng, n, 30), size=12)
+        _scan_page(doc, source, dpi)
+    scratch.close()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def make_mixed_pdf(path: str, num_pages: int, seed: int = 0, dpi: int = 150) -> str:
+    """PDF xen kẽ trang text, trang có bảng và trang scan"""
+    rng = random.Random(seed)
+    font = load_font()
+    doc = fitz.open()
+    scratch = fitz.open()
+    for n in range(num_pages):
+        kind = n % 3
+        if kind == 2:
+            source = scratch.new_page(width=595, height=842)
+            _write_lines(source, font, _page_lines(rng, n, 30), size=12)
+            _scan_page(doc, source, dpi)
+            continue
+        page = doc.new_page(width=595, height=842)
+        if kind == 0:
+            _write_lines(page, font, _page_lines(rng, n, 40))
+        else:
+            y = _write_lines(page, font, _page_lines(rng, n, 8))
+            _draw_table(page, font, rng, y + 20)
+    scratch.close()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+CORPUS_KINDS = {
+    'text': make_text_pdf,
+    'table': make_table_pdf,
+    'figure': make_figure_pdf,
+    'scanned': make_scanned_pdf,
+    'mixed': make_mixed_pdf,
+}
+
+
+def build_corpus(out_dir: str, kinds: List[str], sizes: List[int], seed: int = 0) -> Dict[str, str]:
+    """
+    Sinh (hoặc dùng lại) corpus: mỗi loại x mỗi cỡ một file
+    `<loại>_<số trang>_s<seed>.pdf`
+
+    Cùng seed thì nội dung giống hệt nhau, nên file đã có được dùng lại.
+
+    Returns:
+        Dict "<loại>_<số trang>" -> đường dẫn file
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    corpus = {}
+    for kind in kinds:
+        for size in sizes:
+            name = f"{kind}_{size}"
+            path = out / f"{name}_s{seed}.pdf"
+            if not path.exists():
+                # Ghi ra file tạm rồi rename để lần chạy bị ngắt không để lại file dở
+                tmp_path = path.with_suffix('.tmp')
+                CORPUS_KINDS[kind](str(tmp_path), size, seed)
+                os.replace(tmp_path, path)
+            corpus[name] = str(path)
+    return corpus
+
+
+def make_page_texts(num_pages: int, seed: int = 0) -> List[str]:
+    """Text thô của từng trang (như sau khi parse), có header/footer lặp lại"""
+    rng = random.Random(seed)
+    texts = []
+    for n in range(num_pages):
+        lines = ["TRƯỜNG THPT NGUYỄN DU", "ĐỀ CƯƠNG ÔN TẬP HỌC KỲ I - TOÁN 9", ""]
+        lines += _page_lines(rng, n, 40)
+        lines += ["", "Tài liệu lưu hành nội bộ", f"Trang {n + 1}"]
+        texts.append('\n'.join(lines))
+    return texts
@@ -0,0 +1,93 @@
+"""
+Tokenizer BPE nhỏ, cố định, không cần tải file của tiktoken
+
+Dùng cho golden và test của chunking theo token: kết quả không phụ thuộc
+mạng hay phiên bản BPE của OpenAI. Bảng merge được học một lần từ corpus
+tiếng Việt tổng hợp và lưu ở benchmarks/golden/vi_bpe.tiktoken (định dạng
+.tiktoken: token base64 + rank mỗi dòng). Đổi bảng merge làm đổi golden:
+
+    python -m benchmarks.golden_encoding          # học lại và ghi file BPE
+"""
+import argparse
+import base64
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import regex
+import tiktoken
+
+from src.chunking import register_encoding
+from benchmarks.corpus import make_page_texts
+
+
+GOLDEN_ENCODING = 'golden-vi-bpe'
+BPE_PATH = Path(__file__).parent / 'golden' / 'vi_bpe.tiktoken'
+
+# Tách từ kiểu GPT-2 (dấu tiếng Việt nằm trong \p{L})
+PAT_STR = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+
+
+def load_golden_encoding() -> tiktoken.Encoding:
+    """Đọc file BPE cố định và đăng ký dưới tên GOLDEN_ENCODING (encoding_model)"""
+    ranks = {}
+    for line in BPE_PATH.read_text(encoding='ascii').splitlines():
+        token, rank = line.split()
+        ranks[base64.b64decode(token)] = int(rank)
+    encoding = tiktoken.Encoding(
+        name=GOLDEN_ENCODING, pat_str=PAT_STR, mergeable_ranks=ranks, special_tokens={}
+    )
+    register_encoding(GOLDEN_ENCODING, encoding)
+    return encoding
+
+
+def train_ranks(texts: List[str], num_merges: int) -> Dict[bytes, int]:
+    """BPE mức byte: 256 byte rồi lần lượt gộp cặp phổ biến nhất (hòa thì lấy cặp nhỏ nhất)"""
+    words = Counter(
+        word.encode('utf-8') for text in texts for word in regex.findall(PAT_STR, text)
+    )
+    pieces = {word: [bytes([b]) for b in word] for word in words}
+    ranks = {bytes([b]): b for b in range(256)}
+
+    for _ in range(num_merges):
+        pairs: Counter = Counter()
+        for word, parts in pieces.items():
+            for pair in zip(parts, parts[1:]):
+                pairs[pair] += words[word]
+        if not pairs:
+            break
+        best = min(pairs.items(), key=lambda item: (-item[1], item[0]))[0]
+        merged = best[0] + best[1]
+        ranks[merged] = len(ranks)
+        for word, parts in pieces.items():
+            pieces[word] = _merge(parts, best, merged)
+    return ranks
+
+
+def _merge(parts: List[bytes], pair: Tuple[bytes, bytes], merged: bytes) -> List[bytes]:
+    out, i = [], 0
+    while i < len(parts):
+        if i + 1 < len(parts) and (parts[i], parts[i + 1]) == pair:
+            out.append(merged)
+            i += 2
+        else:
+            out.append(parts[i])
+            i += 1
+    return out
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Học lại bảng BPE cố định cho golden chunking")
+    arg_parser.add_argument('--pages', type=int, default=30, help='Số trang corpus tổng hợp để học')
+    arg_parser.add_argument('--merges', type=int, default=400, help='Số lần gộp cặp')
+    args = arg_parser.parse_args()
+
+    ranks = train_ranks(make_page_texts(args.pages), args.merges)
+    lines = [f"{base64.b64encode(token).decode('ascii')} {rank}" for token, rank in ranks.items()]
+    BPE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    BPE_PATH.write_text('\n'.join(lines) + '\n', encoding='ascii')
+    print(f"{BPE_PATH}: {len(ranks)} token")
+
+
+if __name__ == '__main__':
+    main()
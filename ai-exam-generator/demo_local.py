@@ -19,6 +19,7 @@ from src.models import (
     Document, DocumentPage, DocumentMetadata, Chunk, 
     GlobalConfig, CognitiveRatios, DifficultyRatios
 )
+from src.chunking import ChunkingEngine
 
 
 def create_sample_content() -> str:
@@ -63,44 +64,9 @@ II. Đồ thị hàm số bậc nhất
 
 
 def chunk_text(text: str, chunk_size: int = 500) -> List[Chunk]:
-    """Chia văn bản thành chunks"""
-    chunks = []
-    lines = text.strip().split('\n')
-    current_chunk = ""
-    current_section = ""
-    chunk_id = 0
-    char_pos = 0
-    
-    for line in lines:
-        if line.startswith("CHƯƠNG"):
-            current_section = line
-        
-        if len(current_chunk) + len(line) > chunk_size and current_chunk:
-            chunk_text_val = current_chunk.strip()
-            chunks.append(Chunk(
-                chunk_id=f"c{chunk_id:03d}",
-                page=1,
-                section=current_section,
-                text=chunk_text_val,
-                char_start=char_pos,
-                char_end=char_pos + len(chunk_text_val)
-            ))
-            char_pos += len(chunk_text_val)
-            chunk_id += 1
-            current_chunk = line + "\n"
-        else:
-            current_chunk += line + "\n"
-    
-    if current_chunk.strip():
-        chunk_text_val = current_chunk.strip()
-        chunks.append(Chunk(
-            chunk_id=f"c{chunk_id:03d}",
-            page=1,
-            section=current_section,
-            text=chunk_text_val,
-            char_start=char_pos,
-            char_end=char_pos + len(chunk_text_val)
-        ))
+    """Chia văn bản thành chunks (ChunkingEngine dùng chung, không chồng lấn)"""
+    engine = ChunkingEngine.from_settings(chunk_size=chunk_size, chunk_overlap=0)
+    chunks = engine.chunk_text(text)
     
     logger.info(f"✅ Created {len(chunks)} chunks")
     return chunks
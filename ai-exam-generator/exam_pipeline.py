@@ -4,7 +4,7 @@ PDF → Blueprint → Matrix → Questions → Validation → Export
 """
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from pathlib import Path
 from loguru import logger
 import requests
@@ -19,6 +19,7 @@ from src.models import (
     Exam, Question, GlobalConfig
 )
 from src.validator import ExamValidator
+from src.chunking import ChunkingEngine
 
 
 class ExamPipeline:
@@ -85,52 +86,17 @@ class ExamPipeline:
         """Chunk document with section detection"""
         logger.info("📦 Chunking document...")
         
-        chunks = []
-        full_text = '\n'.join([p.text for p in document.pages])
-        lines = full_text.split('\n')
-        
-        current_chunk = ""
-        current_section = ""
-        chunk_id = 0
-        char_pos = 0
-        current_page = 1
-        
-        for line in lines:
-            # Detect sections
-            if any(keyword in line.upper() for keyword in ["CHƯƠNG", "BÀI", "MỤC TIÊU", "NỘI DUNG"]):
-                current_section = line.strip()
-            
-            if len(current_chunk) + len(line) > chunk_size and current_chunk:
-                text = current_chunk.strip()
-                chunks.append(Chunk(
-                    chunk_id=f"chunk_{chunk_id:04d}",
-                    page=current_page,
-                    section=current_section,
-                    text=text,
-                    char_start=char_pos,
-                    char_end=char_pos + len(text)
-                ))
-                char_pos += len(text)
-                chunk_id += 1
-                current_chunk = line + "\n"
-            else:
-                current_chunk += line + "\n"
-        
-        # Last chunk
-        if current_chunk.strip():
-            text = current_chunk.strip()
-            chunks.append(Chunk(
-                chunk_id=f"chunk_{chunk_id:04d}",
-                page=current_page,
-                section=current_section,
-                text=text,
-                char_start=char_pos,
-                char_end=char_pos + len(text)
-            ))
+        chunks = list(self.iter_chunks(document.pages, chunk_size))
         
         logger.info(f"✅ Created {len(chunks)} chunks")
         return chunks
     
+    @staticmethod
+    def iter_chunks(pages: Iterable[DocumentPage], chunk_size: int = 500) -> Iterator[Chunk]:
+        """Stream section-aware chunks page by page (shared ChunkingEngine, no overlap)"""
+        engine = ChunkingEngine.from_settings(chunk_size=chunk_size, chunk_overlap=0)
+        return engine.chunk_pages(pages)
+    
     def build_rag_index(self, chunks: List[Chunk]):
         """Build FAISS index for retrieval"""
         logger.info(f"🔍 Building RAG index for {len(chunks)} chunks...")
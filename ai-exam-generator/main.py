@@ -10,6 +10,11 @@ from loguru import logger
 
 from src.config import get_config
 from src.pdf_parser import PDFParser, TextCleaner
+from src.office_ingester import OfficeIngester
+from src.parse_cache import ParseCache
+from src.page_store import PageStore
+from src.ocr_cache import OCRTextCache
+from src.image_store import ImageStore
 from src.rag_indexer import TextChunker, RAGIndexer
 from src.generators import BlueprintGenerator, MatrixGenerator, QuestionGenerator
 from src.validator import ExamValidator
@@ -41,7 +46,7 @@ def main(pdf_path: str, config_path: str = "config.json"):
     Pipeline chính: PDF → Blueprint → Matrix → Exam → DOCX
     
     Args:
-        pdf_path: Đường dẫn file PDF đề cương
+        pdf_path: Đường dẫn file đề cương (PDF, DOCX hoặc PPTX)
         config_path: Đường dẫn file config
     """
     setup_logging()
@@ -57,19 +62,75 @@ def main(pdf_path: str, config_path: str = "config.json"):
         logger.info(f"   ✓ Model: {config.openai_model}")
         logger.info(f"   ✓ Output dir: {config.output_dir}")
         
-        # 2. Parse PDF
-        logger.info("\n📄 BƯỚC 2: Parse PDF đề cương")
-        parser = PDFParser()
-        document = parser.parse(pdf_path)
+        # 2-4. Parse PDF → chunking → RAG index theo luồng trang:
+        # mỗi trang parse xong được làm sạch, chia chunk và embed ngay
+        logger.info("\n📄 BƯỚC 2-4: Parse PDF, chia chunks và xây dựng RAG index")
+        parse_cache = None
+        if config.parse_cache_dir:
+            parse_cache = ParseCache(
+                config.parse_cache_dir,
+                max_bytes=config.parse_cache_max_mb * 1024 * 1024
+            )
+        parser = PDFParser(
+            backend=config.pdf_backend,
+            workers=config.pdf_workers,
+            defer_tables=config.defer_tables,
+            bounded_memory=config.bounded_memory,
+            memory_target_mb=config.memory_target_mb,
+            page_timeout=config.page_timeout,
+            page_memory_mb=config.page_memory_mb,
+            ocr_workers=config.ocr_workers,
+            ocr_mode=config.ocr_mode,
+            ocr_band_threads=config.ocr_band_threads,
+            cache=parse_cache,
+            ocr_cache=OCRTextCache(config.ocr_cache_path) if config.ocr_cache_path else None,
+            image_store=ImageStore(config.image_dir) if config.image_dir else None
+        )
+        cleaner = TextCleaner()
+        chunker = TextChunker(
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            include_tables=config.table_chunks,
+            unit=config.chunk_unit,
+            encoding_model=config.openai_embedding_model
+        )
+        indexer = RAGIndexer()
+        
+        # DOCX/PPTX đọc trực tiếp, không qua PDF
+        office = OfficeIngester() if OfficeIngester.supports(pdf_path) else None
+        
+        # Bounded-memory: trang đã xử lý ghi xuống đĩa thay vì giữ trong RAM
+        # (trang hoãn bảng đọc lại từ đĩa vẫn trích được bảng)
+        pages = []
+        if config.bounded_memory:
+            pages = PageStore(table_loader=None if office else parser.table_loader(pdf_path))
+        
+        def cleaned_pages():
+            if office:
+                stream = office.iter_pages(pdf_path)
+            else:
+                # Chỉ parse các chương/trang được chọn trong config (rỗng = cả tài liệu)
+                stream = parser.iter_pages(
+                    pdf_path,
+                    chapters=config.pdf_chapters,
+                    page_ranges=config.pdf_page_ranges
+                )
+            # Xóa header/footer lặp lại giữa các trang (tên trường, watermark...)
+            for page in cleaner.strip_repeated_lines(stream):
+                page.text = cleaner.clean(page.text)
+                yield page
+                # Lưu sau khi chunk xong: bảng hoãn lại đã được trích lúc chunk
+                pages.append(page)
+        
+        chunks = indexer.build_index_stream(chunker.chunk_pages(cleaned_pages()))
+        parser.close()
+        
+        document = (office or parser).build_document(pdf_path, pages)
         logger.info(f"   ✓ Tên file: {document.file_name}")
         logger.info(f"   ✓ Số trang: {len(document.pages)}")
         logger.info(f"   ✓ Môn học: {document.metadata.subject or 'N/A'}")
         logger.info(f"   ✓ Khối: {document.metadata.grade or 'N/A'}")
-        
-        # Clean text
-        cleaner = TextCleaner()
-        for page in document.pages:
-            page.text = cleaner.clean(page.text)
+        logger.info(f"   ✓ Số chunks: {len(chunks)}")
         
         # Save document
         doc_path = Path(config.output_dir) / "document.json"
@@ -77,14 +138,12 @@ def main(pdf_path: str, config_path: str = "config.json"):
             json.dump(document.model_dump(), f, ensure_ascii=False, indent=2, default=str)
         logger.info(f"   💾 Đã lưu: {doc_path}")
         
-        # 3. Chunking
-        logger.info("\n📦 BƯỚC 3: Chia text thành chunks")
-        chunker = TextChunker(
-            chunk_size=config.chunk_size,
-            chunk_overlap=config.chunk_overlap
-        )
-        chunks = chunker.chunk_document(document)
-        logger.info(f"   ✓ Số chunks: {len(chunks)}")
+        # Save parse profile (thời gian text/bảng/OCR theo trang) cho metrics
+        if parser.profile is not None and not office:
+            profile_path = Path(config.output_dir) / "parse_profile.json"
+            with open(profile_path, 'w', encoding='utf-8') as f:
+                json.dump(parser.profile.model_dump(), f, ensure_ascii=False, indent=2)
+            logger.info(f"   💾 Đã lưu: {profile_path}")
         
         # Save chunks
         chunks_path = Path(config.output_dir) / "chunks.json"
@@ -93,11 +152,6 @@ def main(pdf_path: str, config_path: str = "config.json"):
             json.dump(chunks_data, f, ensure_ascii=False, indent=2)
         logger.info(f"   💾 Đã lưu: {chunks_path}")
         
-        # 4. Build RAG index
-        logger.info("\n🔍 BƯỚC 4: Xây dựng RAG index")
-        indexer = RAGIndexer()
-        indexer.build_index(chunks)
-        
         # Save index
         index_path = str(Path(config.output_dir) / "index.faiss")
         chunks_meta_path = str(Path(config.output_dir) / "chunks_meta.pkl")
@@ -239,6 +293,7 @@ if __name__ == "__main__":
         print("\nVí dụ:")
         print("  python main.py de_cuong_toan_9.pdf")
         print("  python main.py de_cuong_van_11.pdf custom_config.json")
+        print("  python main.py de_cuong_su_10.docx")
         sys.exit(1)
     
     pdf_path = sys.argv[1]
@@ -0,0 +1,490 @@
+"""
+Engine chia text thành chunks, dùng chung cho TextChunker, ExamPipeline, api_server và demo_local
+"""
+import bisect
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import tiktoken
+from loguru import logger
+
+from .models import Document, DocumentPage, HeadingMark, Chunk
+
+
+CHUNK_UNITS = ('chars', 'tokens')
+
+# Điểm ngắt tự nhiên, theo thứ tự ưu tiên (chỉ số nhóm = độ ưu tiên)
+BREAK_SEPARATORS = ['\n\n', '.\n', '. ', '\n']
+_BREAK_PATTERN = re.compile('|'.join(f'({re.escape(sep)})' for sep in BREAK_SEPARATORS))
+
+DEFAULT_ENCODING = 'cl100k_base'
+
+# Dòng tiêu đề khi trang không có thông tin font (cả dòng, tối đa MAX_HEADING_TITLE ký tự
+# sau số): CHƯƠNG/BÀI/MỤC/PHẦN viết hoa hoặc Chapter + số, hoặc Chương/Bài/Mục/Phần
+# + số + ':'/'.' ("Bài 3 trang 45 là bài tập..." là câu thân bài, không phải tiêu đề)
+MAX_HEADING_TITLE = 100
+HEADING_PATTERN = re.compile(
+    r'^[ \t]*('
+    rf'(?:CHƯƠNG|BÀI|MỤC|PHẦN|CHAPTER|Chapter)[ \t]+[IVXLCDM\d]+\b[^\n]{{0,{MAX_HEADING_TITLE}}}?'
+    rf'|(?:[Cc]hương|[Bb]ài|[Mm]ục|[Pp]hần)[ \t]+[IVXLCDM\d]+[ \t]*[:.](?!\d)[^\n]{{0,{MAX_HEADING_TITLE}}}?'
+    r')[ \t]*$',
+    re.MULTILINE
+)
+
+# (section, start, end): khoảng [start, end) trong text của trang
+Span = Tuple[Optional[str], int, int]
+
+_encodings: Dict[str, tiktoken.Encoding] = {}
+
+
+def get_encoding(model: Optional[str] = None) -> tiktoken.Encoding:
+    """Tokenizer tiktoken của model embedding (cl100k_base nếu không biết model), tải một lần"""
+    key = model or ''
+    if key not in _encodings:
+        try:
+            _encodings[key] = tiktoken.encoding_for_model(key)
+        except KeyError:
+            _encodings[key] = tiktoken.get_encoding(DEFAULT_ENCODING)
+    return _encodings[key]
+
+
+def register_encoding(model: str, encoding: tiktoken.Encoding) -> None:
+    """Dùng `encoding` cho encoding_model `model` thay vì tokenizer của tiktoken (vd. BPE offline)"""
+    _encodings[model] = encoding
+
+
+class ChunkStrategy:
+    """Cách cắt text của trang thành các khoảng chunk"""
+
+    def split(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Cắt đoạn text[start:end] thành các khoảng (start, end) tuyệt đối trong text
+        """
+        raise NotImplementedError
+
+    def split_page(self, page: DocumentPage, section: Optional[str]) -> Tuple[List[Span], Optional[str]]:
+        """
+        Cắt một trang; mặc định cả trang là một đoạn thuộc section đang mở
+
+        Args:
+            page: Trang cần cắt
+            section: Section đang mở từ trang trước
+
+        Returns:
+            (các khoảng kèm section, section đang mở ở cuối trang)
+        """
+        return [(section, start, end) for start, end in self.split(page.text)], section
+
+
+class SlidingWindowStrategy(ChunkStrategy):
+    """Cửa sổ trượt theo ký tự, kết thúc ở điểm ngắt tự nhiên muộn nhất"""
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        """
+        Args:
+            chunk_size: Số ký tự tối đa mỗi chunk
+            chunk_overlap: Số ký tự chồng lấn giữa hai chunk liền nhau
+        """
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) phải nhỏ hơn chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def split(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        limit = len(text) if end is None else end
+        spans = []
+        while start < limit:
+            stop = start + self.chunk_size
+            if stop >= limit:
+                spans.append((start, limit))
+                break
+
+            # Điểm ngắt phải vượt phần chồng lấn để chunk sau tiến lên
+            for sep in BREAK_SEPARATORS:
+                last_sep = text.rfind(sep, start + self.chunk_overlap, stop)
+                if last_sep != -1:
+                    stop = last_sep + len(sep)
+                    break
+
+            spans.append((start, stop))
+            start = stop - self.chunk_overlap
+        return spans
+
+
+class TokenBudgetStrategy(ChunkStrategy):
+    """
+    Chia theo ngân sách token, thời gian tuyến tính
+
+    Text được cắt thành các đoạn tại điểm ngắt (BREAK_SEPARATORS) trong một
+    lượt, đếm token từng đoạn bằng tiktoken, rồi gom đoạn theo tổng tích lũy.
+    Mỗi chunk kết thúc ở điểm ngắt ưu tiên cao nhất, muộn nhất trong ngân
+    sách; chunk sau luôn bắt đầu ở đoạn sau đoạn đầu của chunk trước và kết
+    thúc sau chunk trước. Đoạn dài hơn ngân sách (không có điểm ngắt) bị cắt
+    tại ranh giới token, mỗi đoạn con đếm lại token nên không vượt ngân sách.
+    """
+
+    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 48, encoding_model: Optional[str] = None):
+        """
+        Args:
+            chunk_size: Số token tối đa mỗi chunk (không bao giờ vượt)
+            chunk_overlap: Số token chồng lấn tối đa giữa hai chunk liền nhau
+            encoding_model: Model embedding để chọn tokenizer (None = cl100k_base)
+        """
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) phải nhỏ hơn chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_model = encoding_model
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer của model embedding (tải lười ở lần dùng đầu tiên)"""
+        return get_encoding(self.encoding_model)
+
+    def split(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        offset = start
+        if start or end is not None:
+            text = text[start:end]
+
+        bounds, priorities, counts = self._token_pieces(text)
+        num_pieces = len(counts)
+        if not num_pieces:
+            return []
+
+        # cum[i] = số token của các đoạn [0, i)
+        cum = [0]
+        for count in counts:
+            cum.append(cum[-1] + count)
+
+        # Ranh giới i (sau đoạn i - 1) theo độ ưu tiên, tăng dần
+        breaks: List[List[int]] = [[] for _ in range(len(BREAK_SEPARATORS) + 1)]
+        for i, priority in enumerate(priorities[:-1], start=1):
+            breaks[priority].append(i)
+
+        spans = []
+        cursors = [0] * len(breaks)
+        first = stop = overlap_start = prev_last = 0
+        while first < num_pieces:
+            while stop < num_pieces and cum[stop + 1] - cum[first] <= self.chunk_size:
+                stop += 1
+            last = max(stop, first + 1)
+            if last < num_pieces:
+                # Giới hạn `stop` chỉ tăng nên mỗi con trỏ chỉ đi tới
+                for priority, candidates in enumerate(breaks):
+                    j = cursors[priority]
+                    while j < len(candidates) and candidates[j] <= stop:
+                        j += 1
+                    cursors[priority] = j
+                    # Điểm ngắt phải vượt phần chồng lấn để chunk sau tiến lên
+                    if j and cum[candidates[j - 1]] - cum[first] > self.chunk_overlap:
+                        last = candidates[j - 1]
+                        break
+
+            last = self._fit_token_budget(text, bounds, first, last)
+            # Chunk bị bớt đoạn cuối có thể nằm gọn trong chunk trước: bỏ qua
+            if last > prev_last:
+                spans.append((offset + bounds[first], offset + bounds[last]))
+                prev_last = last
+
+            if last >= num_pieces:
+                break
+            # Chồng lấn bằng các đoạn cuối của chunk, tổng không quá chunk_overlap
+            overlap_start = max(overlap_start, first + 1)
+            while cum[last] - cum[overlap_start] > self.chunk_overlap:
+                overlap_start += 1
+            first = overlap_start
+            stop = max(stop, first)
+
+        return spans
+
+    def _token_pieces(self, text: str) -> Tuple[List[int], List[int], List[int]]:
+        """
+        Cắt text tại điểm ngắt và đếm token từng đoạn
+
+        Returns:
+            (bounds: vị trí ký tự đầu các đoạn + len(text),
+             priorities: độ ưu tiên của điểm ngắt cuối mỗi đoạn,
+             counts: số token mỗi đoạn)
+        """
+        hard_cut = len(BREAK_SEPARATORS)
+        bounds, priorities = [0], []
+        for match in _BREAK_PATTERN.finditer(text):
+            bounds.append(match.end())
+            priorities.append(match.lastindex - 1)
+        if bounds[-1] < len(text):
+            bounds.append(len(text))
+            priorities.append(hard_cut)
+
+        pieces = [text[a:b] for a, b in zip(bounds, bounds[1:])]
+        encode = self.encoding.encode_ordinary
+        counts = [len(encode(piece)) for piece in pieces]
+        if max(counts, default=0) <= self.chunk_size:
+            return bounds, priorities, counts
+
+        # Đoạn vượt ngân sách: cắt theo token thành các đoạn nhỏ hơn
+        new_bounds, new_priorities, new_counts = [0], [], []
+        for i, count in enumerate(counts):
+            if count > self.chunk_size:
+                cuts = self._hard_cuts(pieces[i])
+                for cut, cut_count in cuts[:-1]:
+                    new_bounds.append(bounds[i] + cut)
+                    new_priorities.append(hard_cut)
+                    new_counts.append(cut_count)
+                count = cuts[-1][1]
+            new_bounds.append(bounds[i + 1])
+            new_priorities.append(priorities[i])
+            new_counts.append(count)
+        return new_bounds, new_priorities, new_counts
+
+    def _hard_cuts(self, piece: str) -> List[Tuple[int, int]]:
+        """
+        Cắt đoạn không có điểm ngắt thành các đoạn con khoảng
+        chunk_size - chunk_overlap token, tại ranh giới token
+
+        Mã hóa lại từng đoạn con (BPE ở mép cắt có thể ra nhiều token hơn
+        lát token ban đầu) và lùi mép cắt cho tới khi không vượt chunk_size.
+
+        Returns:
+            [(vị trí ký tự cuối đoạn con, số token)], đoạn cuối kết thúc ở len(piece)
+        """
+        encode = self.encoding.encode_ordinary
+        tokens = encode(piece)
+        # starts[k] = ký tự chứa byte đầu của token k (không giảm)
+        _, starts = self.encoding.decode_with_offsets(tokens)
+        step = self.chunk_size - self.chunk_overlap
+
+        cuts = []
+        pos = 0
+        while pos < len(piece):
+            k = bisect.bisect_left(starts, pos) + step
+            end = starts[k] if k < len(starts) else len(piece)
+            if end <= pos:
+                # Nhiều token cùng nằm trong một ký tự: cắt sau ký tự đó
+                k = bisect.bisect_right(starts, pos)
+                end = starts[k] if k < len(starts) else len(piece)
+            count = len(encode(piece[pos:end]))
+            while count > self.chunk_size and end > pos + 1:
+                k = bisect.bisect_left(starts, end) - 1
+                end = starts[k] if starts[k] > pos else end - 1
+                count = len(encode(piece[pos:end]))
+            cuts.append((end, count))
+            pos = end
+        return cuts
+
+    def _fit_token_budget(self, text: str, bounds: List[int], first: int, last: int) -> int:
+        """
+        Đảm bảo chunk [first, last) không vượt chunk_size token khi mã hóa cả
+        chunk (tổng token từng đoạn có thể lệch một chút); bớt đoạn cuối nếu cần
+        """
+        while last > first + 1:
+            tokens = self.encoding.encode_ordinary(text[bounds[first]:bounds[last]])
+            if len(tokens) <= self.chunk_size:
+                break
+            last -= 1
+        return last
+
+
+class SectionAwareStrategy(ChunkStrategy):
+    """
+    Cắt trang tại tiêu đề rồi chia từng section bằng strategy bên trong
+
+    Tiêu đề lấy từ font (page.headings) nếu có, ngược lại dò bằng
+    HEADING_PATTERN. Section được mang sang trang sau: phần đầu trang chưa có
+    tiêu đề mới vẫn thuộc section của trang trước. Dòng tiêu đề nằm ở đầu
+    chunk đầu tiên của section, nên chunk không bao giờ vắt qua hai section.
+    """
+
+    def __init__(self, window: ChunkStrategy, heading_pattern: re.Pattern = HEADING_PATTERN):
+        """
+        Args:
+            window: Strategy chia text trong mỗi section (SlidingWindowStrategy, TokenBudgetStrategy)
+            heading_pattern: Regex dòng tiêu đề (nhóm 1 = tiêu đề), dùng khi trang không có page.headings
+        """
+        self.window = window
+        self.heading_pattern = heading_pattern
+
+    def split(self, text: str, start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+        return self.window.split(text, start, end)
+
+    def split_page(self, page: DocumentPage, section: Optional[str]) -> Tuple[List[Span], Optional[str]]:
+        text = page.text
+        spans: List[Span] = []
+        cursor = 0
+        for start, end, title in self._find_headings(page):
+            if start > cursor:
+                spans.extend((section, a, b) for a, b in self.window.split(text, cursor, start))
+            section, cursor = title, start
+        spans.extend((section, a, b) for a, b in self.window.split(text, cursor))
+        return spans, section
+
+    def _find_headings(self, page: DocumentPage) -> List[Tuple[int, int, str]]:
+        """Các tiêu đề (start, end, title) theo thứ tự trong page.text"""
+        text = page.text
+        if page.headings is None:
+            return [
+                (match.start(1), match.end(1), ' '.join(match.group(1).split()))
+                for match in self.heading_pattern.finditer(text)
+            ]
+
+        headings = []
+        cursor = 0
+        for mark in page.headings:
+            located = self._locate_heading(text, mark, cursor)
+            if located is None:
+                # Tiêu đề đã bị TextCleaner xóa (vd. header lặp lại)
+                continue
+            headings.append((located[0], located[1], mark.title))
+            cursor = located[1]
+        return headings
+
+    @staticmethod
+    def _locate_heading(text: str, mark: HeadingMark, cursor: int) -> Optional[Tuple[int, int]]:
+        """
+        Vị trí tiêu đề trong text hiện tại, tìm từ `cursor` trở đi
+
+        Dùng vị trí lúc parse nếu text chưa bị sửa; nếu đã qua TextCleaner thì
+        tìm lại theo các từ của tiêu đề (khoảng trắng/xuống dòng bất kỳ).
+        """
+        if mark.char_start >= cursor and ' '.join(text[mark.char_start:mark.char_end].split()) == mark.title:
+            return mark.char_start, mark.char_end
+        pattern = r'\s+'.join(re.escape(word) for word in mark.title.split())
+        match = re.compile(pattern).search(text, cursor)
+        return match.span() if match else None
+
+
+def make_strategy(
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    unit: str = 'chars',
+    encoding_model: Optional[str] = None,
+    sections: bool = True
+) -> ChunkStrategy:
+    """
+    Strategy theo cấu hình
+
+    Args:
+        chunk_size: Kích thước chunk (ký tự, hoặc token khi unit='tokens')
+        chunk_overlap: Độ chồng lấn giữa các chunks (cùng đơn vị với chunk_size)
+        unit: 'chars' (SlidingWindowStrategy) hoặc 'tokens' (TokenBudgetStrategy)
+        encoding_model: Model embedding để chọn tokenizer khi unit='tokens'
+        sections: Bọc trong SectionAwareStrategy
+    """
+    if unit not in CHUNK_UNITS:
+        raise ValueError(f"Đơn vị chunk không hợp lệ: {unit} (chọn {', '.join(CHUNK_UNITS)})")
+    if unit == 'tokens':
+        window = TokenBudgetStrategy(chunk_size, chunk_overlap, encoding_model)
+    else:
+        window = SlidingWindowStrategy(chunk_size, chunk_overlap)
+    return SectionAwareStrategy(window) if sections else window
+
+
+class ChunkingEngine:
+    """
+    Chia luồng trang thành Chunk theo một ChunkStrategy
+
+    Mỗi chunk nằm trọn trong một trang: char_start/char_end là vị trí trong
+    page.text và text của chunk đúng bằng page.text[char_start:char_end].
+    chunk_id = p<trang>_c<số thứ tự trong trang>.
+    """
+
+    def __init__(self, strategy: ChunkStrategy, include_tables: bool = False):
+        """
+        Args:
+            strategy: Cách cắt text (xem make_strategy)
+            include_tables: Thêm mỗi bảng của trang thành một chunk riêng
+                (trang hoãn trích bảng sẽ được trích lúc này)
+        """
+        self.strategy = strategy
+        self.include_tables = include_tables
+
+    @classmethod
+    def from_settings(
+        cls,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        unit: str = 'chars',
+        encoding_model: Optional[str] = None,
+        include_tables: bool = False
+    ) -> 'ChunkingEngine':
+        """Engine section-aware với cửa sổ ký tự hoặc token (tham số như make_strategy)"""
+        return cls(make_strategy(chunk_size, chunk_overlap, unit, encoding_model), include_tables)
+
+    def chunk_document(self, document: Document) -> List[Chunk]:
+        """
+        Chia document thành chunks
+
+        Args:
+            document: Document đã parse
+
+        Returns:
+            List of chunks
+        """
+        logger.info(f"📦 Chunking document: {document.file_name}")
+
+        chunks = list(self.chunk_pages(document.pages))
+
+        logger.info(f"✅ Created {len(chunks)} chunks")
+        return chunks
+
+    def chunk_text(self, text: str, page: int = 1) -> List[Chunk]:
+        """Chia text thô (coi như một trang)"""
+        return list(self.chunk_pages([DocumentPage(page=page, text=text)]))
+
+    def chunk_pages(self, pages: Iterable[DocumentPage]) -> Iterator[Chunk]:
+        """
+        Chia chunks theo luồng trang (vd. từ PDFParser.iter_pages)
+
+        Args:
+            pages: Các trang theo thứ tự
+
+        Yields:
+            Chunk của từng trang ngay khi trang đó tới
+        """
+        section = None
+        for page in pages:
+            spans, section = self.strategy.split_page(page, section)
+            yield from self._make_chunks(page, spans)
+            if self.include_tables and page.has_tables:
+                yield from self._chunk_tables(page)
+
+    @staticmethod
+    def _make_chunks(page: DocumentPage, spans: List[Span]) -> List[Chunk]:
+        """Chunk từ các khoảng, bỏ khoảng trắng hai đầu (offset khớp text đã strip)"""
+        text = page.text
+        chunks = []
+        for section, start, end in spans:
+            raw = text[start:end]
+            body = raw.strip()
+            if not body:
+                continue
+            start += len(raw) - len(raw.lstrip())
+            chunks.append(Chunk(
+                chunk_id=f"p{page.page}_c{len(chunks):03d}",
+                page=page.page,
+                section=section,
+                text=body,
+                char_start=start,
+                char_end=start + len(body)
+            ))
+        return chunks
+
+    @staticmethod
+    def _chunk_tables(page: DocumentPage) -> List[Chunk]:
+        """Mỗi bảng thành một chunk, mỗi hàng một dòng, các ô ngăn bởi ' | '"""
+        chunks = []
+        for n, table in enumerate(page.load_tables()):
+            rows = [
+                ' | '.join((cell or '').replace('\n', ' ').strip() for cell in row)
+                for row in table.get('data', [])
+            ]
+            text = '\n'.join(row for row in rows if row.strip(' |'))
+            if text:
+                chunks.append(Chunk(
+                    chunk_id=f"p{page.page}_t{n:02d}",
+                    page=page.page,
+                    section=f"Bảng {n + 1}",
+                    text=text,
+                    char_start=0,
+                    char_end=len(text)
+                ))
+        return chunks
@@ -4,7 +4,7 @@ Configuration management cho hệ thống
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from loguru import logger
 
 
@@ -86,10 +86,82 @@ class Config:
     def chunk_overlap(self) -> int:
         return self.get('rag', 'chunk_overlap', default=200)
     
+    @property
+    def chunk_unit(self) -> str:
+        return self.get('rag', 'chunk_unit', default='chars')
+    
+    @property
+    def table_chunks(self) -> bool:
+        return self.get('rag', 'table_chunks', default=False)
+    
     @property
     def top_k(self) -> int:
         return self.get('rag', 'top_k_retrieval', default=5)
     
+    @property
+    def pdf_backend(self) -> str:
+        return self.get('pdf', 'backend', default='pdfplumber')
+    
+    @property
+    def pdf_workers(self) -> int:
+        return self.get('pdf', 'workers', default=1)
+    
+    @property
+    def ocr_workers(self) -> int:
+        return self.get('pdf', 'ocr_workers', default=2)
+    
+    @property
+    def parse_cache_dir(self) -> Optional[str]:
+        return self.get('pdf', 'cache_dir', default=None)
+    
+    @property
+    def parse_cache_max_mb(self) -> int:
+        return self.get('pdf', 'cache_max_mb', default=512)
+    
+    @property
+    def defer_tables(self) -> bool:
+        return self.get('pdf', 'defer_tables', default=False)
+    
+    @property
+    def bounded_memory(self) -> bool:
+        return self.get('pdf', 'bounded_memory', default=False)
+    
+    @property
+    def memory_target_mb(self) -> Optional[int]:
+        return self.get('pdf', 'memory_target_mb', default=None)
+    
+    @property
+    def ocr_mode(self) -> str:
+        return self.get('pdf', 'ocr_mode', default='page')
+    
+    @property
+    def ocr_band_threads(self) -> int:
+        return self.get('pdf', 'ocr_band_threads', default=0)
+    
+    @property
+    def image_dir(self) -> Optional[str]:
+        return self.get('pdf', 'image_dir', default=None)
+    
+    @property
+    def page_timeout(self) -> Optional[float]:
+        return self.get('pdf', 'page_timeout_s', default=None)
+    
+    @property
+    def page_memory_mb(self) -> Optional[int]:
+        return self.get('pdf', 'page_memory_mb', default=None)
+    
+    @property
+    def ocr_cache_path(self) -> Optional[str]:
+        return self.get('pdf', 'ocr_cache_path', default=None)
+    
+    @property
+    def pdf_chapters(self) -> List[str]:
+        return self.get('pdf', 'chapters', default=[])
+    
+    @property
+    def pdf_page_ranges(self) -> List[List[int]]:
+        return self.get('pdf', 'page_ranges', default=[])
+    
     @property
     def upload_dir(self) -> str:
         return self.get('paths', 'upload_dir', default='./uploads')
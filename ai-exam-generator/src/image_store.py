@@ -0,0 +1,176 @@
+"""
+Kho ảnh trích từ tài liệu, đánh địa chỉ theo nội dung (hash ảnh)
+"""
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+from loguru import logger
+
+
+# Ảnh nhỏ hơn (pixel mỗi chiều) coi là icon/đường kẻ, không lưu
+MIN_IMAGE_PX = 32
+# Ảnh phủ từ tỷ lệ này của trang trở lên là ảnh scan nguyên trang (đã OCR), không lưu
+MAX_PAGE_COVERAGE = 0.8
+
+
+class ImageStore:
+    """
+    Lưu ảnh nhúng trong PDF, khóa = SHA-256 bytes ảnh gốc
+
+    Ảnh giống hệt nhau (logo trường lặp ở mọi trang, cùng hình ở nhiều tài
+    liệu) chỉ lưu một lần. DocumentPage.images chỉ giữ hash, nên JSON của
+    Document vẫn nhỏ. Thumbnail được tạo lười ở lần truy cập đầu tiên.
+
+    Bố cục: `<root>/<2 ký tự đầu>/<hash>.<ext>`, thumbnail ở
+    `<root>/thumbs/<2 ký tự đầu>/<hash>_<size>.png`.
+    """
+
+    def __init__(self, root: str = './cache/images', thumbnail_size: int = 256):
+        """
+        Args:
+            root: Thư mục lưu ảnh
+            thumbnail_size: Cạnh dài mặc định của thumbnail (pixel)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.thumbnail_size = thumbnail_size
+        self.stored = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def make_key(data: bytes) -> str:
+        """Hash nội dung ảnh"""
+        return hashlib.sha256(data).hexdigest()
+
+    def _image_path(self, key: str, ext: str) -> Path:
+        return self.root / key[:2] / f"{key}.{ext}"
+
+    def put(self, data: bytes, ext: str = 'png') -> str:
+        """
+        Lưu ảnh (bỏ qua nếu đã có) và trả về hash
+
+        Args:
+            data: Bytes ảnh đã mã hóa (png, jpeg, ...)
+            ext: Phần mở rộng của định dạng ảnh
+        """
+        key = self.make_key(data)
+        if self.path(key) is not None:
+            self.deduplicated += 1
+            return key
+
+        path = self._image_path(key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Ghi ra file tạm rồi rename để process khác không đọc phải file dở
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.stored += 1
+        return key
+
+    def path(self, key: str) -> Optional[Path]:
+        """Đường dẫn file ảnh gốc (None nếu không có trong kho)"""
+        return next(self.root.glob(f"{key[:2]}/{key}.*"), None)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes ảnh gốc (None nếu không có trong kho)"""
+        path = self.path(key)
+        return path.read_bytes() if path is not None else None
+
+    def thumbnail(self, key: str, size: Optional[int] = None) -> Optional[Path]:
+        """
+        Đường dẫn thumbnail PNG của ảnh, tạo ở lần gọi đầu tiên
+
+        Args:
+            key: Hash ảnh (phần tử của DocumentPage.images)
+            size: Cạnh dài tối đa (mặc định thumbnail_size)
+        """
+        size = size or self.thumbnail_size
+        thumb_path = self.root / 'thumbs' / key[:2] / f"{key}_{size}.png"
+        if thumb_path.exists():
+            return thumb_path
+
+        data = self.get(key)
+        if data is None:
+            return None
+
+        try:
+            image = Image.open(io.BytesIO(data))
+            image.load()
+        except Exception:
+            # Định dạng PIL không đọc được (jpx, jbig2...): chuyển qua PyMuPDF
+            image = Image.open(io.BytesIO(fitz.Pixmap(data).tobytes('png')))
+
+        if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGB')
+        image.thumbnail((size, size))
+
+        thumb_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=thumb_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, format='PNG')
+        os.replace(tmp_path, thumb_path)
+        return thumb_path
+
+    def extract_page_images(
+        self,
+        pdf_doc: fitz.Document,
+        page_index: int,
+        xref_keys: Optional[Dict[int, Optional[str]]] = None
+    ) -> List[str]:
+        """
+        Trích ảnh nhúng của một trang vào kho
+
+        Args:
+            pdf_doc: Tài liệu PyMuPDF đang mở
+            page_index: Chỉ số trang (0-indexed)
+            xref_keys: Cache xref -> hash dùng chung cho cả tài liệu, để ảnh
+                lặp ở nhiều trang (cùng xref) chỉ giải mã một lần
+
+        Returns:
+            Hash các ảnh theo thứ tự đọc (trên xuống, trái sang), không trùng
+        """
+        if xref_keys is None:
+            xref_keys = {}
+
+        page = pdf_doc[page_index]
+        page_area = abs(page.rect) or 1.0
+        infos = sorted(
+            page.get_image_info(xrefs=True),
+            key=lambda info: (info['bbox'][1], info['bbox'][0])
+        )
+
+        keys: List[str] = []
+        for info in infos:
+            xref = info.get('xref', 0)
+            if xref <= 0:
+                # Ảnh inline trong content stream: không có xref để trích
+                continue
+            if info['width'] < MIN_IMAGE_PX or info['height'] < MIN_IMAGE_PX:
+                continue
+            if abs(fitz.Rect(info['bbox']) & page.rect) / page_area >= MAX_PAGE_COVERAGE:
+                continue
+
+            if xref not in xref_keys:
+                xref_keys[xref] = self._extract_xref(pdf_doc, xref)
+            key = xref_keys[xref]
+            if key and key not in keys:
+                keys.append(key)
+        return keys
+
+    def _extract_xref(self, pdf_doc: fitz.Document, xref: int) -> Optional[str]:
+        try:
+            extracted = pdf_doc.extract_image(xref)
+        except Exception as e:
+            logger.debug(f"   Không trích được ảnh xref {xref}: {e}")
+            return None
+        if not extracted or not extracted.get('image'):
+            return None
+        return self.put(extracted['image'], extracted.get('ext') or 'png')
@@ -80,9 +80,8 @@ class ExamGeneratorApp:
         logger.info("\n📖 BƯỚC 1: PARSE PDF")
         document = self.pdf_parser.parse(pdf_path)
         
-        # Clean text
-        for page in document.pages:
-            page.text = TextCleaner.clean(page.text)
+        # Clean text (kèm xóa header/footer lặp lại giữa các trang)
+        TextCleaner.clean_document(document)
         
         # Save document JSON
         doc_json_path = Path(self.settings.export_dir) / f"{document.doc_id}_document.json"
@@ -1,19 +1,126 @@
 """
 Data models cho hệ thống sinh đề kiểm tra
 """
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Literal
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer
+from typing import List, Optional, Dict, Any, Callable, Literal
 from datetime import datetime
 
 
 # ===================== DOCUMENT MODELS =====================
 
+class HeadingMark(BaseModel):
+    """Tiêu đề phát hiện trên trang, vị trí [char_start, char_end) trong page.text lúc parse"""
+    level: int
+    title: str
+    char_start: int
+    char_end: int
+
+
 class DocumentPage(BaseModel):
     """Một trang trong PDF"""
     page: int
     text: str
     tables: List[Dict[str, Any]] = Field(default_factory=list)
     images: List[str] = Field(default_factory=list)
+    # Trang có dấu hiệu bảng (nét kẻ/khung); tables_loaded=False nghĩa là
+    # việc trích bảng được hoãn tới khi gọi load_tables()
+    has_tables: bool = False
+    tables_loaded: bool = True
+    # Hash nội dung trang (content stream + ảnh), dùng để parse lại tăng dần
+    content_hash: Optional[str] = None
+    # Tiêu đề phát hiện từ cỡ/độ đậm font (None = trang không có thông tin font,
+    # vd. OCR hoặc backend pdfplumber; [] = đã phân tích, không có tiêu đề)
+    headings: Optional[List[HeadingMark]] = None
+    # Lý do trang chỉ có text thô do vượt ngân sách ('timeout', 'memory', 'crashed', 'error')
+    degraded: Optional[str] = None
+    
+    _table_loader: Optional[Callable[[int], List[Dict[str, Any]]]] = PrivateAttr(default=None)
+    
+    def load_tables(self) -> List[Dict[str, Any]]:
+        """Bảng của trang; nếu đang hoãn thì trích ngay lúc này (một lần)"""
+        if not self.tables_loaded and self._table_loader is not None:
+            self.tables = self._table_loader(self.page)
+            self.tables_loaded = True
+        return self.tables
+
+
+class DocumentDiff(BaseModel):
+    """Khác biệt giữa bản sửa và bản đã parse trước đó (số trang 1-indexed)"""
+    changed_pages: List[int] = Field(default_factory=list)  # Trang mới/đã sửa, được trích xuất lại
+    removed_pages: List[int] = Field(default_factory=list)  # Trang của bản cũ không còn trong bản mới
+    reused_pages: int = 0
+
+
+class PageTiming(BaseModel):
+    """Thời gian xử lý (giây) và thông số một trang, gửi cho progress callback"""
+    page: int
+    text_time: float = 0.0
+    table_time: float = 0.0
+    ocr_time: float = 0.0
+    total_time: float = 0.0
+    chars: int = 0
+    ocr_triggered: bool = False
+    ocr_dpi: Optional[int] = None
+    ocr_cache_hit: bool = False
+    degraded: Optional[str] = None
+
+
+class ParseProfile(BaseModel):
+    """Tổng hợp thời gian parse một tài liệu, để gắn vào kết quả job / xuất metrics"""
+    file_name: str
+    pages: int = 0
+    wall_time: float = 0.0
+    text_time: float = 0.0
+    table_time: float = 0.0
+    ocr_time: float = 0.0
+    ocr_pages: int = 0
+    ocr_cache_hits: int = 0
+    chars: int = 0
+    cache_hit: bool = False
+    slowest_pages: List[int] = Field(default_factory=list)
+    degraded_pages: List[int] = Field(default_factory=list)
+
+    @classmethod
+    def from_timings(
+        cls,
+        file_name: str,
+        timings: List[PageTiming],
+        wall_time: float,
+        slowest: int = 5
+    ) -> "ParseProfile":
+        ranked = sorted(timings, key=lambda t: t.total_time, reverse=True)
+        return cls(
+            file_name=file_name,
+            pages=len(timings),
+            wall_time=wall_time,
+            text_time=sum(t.text_time for t in timings),
+            table_time=sum(t.table_time for t in timings),
+            ocr_time=sum(t.ocr_time for t in timings),
+            ocr_pages=sum(t.ocr_triggered for t in timings),
+            ocr_cache_hits=sum(t.ocr_cache_hit for t in timings),
+            chars=sum(t.chars for t in timings),
+            slowest_pages=[t.page for t in ranked[:slowest]],
+            degraded_pages=[t.page for t in timings if t.degraded]
+        )
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.wall_time if self.wall_time > 0 else 0.0
+
+
+class OutlineEntry(BaseModel):
+    """
+    Một mục trong mục lục PDF (chương/bài), trang 1-indexed, gồm cả hai đầu
+
+    char_start (trong text trang page_start) và char_end (trong text trang
+    page_end, không gồm) chỉ có khi mục lục dựng từ tiêu đề phát hiện theo font.
+    """
+    level: int
+    title: str
+    page_start: int
+    page_end: int
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
 
 
 class DocumentMetadata(BaseModel):
@@ -31,7 +138,18 @@ class Document(BaseModel):
     file_name: str
     metadata: DocumentMetadata
     pages: List[DocumentPage]
+    outline: List[OutlineEntry] = Field(default_factory=list)
     created_at: datetime = Field(default_factory=datetime.now)
+    # Đã qua TextCleaner.clean_document() (text trang không còn là text trích xuất thô)
+    cleaned: bool = False
+    
+    @field_serializer('pages')
+    def _serialize_pages(self, pages, info):
+        # pages có thể là PageStore (đọc lười từ đĩa) ở chế độ bounded-memory:
+        # ra JSON thì lần lượt từng trang, không nạp hết trang vào RAM
+        if info.mode_is_json():
+            return iter(pages)
+        return list(pages)
 
 
 # ===================== CHUNK MODELS =====================
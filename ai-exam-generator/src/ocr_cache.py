@@ -0,0 +1,101 @@
+"""
+Cache text OCR theo hash ảnh trang đã nhị phân hóa
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class OCRTextCache:
+    """
+    Cache text OCR lưu trong SQLite, dùng chung giữa các worker OCR
+
+    Khóa là hash của ảnh đã render + nhị phân hóa, nên các trang scan giống
+    hệt nhau ở những PDF khác nhau (trang bìa CV 7991, bảng phụ lục của Bộ...)
+    chỉ phải OCR một lần. Bộ đếm hit/miss và thời gian tiết kiệm được lưu
+    cùng DB để theo dõi trên toàn bộ corpus.
+    """
+
+    def __init__(self, db_path: str = './cache/ocr_text.sqlite3'):
+        """
+        Args:
+            db_path: File SQLite lưu cache
+        """
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+    def __getstate__(self):
+        # Connection SQLite không pickle được, mỗi process tự mở lại
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_conn_pid'] = None
+        return state
+
+    def _connection(self) -> sqlite3.Connection:
+        """Mở connection riêng cho process hiện tại"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_text ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL,"
+                " ocr_seconds REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " name TEXT PRIMARY KEY, value REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def image_key(image: np.ndarray, lang: str) -> str:
+        """Hash ảnh nhị phân (kèm kích thước và ngôn ngữ OCR)"""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{image.shape}|{lang}|".encode('utf-8'))
+        digest.update(np.ascontiguousarray(image).data)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Trả về (text, số giây OCR ban đầu) hoặc None"""
+        row = self._connection().execute(
+            "SELECT text, ocr_seconds FROM ocr_text WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, text: str, ocr_seconds: float) -> None:
+        """Lưu text OCR của một ảnh"""
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_text (key, text, ocr_seconds, created_at) VALUES (?, ?, ?, ?)",
+            (key, text, ocr_seconds, time.time())
+        )
+        conn.commit()
+
+    def record(self, hits: int, misses: int, seconds_saved: float) -> None:
+        """Cộng dồn bộ đếm hit/miss và thời gian OCR tiết kiệm được"""
+        conn = self._connection()
+        for name, value in (('hits', hits), ('misses', misses), ('seconds_saved', seconds_saved)):
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value)
+            )
+        conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Bộ đếm tích lũy: hits, misses, seconds_saved, entries"""
+        conn = self._connection()
+        stats = {'hits': 0, 'misses': 0, 'seconds_saved': 0.0}
+        stats.update(dict(conn.execute("SELECT name, value FROM counters").fetchall()))
+        stats['entries'] = conn.execute("SELECT COUNT(*) FROM ocr_text").fetchone()[0]
+        return stats
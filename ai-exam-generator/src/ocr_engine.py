@@ -0,0 +1,569 @@
+"""
+Module OCR các trang PDF scan bằng pool worker dùng lâu dài
+"""
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+import pytesseract
+from PIL import Image
+from loguru import logger
+
+from .ocr_cache import OCRTextCache
+
+try:
+    import tesserocr  # Binding Tesseract chạy trong process, không spawn subprocess
+except ImportError:
+    tesserocr = None
+
+
+OCR_MODES = ('page', 'regions')
+
+# Chọn DPI thích ứng: cỡ chữ mục tiêu (pixel/em) cho Tesseract và giới hạn DPI
+TARGET_EM_PX = 36
+DEFAULT_GLYPH_PT = 11.0
+MIN_OCR_DPI = 100
+
+# Ảnh nhỏ hơn ngưỡng này (pt²) coi là logo/icon, không OCR
+MIN_REGION_AREA = 72 * 72
+# Ảnh phủ từ tỷ lệ này trở lên coi là trang scan nguyên trang
+FULL_PAGE_COVERAGE = 0.8
+
+# OCR theo dải ngang cho ảnh trang rất lớn (vd. A3 ở 300 DPI ~ 17 triệu pixel)
+BAND_MIN_PIXELS = 12_000_000
+BAND_OVERLAP_PX = 32
+# Cửa sổ (tỷ lệ chiều cao dải) để tìm hàng trắng gần vị trí cắt dự kiến
+BAND_SEARCH_RATIO = 0.25
+
+
+class OCRPageResult(NamedTuple):
+    """Kết quả OCR một trang"""
+    text: str
+    seconds: float
+    dpi: int = 0
+    pixels: int = 0
+    cache_hit: bool = False
+
+
+# Trạng thái riêng của từng worker: tài liệu đang mở và Tesseract API
+_WORKER_STATE = {
+    'doc_key': None,
+    'doc': None,
+    'api': None,
+    'api_lang': None,
+    'band_pool': None,
+    'band_pool_threads': 0,
+}
+
+# Tesseract API riêng cho từng thread OCR dải (API không dùng chung giữa thread)
+_THREAD_STATE = threading.local()
+
+
+def _document_key(pdf_path: str) -> Tuple[str, float, int]:
+    """Khóa nhận diện file (đường dẫn + mtime + size) để biết khi nào phải mở lại"""
+    stat = os.stat(pdf_path)
+    return (os.path.abspath(pdf_path), stat.st_mtime, stat.st_size)
+
+
+def _open_worker_document(source: Union[str, fitz.Document]) -> fitz.Document:
+    """Mở PDF một lần cho mỗi worker, tái sử dụng cho các batch sau"""
+    if isinstance(source, fitz.Document):
+        # Tài liệu đã mở sẵn (PDF từ buffer trong RAM), dùng luôn
+        return source
+    key = _document_key(source)
+    if _WORKER_STATE['doc_key'] != key:
+        if _WORKER_STATE['doc'] is not None:
+            _WORKER_STATE['doc'].close()
+        _WORKER_STATE['doc'] = fitz.open(source)
+        _WORKER_STATE['doc_key'] = key
+    return _WORKER_STATE['doc']
+
+
+def _close_worker_document() -> None:
+    """Đóng tài liệu đang giữ trong _WORKER_STATE (nếu có)"""
+    if _WORKER_STATE['doc'] is not None:
+        _WORKER_STATE['doc'].close()
+    _WORKER_STATE['doc'] = None
+    _WORKER_STATE['doc_key'] = None
+
+
+def _get_tesseract_api(lang: str):
+    """Khởi tạo tesserocr API một lần cho mỗi worker (None nếu không cài)"""
+    if tesserocr is None:
+        return None
+    if _WORKER_STATE['api'] is None or _WORKER_STATE['api_lang'] != lang:
+        if _WORKER_STATE['api'] is not None:
+            _WORKER_STATE['api'].End()
+        _WORKER_STATE['api'] = tesserocr.PyTessBaseAPI(lang=lang)
+        _WORKER_STATE['api_lang'] = lang
+    return _WORKER_STATE['api']
+
+
+def _get_thread_api(lang: str):
+    """Như _get_tesseract_api nhưng cho thread OCR dải hiện tại"""
+    if tesserocr is None:
+        return None
+    if getattr(_THREAD_STATE, 'api', None) is None or _THREAD_STATE.lang != lang:
+        if getattr(_THREAD_STATE, 'api', None) is not None:
+            _THREAD_STATE.api.End()
+        _THREAD_STATE.api = tesserocr.PyTessBaseAPI(lang=lang)
+        _THREAD_STATE.lang = lang
+    return _THREAD_STATE.api
+
+
+def _get_band_pool(threads: int) -> ThreadPoolExecutor:
+    """Pool thread OCR dải, giữ sống trong worker để tái dùng Tesseract API"""
+    pool = _WORKER_STATE['band_pool']
+    if pool is None or _WORKER_STATE['band_pool_threads'] != threads:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='ocr-band')
+        _WORKER_STATE['band_pool'] = pool
+        _WORKER_STATE['band_pool_threads'] = threads
+    return pool
+
+
+def render_binarized(page: fitz.Page, dpi: int, clip: Optional[fitz.Rect] = None) -> np.ndarray:
+    """Render trang (hoặc vùng clip) thành ảnh xám đã nhị phân hóa (Otsu) để OCR"""
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, clip=clip)
+
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+
+def choose_dpi(
+    region: fitz.Rect,
+    image_width_px: Optional[int],
+    glyph_pt: Optional[float],
+    max_dpi: int
+) -> int:
+    """
+    Chọn DPI render cho một vùng
+
+    DPI đủ để chữ cỡ `glyph_pt` đạt TARGET_EM_PX pixel, nhưng không vượt
+    độ phân giải gốc của ảnh scan (render cao hơn không thêm thông tin).
+    """
+    dpi = TARGET_EM_PX * 72 / (glyph_pt or DEFAULT_GLYPH_PT)
+    if image_width_px and region.width > 0:
+        dpi = min(dpi, image_width_px * 72 / region.width)
+    return int(max(MIN_OCR_DPI, min(max_dpi, dpi)))
+
+
+def _glyph_height_pt(page: fitz.Page) -> Optional[float]:
+    """Cỡ chữ trung vị của lớp text có sẵn trên trang (None nếu không có)"""
+    sizes = [
+        span['size']
+        for block in page.get_text('dict')['blocks']
+        for line in block.get('lines', [])
+        for span in line['spans']
+        if span['text'].strip()
+    ]
+    return float(np.median(sizes)) if sizes else None
+
+
+def _plan_regions(page: fitz.Page, max_dpi: int) -> Tuple[str, List[Tuple[fitz.Rect, int]]]:
+    """
+    Chọn các vùng cần OCR của một trang
+
+    Trang chủ yếu là text kèm ảnh scan chỉ OCR vùng ảnh; trang scan nguyên
+    trang (hoặc không có thông tin ảnh) thì OCR cả trang.
+
+    Returns:
+        (text sẵn có trên trang, list of (vùng, dpi))
+    """
+    native_text = page.get_text().strip()
+    glyph_pt = _glyph_height_pt(page) if native_text else None
+    page_area = abs(page.rect)
+
+    images = [
+        info for info in page.get_image_info()
+        if abs(fitz.Rect(info['bbox']) & page.rect) >= MIN_REGION_AREA
+    ]
+    coverage = sum(abs(fitz.Rect(info['bbox']) & page.rect) for info in images) / page_area
+
+    if not images or not native_text or coverage >= FULL_PAGE_COVERAGE:
+        widest = max(images, key=lambda info: info['width'], default=None)
+        image_width = None
+        if widest is not None:
+            # Quy đổi độ phân giải ảnh lớn nhất ra bề rộng cả trang
+            image_width = int(widest['width'] * page.rect.width / fitz.Rect(widest['bbox']).width)
+        dpi = choose_dpi(page.rect, image_width, glyph_pt, max_dpi)
+        return "", [(page.rect, dpi)]
+
+    regions = []
+    for info in sorted(images, key=lambda info: (info['bbox'][1], info['bbox'][0])):
+        rect = fitz.Rect(info['bbox']) & page.rect
+        regions.append((rect, choose_dpi(rect, info['width'], glyph_pt, max_dpi)))
+    return native_text, regions
+
+
+def _recognize_batch(images: List[np.ndarray], lang: str) -> List[str]:
+    """
+    OCR nhiều ảnh liên tiếp
+
+    Ưu tiên tesserocr (trong process). Nếu không có, gom cả batch vào
+    một lần gọi tesseract qua file danh sách ảnh thay vì mỗi trang một process.
+    """
+    api = _get_tesseract_api(lang)
+    if api is not None:
+        texts = []
+        for img in images:
+            api.SetImage(Image.fromarray(img))
+            texts.append(api.GetUTF8Text())
+        return texts
+
+    if len(images) == 1:
+        return [pytesseract.image_to_string(Image.fromarray(images[0]), lang=lang)]
+
+    with tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp_dir:
+        paths = []
+        for n, img in enumerate(images):
+            path = os.path.join(tmp_dir, f"{n:04d}.png")
+            cv2.imwrite(path, img)
+            paths.append(path)
+
+        list_path = os.path.join(tmp_dir, "pages.txt")
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(paths))
+
+        result = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout', '-l', lang],
+            capture_output=True,
+            check=True
+        )
+
+    # Tesseract ngăn cách các trang bằng form feed
+    texts = result.stdout.decode('utf-8', errors='replace').split('\f')
+    texts += [""] * (len(images) - len(texts))
+    return texts[:len(images)]
+
+
+def split_bands(
+    img: np.ndarray,
+    count: int,
+    overlap: int = BAND_OVERLAP_PX
+) -> List[Tuple[int, int]]:
+    """
+    Chia ảnh đã nhị phân hóa thành `count` dải ngang (top, bottom)
+
+    Mỗi vị trí cắt được dời về giữa khoảng hàng trắng dài nhất gần đó để
+    không cắt ngang dòng chữ. Nếu không có hàng trắng thì cắt tại chỗ và
+    hai dải chồng lên nhau `overlap` pixel; dòng bị lặp do chồng được bỏ
+    khi ghép text (stitch_bands).
+    """
+    height = img.shape[0]
+    count = max(1, min(count, height // max(1, 4 * overlap)))
+    if count == 1:
+        return [(0, height)]
+
+    # Hàng trắng: không có pixel mực (chữ đen trên nền trắng sau Otsu)
+    blank = (img < 128).sum(axis=1) == 0
+    band_height = height / count
+    search = max(1, int(band_height * BAND_SEARCH_RATIO))
+
+    bands = []
+    top = 0
+    for n in range(1, count):
+        target = int(n * band_height)
+        lo, hi = max(top + 1, target - search), min(height - 1, target + search)
+        cut = _widest_blank_center(blank, lo, hi)
+        if cut is None:
+            bands.append((top, min(height, target + overlap)))
+            top = max(0, target - overlap)
+        else:
+            bands.append((top, cut))
+            top = cut
+    bands.append((top, height))
+    return bands
+
+
+def _widest_blank_center(blank: np.ndarray, lo: int, hi: int) -> Optional[int]:
+    """Giữa khoảng hàng trắng liên tiếp dài nhất trong [lo, hi) (None nếu không có)"""
+    best, best_len = None, 0
+    start = None
+    for y in range(lo, hi + 1):
+        if y < hi and blank[y]:
+            if start is None:
+                start = y
+        elif start is not None:
+            if y - start > best_len:
+                best, best_len = (start + y) // 2, y - start
+            start = None
+    return best
+
+
+def stitch_bands(texts: List[str], bands: List[Tuple[int, int]]) -> str:
+    """
+    Ghép text các dải theo thứ tự đọc
+
+    Chỉ ở chỗ hai dải chồng nhau (cắt ngang chữ) mới bỏ dòng đầu dải sau
+    trùng với dòng cuối dải trước.
+    """
+    lines: List[str] = []
+    for n, text in enumerate(texts):
+        band_lines = text.strip().splitlines()
+        if n and lines and bands[n][0] < bands[n - 1][1]:
+            tail = [line.strip() for line in lines[-2:]]
+            while band_lines and band_lines[0].strip() and band_lines[0].strip() in tail:
+                band_lines.pop(0)
+        lines.extend(band_lines)
+    return '\n'.join(lines).strip()
+
+
+def _recognize_band(img: np.ndarray, lang: str) -> str:
+    api = _get_thread_api(lang)
+    if api is not None:
+        api.SetImage(Image.fromarray(img))
+        return api.GetUTF8Text()
+    # pytesseract chạy subprocess riêng, song song được giữa các thread
+    return pytesseract.image_to_string(Image.fromarray(img), lang=lang)
+
+
+def _recognize_banded(img: np.ndarray, lang: str, threads: int) -> str:
+    """OCR một ảnh lớn: chia dải, OCR song song trên nhiều thread, ghép lại"""
+    bands = split_bands(img, threads)
+    if len(bands) == 1:
+        return _recognize_batch([img], lang)[0]
+    pool = _get_band_pool(threads)
+    texts = pool.map(lambda band: _recognize_band(img[band[0]:band[1]], lang), bands)
+    return stitch_bands(list(texts), bands)
+
+
+def _ocr_batch_worker(
+    source: Union[str, fitz.Document],
+    page_indices: List[int],
+    dpi: int,
+    lang: str,
+    cache: Optional[OCRTextCache] = None,
+    mode: str = 'page',
+    band_threads: int = 1,
+    band_min_pixels: int = BAND_MIN_PIXELS
+) -> List[Tuple[int, OCRPageResult]]:
+    """
+    OCR một batch trang liên tiếp trong worker
+
+    mode='page' render cả trang ở `dpi`; mode='regions' chỉ render vùng ảnh
+    với DPI thích ứng (tối đa `dpi`). Ảnh đã nhị phân hóa được tra trong
+    cache trước, chỉ ảnh miss mới gửi sang Tesseract. Ảnh từ
+    `band_min_pixels` pixel trở lên được OCR theo dải trên `band_threads` thread.
+
+    Returns:
+        List of (page_index, OCRPageResult)
+    """
+    t0 = time.perf_counter()
+    doc = _open_worker_document(source)
+
+    # Mỗi trang có thể gồm nhiều ảnh (vùng) cần OCR
+    native_texts: Dict[int, str] = {}
+    jobs: List[Tuple[int, np.ndarray]] = []
+    page_dpi: Dict[int, int] = {}
+    for page_index in page_indices:
+        page = doc[page_index]
+        if mode == 'regions':
+            native_text, regions = _plan_regions(page, dpi)
+        else:
+            native_text, regions = "", [(None, dpi)]
+        native_texts[page_index] = native_text
+        page_dpi[page_index] = max(region_dpi for _, region_dpi in regions)
+        for clip, region_dpi in regions:
+            jobs.append((page_index, render_binarized(page, region_dpi, clip)))
+    render_time = (time.perf_counter() - t0) / max(1, len(page_indices))
+
+    texts: List[Optional[str]] = [None] * len(jobs)
+    keys: List[Optional[str]] = [None] * len(jobs)
+    seconds_saved = 0.0
+
+    if cache is not None:
+        for n, (_, img) in enumerate(jobs):
+            keys[n] = OCRTextCache.image_key(img, lang)
+            cached = cache.get(keys[n])
+            if cached is not None:
+                texts[n] = cached[0]
+                seconds_saved += cached[1]
+
+    misses = [n for n, text in enumerate(texts) if text is None]
+    ocr_seconds: Dict[int, float] = {}
+    if misses:
+        oversized = [
+            n for n in misses
+            if band_threads > 1 and jobs[n][1].size >= band_min_pixels
+        ]
+        regular = [n for n in misses if n not in oversized]
+
+        recognized: List[Tuple[int, str, float]] = []
+        if regular:
+            t1 = time.perf_counter()
+            batch_texts = _recognize_batch([jobs[n][1] for n in regular], lang)
+            ocr_time = (time.perf_counter() - t1) / len(regular)
+            recognized += [(n, text, ocr_time) for n, text in zip(regular, batch_texts)]
+        for n in oversized:
+            t1 = time.perf_counter()
+            text = _recognize_banded(jobs[n][1], lang, band_threads)
+            recognized.append((n, text, time.perf_counter() - t1))
+
+        for n, text, ocr_time in recognized:
+            texts[n] = text.strip()
+            page_index = jobs[n][0]
+            ocr_seconds[page_index] = ocr_seconds.get(page_index, 0.0) + ocr_time
+            if cache is not None:
+                cache.put(keys[n], texts[n], ocr_time)
+
+    if cache is not None:
+        cache.record(len(jobs) - len(misses), len(misses), seconds_saved)
+
+    results = []
+    for page_index in page_indices:
+        parts = [native_texts[page_index]] if native_texts[page_index] else []
+        pixels = 0
+        for (job_page, img), text in zip(jobs, texts):
+            if job_page == page_index:
+                pixels += img.size
+                if text:
+                    parts.append(text)
+        results.append((page_index, OCRPageResult(
+            text='\n'.join(parts).strip(),
+            seconds=render_time + ocr_seconds.get(page_index, 0.0),
+            dpi=page_dpi[page_index],
+            pixels=pixels,
+            cache_hit=page_index not in ocr_seconds
+        )))
+    return results
+
+
+class OCREngine:
+    """OCR engine dùng pool process sống lâu, mỗi worker giữ PDF đang mở"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        dpi: int = 300,
+        lang: str = 'vie+eng',
+        batch_size: int = 4,
+        cache: Optional[OCRTextCache] = None,
+        mode: str = 'page',
+        band_threads: int = 0,
+        band_min_pixels: int = BAND_MIN_PIXELS
+    ):
+        """
+        Args:
+            workers: Số process OCR (<= 1 thì OCR ngay trong process hiện tại)
+            dpi: Độ phân giải render trang (mode 'regions': DPI tối đa)
+            lang: Ngôn ngữ Tesseract
+            batch_size: Số trang liên tiếp mỗi worker render/OCR một lần
+            cache: Cache text OCR theo hash ảnh trang (None = không cache)
+            mode: 'page' (OCR cả trang ở DPI cố định) hoặc 'regions' (chỉ OCR
+                vùng ảnh trên trang lẫn text, DPI chọn theo cỡ vùng và cỡ chữ)
+            band_threads: Số thread OCR song song các dải của một ảnh trang lớn
+                (0 = chia đều số CPU cho các worker, 1 = tắt OCR theo dải)
+            band_min_pixels: Ảnh từ số pixel này trở lên mới OCR theo dải
+        """
+        if mode not in OCR_MODES:
+            raise ValueError(f"OCR mode không hợp lệ: {mode} (chọn {', '.join(OCR_MODES)})")
+        
+        self.workers = workers
+        self.dpi = dpi
+        self.lang = lang
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self.mode = mode
+        if band_threads <= 0:
+            band_threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+        self.band_threads = band_threads
+        self.band_min_pixels = band_min_pixels
+        self.stats = {'hits': 0, 'misses': 0, 'pixels': 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def ocr_pages(
+        self,
+        source: Union[str, fitz.Document],
+        page_indices: List[int]
+    ) -> Dict[int, OCRPageResult]:
+        """
+        OCR tất cả các trang scan của một tài liệu cùng lúc
+
+        Args:
+            source: Đường dẫn file PDF, hoặc tài liệu đã mở (PDF từ buffer
+                trong RAM - khi đó OCR chạy ngay trong process hiện tại)
+            page_indices: Chỉ số trang (0-indexed)
+
+        Returns:
+            Dict page_index -> OCRPageResult
+        """
+        if not page_indices:
+            return {}
+
+        batches = self._make_batches(sorted(page_indices))
+        logger.info(f"   🔎 OCR {len(page_indices)} trang ({len(batches)} batch)")
+
+        results: Dict[int, OCRPageResult] = {}
+        args = (self.dpi, self.lang, self.cache, self.mode, self.band_threads, self.band_min_pixels)
+        inline = not isinstance(source, str)
+        if inline or self.workers <= 1 or len(batches) == 1:
+            try:
+                for batch in batches:
+                    self._collect(
+                        results, batch,
+                        lambda b=batch: _ocr_batch_worker(source, b, *args)
+                    )
+            finally:
+                # Chỉ worker mới giữ PDF mở qua nhiều batch; OCR ngay trong
+                # process hiện tại thì đóng lại, không giữ file qua các lần parse
+                _close_worker_document()
+        else:
+            executor = self._get_executor()
+            futures = [
+                (batch, executor.submit(_ocr_batch_worker, source, batch, *args))
+                for batch in batches
+            ]
+            for batch, future in futures:
+                self._collect(results, batch, future.result)
+
+        if self.cache is not None:
+            logger.info(f"   💾 OCR cache: {self.stats['hits']} hit / {self.stats['misses']} miss")
+        return results
+
+    def _make_batches(self, page_indices: List[int]) -> List[List[int]]:
+        """Chia danh sách trang thành các batch, đủ nhỏ để chia đều cho worker"""
+        size = self.batch_size
+        if self.workers > 1:
+            size = max(1, min(size, -(-len(page_indices) // self.workers)))
+        return [page_indices[i:i + size] for i in range(0, len(page_indices), size)]
+
+    def _collect(self, results: Dict[int, OCRPageResult], batch: List[int], run) -> None:
+        """Gom kết quả một batch; batch lỗi thì các trang trả về text rỗng"""
+        try:
+            for page_index, result in run():
+                results[page_index] = result
+                self.stats['hits' if result.cache_hit else 'misses'] += 1
+                self.stats['pixels'] += result.pixels
+        except Exception as e:
+            logger.error(f"❌ OCR failed for pages {[i + 1 for i in batch]}: {e}")
+            for page_index in batch:
+                results[page_index] = OCRPageResult(text="", seconds=0.0)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Tạo pool một lần, giữ worker sống qua nhiều tài liệu"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self) -> None:
+        """Dừng các worker OCR"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
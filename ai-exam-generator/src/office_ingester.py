@@ -0,0 +1,403 @@
+"""
+Module đọc trực tiếp DOCX/PPTX thành Document, không qua PDF
+"""
+import hashlib
+import json
+import posixpath
+import re
+import uuid
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+from lxml import etree
+
+from .models import Document, DocumentMetadata, DocumentPage, HeadingMark
+from .pdf_parser import PDFParser, build_section_outline
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+P = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+DC = '{http://purl.org/dc/elements/1.1/}'
+
+OfficeSource = Union[str, Path, BinaryIO]
+
+# Tên style tiêu đề (w:name trong styles.xml luôn là tên tiếng Anh gốc)
+_HEADING_STYLE = re.compile(r'^heading\s*(\d)$', re.IGNORECASE)
+
+# Đánh dấu ngắt trang nội bộ khi duyệt body DOCX
+_PAGE_BREAK = object()
+
+
+class OfficeIngester:
+    """
+    Đọc DOCX/PPTX bằng cách stream XML trong file zip (lxml iterparse)
+
+    - DOCX: ngắt trang theo ngắt trang thủ công, pageBreakBefore, section
+      break và lastRenderedPageBreak (vị trí ngắt trang Word lưu lần cuối).
+      Tiêu đề lấy từ style Heading N/Title hoặc outlineLvl, bảng lấy từ w:tbl.
+    - PPTX: mỗi slide một trang, tiêu đề slide là mục lục cấp 1, bảng lấy
+      từ a:tbl.
+
+    Kết quả cùng model Document/DocumentPage với PDFParser; tiêu đề được
+    giữ thành dòng riêng trong text (page.headings) và gom vào Document.outline.
+    """
+
+    SUPPORTED = ('.docx', '.pptx')
+
+    @classmethod
+    def supports(cls, path: Union[str, Path]) -> bool:
+        """File có đọc được bằng ingester này không (theo đuôi file)"""
+        return Path(path).suffix.lower() in cls.SUPPORTED
+
+    def parse(self, source: OfficeSource, file_name: Optional[str] = None) -> Document:
+        """
+        Đọc DOCX/PPTX thành Document
+
+        Args:
+            source: Đường dẫn file, hoặc file-like nhị phân (vd. io.BytesIO của upload)
+            file_name: Tên file (bắt buộc khi source là file-like)
+
+        Returns:
+            Document object
+        """
+        file_name = self._file_name(source, file_name)
+        logger.info(f"📖 Parsing {Path(file_name).suffix.upper()[1:]}: {file_name}")
+
+        pages = list(self._iter_pages(source, file_name))
+        document = self._make_document(source, file_name, pages)
+
+        logger.info(f"✅ Parsed {len(pages)} pages, {len(document.outline)} headings")
+        return document
+
+    def iter_pages(self, source: OfficeSource, file_name: Optional[str] = None) -> Iterator[DocumentPage]:
+        """Yield từng trang/slide ngay khi đọc xong (như PDFParser.iter_pages)"""
+        file_name = self._file_name(source, file_name)
+        yield from self._iter_pages(source, file_name)
+
+    def build_document(
+        self,
+        source: OfficeSource,
+        pages: List[DocumentPage],
+        file_name: Optional[str] = None
+    ) -> Document:
+        """Ghép các trang đã stream từ iter_pages() thành Document"""
+        file_name = self._file_name(source, file_name)
+        return self._make_document(source, file_name, pages)
+
+    # ------------------------------------------------------------------ chung
+
+    @staticmethod
+    def _file_name(source: OfficeSource, file_name: Optional[str]) -> str:
+        if file_name:
+            return Path(file_name).name
+        if isinstance(source, (str, Path)):
+            return Path(source).name
+        raise ValueError("Cần file_name khi đọc từ file-like")
+
+    def _iter_pages(self, source: OfficeSource, file_name: str) -> Iterator[DocumentPage]:
+        suffix = Path(file_name).suffix.lower()
+        if suffix not in self.SUPPORTED:
+            raise ValueError(f"Định dạng không hỗ trợ: {suffix} (chọn {', '.join(self.SUPPORTED)})")
+        if isinstance(source, (str, Path)) and not Path(source).exists():
+            raise FileNotFoundError(f"File không tồn tại: {source}")
+
+        with zipfile.ZipFile(source) as zf:
+            if suffix == '.docx':
+                yield from self._iter_docx_pages(zf)
+            else:
+                yield from self._iter_pptx_pages(zf)
+
+    def _make_document(
+        self,
+        source: OfficeSource,
+        file_name: str,
+        pages: List[DocumentPage]
+    ) -> Document:
+        if not isinstance(source, (str, Path)):
+            source.seek(0)
+        with zipfile.ZipFile(source) as zf:
+            metadata = self._read_metadata(zf, file_name)
+
+        return Document(
+            doc_id=str(uuid.uuid4()),
+            file_name=file_name,
+            metadata=metadata,
+            pages=pages,
+            outline=build_section_outline(pages)
+        )
+
+    @staticmethod
+    def _read_metadata(zf: zipfile.ZipFile, file_name: str) -> DocumentMetadata:
+        """Metadata từ docProps/core.xml, đoán môn/khối từ title hoặc tên file"""
+        title = author = None
+        try:
+            root = etree.fromstring(zf.read('docProps/core.xml'))
+            title = root.findtext(f'{DC}title')
+            author = root.findtext(f'{DC}creator')
+        except (KeyError, etree.XMLSyntaxError) as e:
+            logger.warning(f"⚠️ Không đọc được metadata: {e}")
+
+        subject, grade = PDFParser._infer_subject_grade(title or Path(file_name).stem)
+        return DocumentMetadata(subject=subject, grade=grade, author=author or None)
+
+    @staticmethod
+    def _make_page(
+        number: int,
+        blocks: List[str],
+        tables: List[List[List[str]]],
+        marks: List[Tuple[int, str, int]]
+    ) -> DocumentPage:
+        """Tạo trang từ các khối text; marks = (level, title, chỉ số khối của tiêu đề)"""
+        text = '\n'.join(blocks)
+        offsets = []
+        offset = 0
+        for block in blocks:
+            offsets.append(offset)
+            offset += len(block) + 1
+        headings = [
+            HeadingMark(
+                level=level,
+                title=' '.join(title.split()),
+                char_start=offsets[index],
+                char_end=offsets[index] + len(blocks[index])
+            )
+            for level, title, index in marks
+        ]
+
+        table_dicts = [{"data": rows} for rows in tables]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(text.encode('utf-8'))
+        digest.update(json.dumps(tables, ensure_ascii=False).encode('utf-8'))
+
+        return DocumentPage(
+            page=number,
+            text=text,
+            tables=table_dicts,
+            has_tables=bool(tables),
+            content_hash=digest.hexdigest(),
+            headings=headings
+        )
+
+    @staticmethod
+    def _iterparse(zf: zipfile.ZipFile, name: str, tags):
+        """iterparse phần tử `tags`, dọn các phần tử đã xử lý để giữ RAM thấp"""
+        with zf.open(name) as f:
+            for _, elem in etree.iterparse(f, events=('end',), tag=tags, huge_tree=True):
+                yield elem
+
+    @staticmethod
+    def _release(elem) -> None:
+        """Xóa phần tử đã xử lý và các anh em phía trước khỏi cây"""
+        elem.clear()
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+    # -------------------------------------------------------------------- DOCX
+
+    def _iter_docx_pages(self, zf: zipfile.ZipFile) -> Iterator[DocumentPage]:
+        style_levels = self._docx_style_levels(zf)
+
+        number = 1
+        blocks: List[str] = []
+        tables: List[List[List[str]]] = []
+        marks: List[Tuple[int, str, int]] = []
+
+        for elem in self._iterparse(zf, 'word/document.xml', (f'{W}p', f'{W}tbl')):
+            # Đoạn trong bảng thuộc về bảng, đoạn trong text box thuộc về đoạn chứa
+            # nó; còn lại (kể cả trong w:sdtContent, w:customXml) là nội dung body
+            if next(elem.iterancestors(f'{W}tbl', f'{W}p'), None) is not None:
+                continue
+
+            if elem.tag == f'{W}tbl':
+                rows = self._docx_table(elem)
+                if rows:
+                    tables.append(rows)
+                    blocks.extend(' | '.join(row) for row in rows)
+                self._release(elem)
+                continue
+
+            for item in self._docx_paragraph(elem, style_levels):
+                if item is _PAGE_BREAK:
+                    # Bỏ qua ngắt trang liền nhau (vd. ngắt thủ công + lastRenderedPageBreak)
+                    if blocks or tables:
+                        yield self._make_page(number, blocks, tables, marks)
+                        number += 1
+                        blocks, tables, marks = [], [], []
+                    continue
+
+                level, text = item
+                if level:
+                    marks.append((level, text, len(blocks)))
+                blocks.append(text)
+            self._release(elem)
+
+        if blocks or tables or number == 1:
+            yield self._make_page(number, blocks, tables, marks)
+
+    @staticmethod
+    def _docx_style_levels(zf: zipfile.ZipFile) -> Dict[str, int]:
+        """styleId -> cấp tiêu đề (Title = 1, Heading N = N, hoặc outlineLvl + 1)"""
+        try:
+            root = etree.fromstring(zf.read('word/styles.xml'))
+        except KeyError:
+            return {}
+
+        levels = {}
+        for style in root.iter(f'{W}style'):
+            style_id = style.get(f'{W}styleId')
+            name = style.find(f'{W}name')
+            name = name.get(f'{W}val', '') if name is not None else ''
+            outline = style.find(f'{W}pPr/{W}outlineLvl')
+
+            match = _HEADING_STYLE.match(name)
+            if match:
+                levels[style_id] = int(match.group(1))
+            elif name.lower() == 'title':
+                levels[style_id] = 1
+            elif outline is not None and outline.get(f'{W}val', '').isdigit():
+                level = int(outline.get(f'{W}val')) + 1
+                if level <= 9:
+                    levels[style_id] = level
+        return levels
+
+    @staticmethod
+    def _docx_paragraph(p, style_levels: Dict[str, int]):
+        """
+        Yield các dòng của một đoạn: (cấp tiêu đề hoặc 0, text), xen kẽ
+        _PAGE_BREAK tại các vị trí ngắt trang
+        """
+        ppr = p.find(f'{W}pPr')
+        level = 0
+        if ppr is not None:
+            if ppr.find(f'{W}pageBreakBefore') is not None:
+                yield _PAGE_BREAK
+            style = ppr.find(f'{W}pStyle')
+            if style is not None:
+                level = style_levels.get(style.get(f'{W}val'), 0)
+            outline = ppr.find(f'{W}outlineLvl')
+            if outline is not None and outline.get(f'{W}val', '').isdigit():
+                # outlineLvl 9 = body text
+                value = int(outline.get(f'{W}val'))
+                level = value + 1 if value < 9 else 0
+
+        parts: List[str] = []
+        for node in p.iter(f'{W}t', f'{W}tab', f'{W}br', f'{W}cr', f'{W}lastRenderedPageBreak'):
+            tag = node.tag
+            if tag == f'{W}t':
+                parts.append(node.text or '')
+            elif tag == f'{W}tab':
+                parts.append('\t')
+            elif tag == f'{W}br' and node.get(f'{W}type') == 'page' or tag == f'{W}lastRenderedPageBreak':
+                text = ''.join(parts).strip()
+                if text:
+                    yield level, text
+                parts = []
+                yield _PAGE_BREAK
+            elif tag in (f'{W}br', f'{W}cr'):
+                parts.append('\n')
+
+        text = ''.join(parts).strip()
+        if text:
+            yield level, text
+
+        # Section break nằm ở đoạn cuối của section: trang mới bắt đầu sau đoạn này
+        if ppr is not None and ppr.find(f'{W}sectPr') is not None:
+            yield _PAGE_BREAK
+
+    @staticmethod
+    def _docx_table(tbl) -> List[List[str]]:
+        """Các hàng của bảng; ô gộp dọc (vMerge) để trống như pdfplumber"""
+        rows = []
+        for tr in tbl.iterchildren(f'{W}tr'):
+            cells = []
+            for tc in tr.iterchildren(f'{W}tc'):
+                paragraphs = [
+                    ''.join(t.text or '' for t in para.iter(f'{W}t'))
+                    for para in tc.iter(f'{W}p')
+                ]
+                cells.append('\n'.join(p for p in paragraphs if p).strip())
+            if any(cells):
+                rows.append(cells)
+        return rows
+
+    # -------------------------------------------------------------------- PPTX
+
+    def _iter_pptx_pages(self, zf: zipfile.ZipFile) -> Iterator[DocumentPage]:
+        for number, slide_path in enumerate(self._pptx_slide_paths(zf), start=1):
+            blocks: List[str] = []
+            tables: List[List[List[str]]] = []
+            marks: List[Tuple[int, str, int]] = []
+
+            for elem in self._iterparse(zf, slide_path, (f'{P}sp', f'{A}tbl')):
+                if elem.tag == f'{A}tbl':
+                    rows = self._pptx_table(elem)
+                    if rows:
+                        tables.append(rows)
+                        blocks.extend(' | '.join(row) for row in rows)
+                    self._release(elem)
+                    continue
+
+                lines = self._pptx_shape_lines(elem)
+                if lines and self._pptx_is_title(elem):
+                    title = ' '.join(lines)
+                    # Tiêu đề slide luôn là khối đầu tiên của trang
+                    marks = [(1, title, 0)]
+                    blocks.insert(0, title)
+                else:
+                    blocks.extend(lines)
+                self._release(elem)
+
+            yield self._make_page(number, blocks, tables, marks)
+
+    @staticmethod
+    def _pptx_slide_paths(zf: zipfile.ZipFile) -> List[str]:
+        """Đường dẫn các slide theo thứ tự trình chiếu (presentation.xml + rels)"""
+        rels_root = etree.fromstring(zf.read('ppt/_rels/presentation.xml.rels'))
+        targets = {
+            rel.get('Id'): posixpath.normpath(posixpath.join('ppt', rel.get('Target')))
+            for rel in rels_root.iter(f'{REL}Relationship')
+        }
+        root = etree.fromstring(zf.read('ppt/presentation.xml'))
+        return [
+            targets[sld.get(f'{R}id')]
+            for sld in root.iter(f'{P}sldId')
+            if sld.get(f'{R}id') in targets
+        ]
+
+    @staticmethod
+    def _pptx_is_title(sp) -> bool:
+        ph = sp.find(f'{P}nvSpPr/{P}nvPr/{P}ph')
+        return ph is not None and ph.get('type') in ('title', 'ctrTitle')
+
+    @staticmethod
+    def _pptx_shape_lines(sp) -> List[str]:
+        lines = []
+        for para in sp.iter(f'{A}p'):
+            text = ''.join(t.text or '' for t in para.iter(f'{A}t')).strip()
+            if text:
+                lines.append(text)
+        return lines
+
+    @staticmethod
+    def _pptx_table(tbl) -> List[List[str]]:
+        rows = []
+        for tr in tbl.iterchildren(f'{A}tr'):
+            cells = [
+                '\n'.join(
+                    text for text in (
+                        ''.join(t.text or '' for t in para.iter(f'{A}t')).strip()
+                        for para in tc.iter(f'{A}p')
+                    ) if text
+                )
+                for tc in tr.iterchildren(f'{A}tc')
+            ]
+            if any(cells):
+                rows.append(cells)
+        return rows
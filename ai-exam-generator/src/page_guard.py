@@ -0,0 +1,243 @@
+"""
+Chạy trích xuất/OCR trang trong process con có thể kill, giới hạn thời gian và bộ nhớ
+"""
+import multiprocessing
+import os
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import resource  # Chỉ có trên Unix
+except ImportError:
+    resource = None
+
+
+# Kết quả một việc: ('ok', kết quả) hoặc (lý do, None) với lý do là
+# 'timeout', 'memory', 'crashed' hoặc 'error'. Kết quả theo loại việc:
+# extract -> [(DocumentPage, PageTiming)], text -> str, ocr -> [(page_index, OCRPageResult)]
+GuardResult = Tuple[str, Any]
+
+
+def _address_space_bytes() -> int:
+    """Dung lượng không gian địa chỉ hiện tại của process (VmSize)"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _limit_memory(memory_mb: Optional[int]) -> None:
+    """Đặt RLIMIT_AS = mức hiện tại + memory_mb cho process con"""
+    if not memory_mb:
+        return
+    if resource is None or not os.path.exists('/proc/self/statm'):
+        logger.warning("⚠️ Hệ điều hành không hỗ trợ RLIMIT_AS, bỏ qua giới hạn bộ nhớ trang")
+        return
+    limit = _address_space_bytes() + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _guarded_worker(conn, options: dict, pdf_path: str, memory_mb: Optional[int]) -> None:
+    """Vòng lặp của process con: nhận việc (loại, tham số), chạy, gửi kết quả"""
+    import fitz
+    from .ocr_engine import _ocr_batch_worker
+    from .pdf_parser import PDFParser
+
+    parser = PDFParser(**options)
+    engine = parser.ocr_engine
+    _limit_memory(memory_mb)
+    # Báo sẵn sàng: thời gian khởi động không tính vào ngân sách của việc đầu tiên
+    conn.send(('ready', None))
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        kind, arg = task
+        try:
+            if kind == 'extract':
+                start, stop = arg
+                result = parser._extract_page_range(pdf_path, start, stop)
+            elif kind == 'text':
+                # Text thô PyMuPDF cho trang vượt ngân sách khi trích xuất đầy đủ
+                with fitz.open(pdf_path) as pdf_doc:
+                    result = pdf_doc[arg].get_text()
+            else:
+                result = _ocr_batch_worker(
+                    pdf_path, arg, engine.dpi, engine.lang, engine.cache,
+                    engine.mode, engine.band_threads, engine.band_min_pixels
+                )
+            conn.send(('ok', result))
+        except MemoryError:
+            conn.send(('memory', None))
+        except Exception as e:
+            logger.warning(f"⚠️ {kind} trang {arg} lỗi trong process con: {e}")
+            conn.send(('error', None))
+
+    parser.close()
+
+
+class PageGuard:
+    """
+    Process con trích xuất/OCR trang, bị kill nếu vượt ngân sách
+
+    Mỗi việc có tối đa `timeout` giây cho mỗi trang trong việc; process con
+    bị giới hạn không gian địa chỉ `memory_mb` MB so với lúc khởi động. Khi
+    việc vượt thời gian hoặc làm process con chết, process con được khởi
+    động lại cho các việc sau.
+    """
+
+    def __init__(
+        self,
+        options: dict,
+        pdf_path: str,
+        timeout: Optional[float] = None,
+        memory_mb: Optional[int] = None
+    ):
+        """
+        Args:
+            options: Tham số dựng PDFParser trong process con
+            pdf_path: Đường dẫn file PDF
+            timeout: Thời gian tối đa mỗi trang, giây (None = không giới hạn)
+            memory_mb: Bộ nhớ tối đa process con được cấp thêm, MB (None = không giới hạn)
+        """
+        self.options = options
+        self.pdf_path = pdf_path
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.restarts = 0
+        self._process: Optional[multiprocessing.Process] = None
+        self._conn = None
+
+    def _start(self) -> None:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(
+            target=_guarded_worker,
+            args=(child_conn, self.options, self.pdf_path, self.memory_mb),
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        try:
+            self._conn.recv()
+        except (EOFError, OSError):
+            # Lỗi khi khởi động: việc đầu tiên sẽ nhận 'crashed'
+            pass
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._conn.close()
+            self._process = None
+            self._conn = None
+
+    def extract(self, start: int, stop: int) -> GuardResult:
+        """Trích xuất (chưa OCR) các trang [start, stop) (0-indexed)"""
+        return self._run(('extract', (start, stop)), stop - start)
+
+    def text(self, page_index: int) -> GuardResult:
+        """Text thô PyMuPDF của một trang"""
+        return self._run(('text', page_index), 1)
+
+    def ocr(self, page_indices: List[int]) -> GuardResult:
+        """OCR một batch trang (như một batch của OCREngine)"""
+        return self._run(('ocr', page_indices), len(page_indices))
+
+    def _run(self, task: Tuple[str, Any], num_pages: int) -> GuardResult:
+        if self._process is None or not self._process.is_alive():
+            self._start()
+
+        self._conn.send(task)
+        timeout = self.timeout * num_pages if self.timeout is not None else None
+        if not self._conn.poll(timeout):
+            self._restart()
+            return 'timeout', None
+
+        try:
+            status, result = self._conn.recv()
+        except (EOFError, OSError):
+            # Process con chết giữa chừng (OOM killer, segfault trong thư viện C)
+            self._restart()
+            return 'crashed', None
+
+        if status == 'memory':
+            # Heap của process con có thể đã phân mảnh/hỏng sau MemoryError
+            self._restart()
+        return status, result
+
+    def _restart(self) -> None:
+        self._kill()
+        self.restarts += 1
+
+    def close(self) -> None:
+        """Dừng process con"""
+        if self._process is not None and self._process.is_alive():
+            try:
+                self._conn.send(None)
+                self._process.join(timeout=5)
+            except (BrokenPipeError, OSError):
+                pass
+        self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class PageGuardPool:
+    """
+    Nhiều PageGuard chạy song song: mỗi việc lấy một guard đang rảnh
+
+    Process cha chỉ chờ pipe nên điều phối bằng thread là đủ.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        options: dict,
+        pdf_path: str,
+        timeout: Optional[float] = None,
+        memory_mb: Optional[int] = None
+    ):
+        """
+        Args:
+            size: Số process con
+            options, pdf_path, timeout, memory_mb: Như PageGuard
+        """
+        self.guards = [PageGuard(options, pdf_path, timeout, memory_mb) for _ in range(max(1, size))]
+        self._idle: queue.Queue = queue.Queue()
+        for guard in self.guards:
+            self._idle.put(guard)
+        self._threads = ThreadPoolExecutor(max_workers=len(self.guards), thread_name_prefix='page-guard')
+
+    def submit(self, method: str, *args) -> Future:
+        """Chạy PageGuard.<method>(*args) trên guard rảnh, trả về Future của GuardResult"""
+        return self._threads.submit(self._call, method, args)
+
+    def _call(self, method: str, args: tuple) -> GuardResult:
+        guard = self._idle.get()
+        try:
+            return getattr(guard, method)(*args)
+        finally:
+            self._idle.put(guard)
+
+    @property
+    def restarts(self) -> int:
+        return sum(guard.restarts for guard in self.guards)
+
+    def close(self) -> None:
+        """Chờ các việc đang chạy rồi dừng mọi process con"""
+        self._threads.shutdown(wait=True)
+        for guard in self.guards:
+            guard.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
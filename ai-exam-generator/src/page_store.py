@@ -0,0 +1,78 @@
+"""
+Lưu trang đã parse xuống đĩa để giới hạn bộ nhớ khi parse sách lớn
+"""
+import os
+import tempfile
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .models import DocumentPage
+
+
+class PageStore(Sequence):
+    """
+    Danh sách DocumentPage lưu trên đĩa (JSON lines), đọc lười từng trang
+
+    Trong RAM chỉ giữ offset của từng dòng. Dùng làm `Document.pages` ở chế
+    độ bounded-memory: truy cập `pages[i]` hay lặp qua trang sẽ đọc lại từ file.
+    """
+
+    def __init__(
+        self,
+        store_dir: Optional[str] = None,
+        table_loader: Optional[Callable[[int], List[Dict[str, Any]]]] = None
+    ):
+        """
+        Args:
+            store_dir: Thư mục chứa file tạm (None = thư mục tạm của hệ thống)
+            table_loader: Hàm trích bảng theo số trang (PDFParser.table_loader),
+                gắn lại cho trang đang hoãn bảng khi đọc ra - loader không được
+                ghi xuống file cùng trang
+        """
+        fd, self.path = tempfile.mkstemp(prefix='pages_', suffix='.jsonl', dir=store_dir)
+        self._file = os.fdopen(fd, 'w+b')
+        self._offsets: List[int] = []
+        self.table_loader = table_loader
+
+    def append(self, page: DocumentPage) -> None:
+        """Ghi thêm một trang vào cuối file"""
+        self._offsets.append(self._write(page))
+
+    def __setitem__(self, index: int, page: DocumentPage) -> None:
+        """Thay một trang (ghi bản mới vào cuối file, trỏ offset sang đó)"""
+        self._offsets[index] = self._write(page)
+
+    def _write(self, page: DocumentPage) -> int:
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(page.model_dump_json().encode('utf-8') + b'\n')
+        return offset
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        self._file.seek(self._offsets[index])
+        page = DocumentPage.model_validate_json(self._file.readline())
+        if not page.tables_loaded and self.table_loader is not None:
+            page._table_loader = self.table_loader
+        return page
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> Iterator[DocumentPage]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def close(self) -> None:
+        """Đóng và xóa file tạm"""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
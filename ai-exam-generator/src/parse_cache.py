@@ -0,0 +1,137 @@
+"""
+Cache kết quả parse PDF trên đĩa, đánh địa chỉ theo nội dung file
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, MutableSequence, Optional, Union
+
+from loguru import logger
+
+from .models import Document, DocumentPage
+
+
+class ParseCache:
+    """
+    Cache Document đã parse, khóa = SHA-256(bytes PDF + cấu hình parser)
+
+    Mỗi entry là JSON lines nén gzip: dòng đầu là Document không có pages,
+    mỗi dòng sau là một trang - ghi và đọc từng trang một, nên Document có
+    pages là PageStore (bounded-memory) không bị nạp hết vào RAM. Khi tổng
+    dung lượng vượt `max_bytes`, các entry ít được dùng gần đây nhất (theo
+    mtime, được cập nhật mỗi lần đọc) bị xóa trước.
+    """
+
+    SUFFIX = '.json.gz'
+
+    def __init__(self, cache_dir: str = './cache/documents', max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Thư mục lưu cache
+            max_bytes: Dung lượng tối đa của cache
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source: Union[str, memoryview], settings: Dict[str, Any]) -> str:
+        """
+        Tạo khóa cache từ nội dung file và cấu hình parser
+
+        Args:
+            source: Đường dẫn file PDF, hoặc nội dung PDF (memoryview)
+            settings: Phiên bản parser, cấu hình OCR... (phải JSON được)
+        """
+        digest = hashlib.sha256()
+        if isinstance(source, memoryview):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(block)
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str, pages: Optional[MutableSequence] = None) -> Optional[Document]:
+        """
+        Đọc Document từ cache (None nếu chưa có)
+
+        Args:
+            key: Khóa cache (make_key)
+            pages: Nơi chứa các trang đọc ra, vd. PageStore ở chế độ
+                bounded-memory (None = list trong RAM)
+        """
+        path = self._entry_path(key)
+        try:
+            with gzip.open(path, 'rb') as f:
+                document = Document.model_validate({**json.loads(f.readline()), 'pages': []})
+                if pages is None:
+                    pages = []
+                for line in f:
+                    pages.append(DocumentPage.model_validate_json(line))
+                document.pages = pages
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Cache hỏng, bỏ qua {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        # Đánh dấu vừa dùng cho LRU
+        os.utime(path, None)
+        self.hits += 1
+        return document
+
+    def put(self, key: str, document: Document) -> None:
+        """Ghi Document vào cache rồi dọn bớt nếu vượt dung lượng"""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Ghi ra file tạm rồi rename để process khác không đọc phải file dở
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+            f.write(document.model_dump_json(exclude={'pages'}).encode('utf-8') + b'\n')
+            for page in document.pages:
+                f.write(page.model_dump_json().encode('utf-8') + b'\n')
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """Xóa entry cũ nhất cho tới khi tổng dung lượng <= max_bytes"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob(f"*/*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"   🗑️ Evict cache: {path.name}")
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache"""
+        for path in self.cache_dir.glob(f"*/*{self.SUFFIX}"):
+            path.unlink(missing_ok=True)
@@ -3,82 +3,594 @@ Module parse PDF và trích xuất text/OCR
 """
 import pdfplumber
 import fitz  # PyMuPDF
-import pytesseract
-import cv2
-import numpy as np
-from PIL import Image
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from loguru import logger
 import uuid
+import hashlib
+import functools
 import re
 import json
+import gc
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 
-from .models import Document, DocumentPage, DocumentMetadata
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .models import (
+    Document, DocumentDiff, DocumentPage, DocumentMetadata, HeadingMark, OutlineEntry, PageTiming,
+    ParseProfile
+)
+from .chunking import HEADING_PATTERN
+from .image_store import ImageStore
+from .ocr_cache import OCRTextCache
+from .ocr_engine import OCREngine, OCRPageResult
+from .page_guard import PageGuardPool
+from .page_store import PageStore
+from .parse_cache import ParseCache
+from .pdf_source import PDFSource, normalize_source, open_fitz, open_plumber, source_name
+
+
+# Tăng khi thay đổi cách trích xuất (hoặc định dạng entry ParseCache) để cache cũ tự hết hiệu lực
+PARSER_VERSION = "6"
+
+# Tiêu đề chương/bài khi PDF không có mục lục (level theo thứ tự PHẦN > CHƯƠNG > BÀI)
+HEADING_LEVELS = {'PHẦN': 1, 'CHƯƠNG': 2, 'BÀI': 3, 'MỤC': 4}
+OUTLINE_HEADING_PATTERN = re.compile(r'^[ \t]*((PHẦN|CHƯƠNG|BÀI)[ \t]+[IVXLCDM\d]+\b[^\n]{0,100})', re.MULTILINE)
+
+# Phát hiện tiêu đề theo font (fast path PyMuPDF): dòng có cỡ chữ >= HEADING_SIZE_RATIO
+# lần cỡ chữ thân bài, hoặc dòng in đậm bắt đầu bằng PHẦN/CHƯƠNG/BÀI/MỤC + số
+HEADING_SIZE_RATIO = 1.15
+MAX_HEADING_CHARS = 150
+_HEADING_KEYWORD = re.compile(r'(PHẦN|CHƯƠNG|BÀI|MỤC)\s+[IVXLCDM\d]+\b', re.IGNORECASE)
 
 
 class PDFParser:
     """Parser để đọc và trích xuất nội dung PDF"""
     
-    def __init__(self, ocr_threshold: float = 0.3):
+    BACKENDS = ('pdfplumber', 'pymupdf')
+    
+    # Số trang mỗi cửa sổ trích xuất + OCR ở chế độ bounded-memory
+    BOUNDED_WINDOW = 16
+    
+    def __init__(
+        self,
+        ocr_threshold: float = 0.3,
+        workers: int = 1,
+        min_pages_per_task: int = 8,
+        ocr_workers: int = 2,
+        ocr_dpi: int = 300,
+        ocr_lang: str = 'vie+eng',
+        ocr_mode: str = 'page',
+        ocr_band_threads: int = 0,
+        backend: str = 'pdfplumber',
+        detect_scanned: bool = True,
+        defer_tables: bool = False,
+        bounded_memory: bool = False,
+        memory_target_mb: Optional[int] = None,
+        page_store_dir: Optional[str] = None,
+        cache: Optional[ParseCache] = None,
+        ocr_cache: Optional[OCRTextCache] = None,
+        image_store: Optional[ImageStore] = None,
+        page_timeout: Optional[float] = None,
+        page_memory_mb: Optional[int] = None,
+        progress: Optional[Callable[[PageTiming, int, int], None]] = None
+    ):
         """
         Args:
             ocr_threshold: Tỷ lệ text tối thiểu để coi là text-based PDF
+            backend: 'pdfplumber' (mọi trang qua pdfplumber) hoặc 'pymupdf'
+                (text bằng PyMuPDF, chỉ trang nghi có bảng mới trích bảng)
+            detect_scanned: Lấy mẫu vài trang để nhận diện PDF scan toàn bộ;
+                nếu đúng thì bỏ qua pdfplumber, đưa thẳng sang OCR
+            defer_tables: Chỉ đánh dấu trang có dấu hiệu bảng (has_tables) khi
+                parse; bảng được trích khi gọi page.load_tables() hoặc
+                load_tables(). PDF từ buffer vẫn trích bảng ngay.
+            bounded_memory: Giới hạn bộ nhớ cho sách lớn: OCR theo cửa sổ nhỏ,
+                trang đã parse ghi xuống PageStore trên đĩa, Document.pages đọc lười
+            memory_target_mb: Khi RSS vượt ngưỡng này thì dọn cache PyMuPDF và
+                cache cấp tài liệu của pdfplumber (None = không kiểm tra)
+            page_store_dir: Thư mục chứa PageStore (None = thư mục tạm)
+            workers: Số process song song khi trích xuất trang (1 = tuần tự)
+            min_pages_per_task: Số trang tối thiểu mỗi worker nhận một lần
+            ocr_workers: Số worker OCR dùng lâu dài (giữ PDF đang mở)
+            ocr_dpi: Độ phân giải render trang để OCR
+            ocr_lang: Ngôn ngữ Tesseract
+            ocr_mode: 'page' (cả trang, DPI cố định) hoặc 'regions' (chỉ vùng ảnh,
+                DPI thích ứng, tối đa ocr_dpi)
+            ocr_band_threads: Số thread OCR song song các dải ngang của một
+                trang scan cỡ lớn (A3...); 0 = tự chia theo số CPU, 1 = tắt
+            cache: Cache Document theo nội dung file (None = không cache)
+            ocr_cache: Cache text OCR theo hash ảnh trang (None = không cache)
+            image_store: Kho ảnh để trích hình nhúng trong trang, page.images
+                giữ hash ảnh trong kho (None = không trích ảnh)
+            page_timeout: Thời gian tối đa (giây) mỗi trang để trích xuất, và
+                để OCR. Khi đặt page_timeout hoặc page_memory_mb, trích xuất và
+                OCR chạy trong max(workers, ocr_workers) process con có thể
+                kill (vẫn song song, OCR vẫn theo batch); trang vượt ngân sách
+                chỉ lấy text PyMuPDF (page.degraded) thay vì treo cả request.
+                Chỉ áp dụng khi parse từ đường dẫn file.
+            page_memory_mb: Bộ nhớ tối đa (MB) mỗi process con được dùng thêm
+            progress: Hàm gọi sau mỗi trang xong với (PageTiming, số trang đã
+                xong, tổng số trang) - dùng cho thanh tiến trình / metrics.
+                Lỗi trong callback chỉ được log, không làm dừng parse.
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend không hợp lệ: {backend} (chọn {', '.join(self.BACKENDS)})")
+        
         self.ocr_threshold = ocr_threshold
+        self.backend = backend
+        self.detect_scanned = detect_scanned
+        self.defer_tables = defer_tables
+        self.bounded_memory = bounded_memory
+        self.memory_target_mb = memory_target_mb
+        self.page_store_dir = page_store_dir
+        self.workers = max(1, workers)
+        self.min_pages_per_task = max(1, min_pages_per_task)
+        self.page_timings: List[PageTiming] = []
+        self.progress = progress
+        # Tổng hợp của lần parse gần nhất (xem ParseProfile)
+        self.profile: Optional[ParseProfile] = None
+        self.ocr_engine = OCREngine(
+            workers=ocr_workers,
+            dpi=ocr_dpi,
+            lang=ocr_lang,
+            cache=ocr_cache,
+            mode=ocr_mode,
+            band_threads=ocr_band_threads
+        )
+        self.cache = cache
+        self.image_store = image_store
+        self.page_timeout = page_timeout
+        self.page_memory_mb = page_memory_mb
+    
+    def close(self) -> None:
+        """Dừng các worker OCR"""
+        self.ocr_engine.close()
+    
+    def __enter__(self):
+        return self
     
-    def parse(self, pdf_path: str) -> Document:
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _worker_options(self) -> dict:
+        """Tham số để dựng lại parser trong process con (chạy tuần tự)"""
+        return {
+            'ocr_threshold': self.ocr_threshold,
+            'backend': self.backend,
+            'defer_tables': self.defer_tables,
+            'memory_target_mb': self.memory_target_mb,
+            'workers': 1,
+        }
+    
+    def _cache_settings(self, selected: Optional[List[int]] = None) -> dict:
+        """Các thiết lập ảnh hưởng tới kết quả parse (một phần của khóa cache)"""
+        settings = {
+            'parser_version': PARSER_VERSION,
+            'backend': self.backend,
+            'ocr_threshold': self.ocr_threshold,
+            'detect_scanned': self.detect_scanned,
+            'defer_tables': self.defer_tables,
+            'ocr_dpi': self.ocr_engine.dpi,
+            'ocr_lang': self.ocr_engine.lang,
+            'ocr_mode': self.ocr_engine.mode,
+            'images': self.image_store is not None,
+        }
+        if selected is not None:
+            settings['pages'] = selected
+        return settings
+    
+    def _load_cached(
+        self,
+        source: Union[str, memoryview],
+        file_name: str,
+        selected: Optional[List[int]] = None
+    ) -> Tuple[Optional[str], Optional[Document]]:
+        """Tra cache, trả về (khóa, Document) - Document là None nếu miss"""
+        if self.cache is None:
+            return None, None
+        
+        key = self.cache.make_key(source, self._cache_settings(selected))
+        # Bounded-memory: trang trong cache đọc thẳng vào PageStore trên đĩa
+        pages = self._new_page_list(source)
+        document = self.cache.get(key, pages)
+        if document is None and isinstance(pages, PageStore):
+            pages.close()
+        if document is not None:
+            document.doc_id = str(uuid.uuid4())
+            document.file_name = file_name
+            for page in document.pages:
+                self._attach_table_loader(page, source)
+            self._report_cached(file_name, document.pages)
+            logger.info(f"⚡ Cache hit: {len(document.pages)} pages")
+        return key, document
+    
+    def parse(
+        self,
+        pdf: PDFSource,
+        file_name: Optional[str] = None,
+        chapters: Optional[List[str]] = None,
+        page_ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> Document:
         """
         Parse PDF thành Document
         
         Args:
-            pdf_path: Đường dẫn file PDF
+            pdf: Đường dẫn file PDF, hoặc nội dung PDF trong RAM (bytes,
+                memoryview, mmap) - ví dụ body của request upload, không cần
+                ghi ra file tạm. Buffer phải được giữ nguyên tới khi parse xong.
+            file_name: Tên file gắn cho Document (mặc định lấy từ đường dẫn)
+            chapters: Chỉ parse các chương/bài có tiêu đề này (vd. "Chương 2",
+                "BÀI 5"), tra theo mục lục PDF - xem select_pages()
+            page_ranges: Chỉ parse các khoảng trang (start, end), 1-indexed, gồm cả hai đầu
             
         Returns:
-            Document object
+            Document object (chỉ gồm các trang được chọn, giữ số trang gốc)
         """
-        logger.info(f"📖 Parsing PDF: {pdf_path}")
+        source = self._open_source(pdf)
+        file_name = source_name(source, file_name)
+        logger.info(f"📖 Parsing PDF: {file_name if isinstance(source, memoryview) else source}")
         
-        pdf_path_obj = Path(pdf_path)
-        if not pdf_path_obj.exists():
-            raise FileNotFoundError(f"File không tồn tại: {pdf_path}")
+        selected = self._select_source_pages(source, chapters, page_ranges)
+        cache_key, cached = self._load_cached(source, file_name, selected)
+        if cached is not None:
+            return cached
         
-        # Extract metadata
-        metadata = self._extract_metadata(pdf_path)
+        # Mở PyMuPDF một lần: dùng cho metadata, số trang và fast path
+        with open_fitz(source) as pdf_doc:
+            # Extract metadata
+            metadata = self._extract_metadata(pdf_doc, file_name)
+            
+            # Extract pages
+            pages = self._extract_pages(source, pdf_doc, selected, file_name)
         
-        # Extract pages
-        pages = self._extract_pages(pdf_path)
+        doc = self._make_document(file_name, metadata, pages)
         
-        doc = Document(
-            doc_id=str(uuid.uuid4()),
-            file_name=pdf_path_obj.name,
-            metadata=metadata,
-            pages=pages
-        )
+        # Trang bị cắt do vượt ngân sách không được cache, lần sau thử lại
+        if cache_key is not None and not self.profile.degraded_pages:
+            self.cache.put(cache_key, doc)
         
         logger.info(f"✅ Parsed {len(pages)} pages")
         return doc
     
-    def _extract_metadata(self, pdf_path: str) -> DocumentMetadata:
-        """Trích xuất metadata từ PDF"""
+    def iter_pages(
+        self,
+        pdf: PDFSource,
+        window: int = 8,
+        file_name: Optional[str] = None,
+        chapters: Optional[List[str]] = None,
+        page_ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> Iterator[DocumentPage]:
+        """
+        Parse PDF và yield từng trang theo thứ tự ngay khi trang đó xong
+        
+        Dùng để chunk/embed song song với parse thay vì đợi cả tài liệu.
+        Trang scan được OCR theo từng cửa sổ `window` trang.
+        
+        Args:
+            pdf: Đường dẫn file PDF hoặc buffer (xem parse())
+            window: Số trang mỗi lượt trích xuất + OCR
+            file_name: Tên file gắn cho Document khi lưu cache
+            chapters, page_ranges: Chỉ parse một phần tài liệu (xem parse())
+            
+        Yields:
+            DocumentPage
+        """
+        source = self._open_source(pdf)
+        file_name = source_name(source, file_name)
+        logger.info(f"📖 Streaming PDF: {file_name if isinstance(source, memoryview) else source}")
+        
+        selected = self._select_source_pages(source, chapters, page_ranges)
+        cache_key, cached = self._load_cached(source, file_name, selected)
+        if cached is not None:
+            yield from cached.pages
+            return
+        
+        pages = self._new_page_list(source)
+        with open_fitz(source) as pdf_doc:
+            for page in self._iter_page_results(source, pdf_doc, window, selected, file_name):
+                pages.append(page)
+                # Bản sao để người dùng sửa page.text không làm bẩn bản ghi cache
+                yield page.model_copy() if cache_key is not None else page
+        
+        # Chỉ lưu cache khi đã stream hết tài liệu và không có trang bị cắt
+        if cache_key is not None and not self.profile.degraded_pages:
+            self.cache.put(cache_key, self.build_document(source, pages, file_name))
+    
+    def build_document(
+        self,
+        pdf: PDFSource,
+        pages: List[DocumentPage],
+        file_name: Optional[str] = None
+    ) -> Document:
+        """Ghép các trang đã stream từ iter_pages() thành Document"""
+        source = normalize_source(pdf)
+        file_name = source_name(source, file_name)
+        with open_fitz(source) as pdf_doc:
+            metadata = self._extract_metadata(pdf_doc, file_name)
+        
+        return self._make_document(file_name, metadata, pages)
+    
+    def reparse(
+        self,
+        pdf: PDFSource,
+        previous: Document,
+        file_name: Optional[str] = None
+    ) -> Tuple[Document, DocumentDiff]:
+        """
+        Parse lại bản sửa của một tài liệu đã parse, chỉ trích xuất trang thay đổi
+        
+        Trang được so khớp theo content_hash (không theo vị trí), nên chèn hay
+        xóa trang chỉ làm các trang đó được trích xuất lại. Trang không đổi
+        được lấy lại từ `previous` (đánh lại số trang).
+        
+        `previous` phải là kết quả parse thô (chưa qua TextCleaner): trang
+        trích xuất lại là text thô, và việc xóa header/footer lặp lại tính
+        trên cả tài liệu nên không làm sạch riêng được các trang này. Hãy giữ
+        bản thô và làm sạch Document trả về.
+        
+        Args:
+            pdf: Đường dẫn file PDF hoặc buffer của bản mới
+            previous: Document thô của bản cũ (có content_hash)
+            file_name: Tên file (mặc định giữ tên của bản cũ)
+            
+        Returns:
+            (Document mới, DocumentDiff) - dùng diff.changed_pages để chỉ
+            chunk/embed lại các trang này
+        """
+        if previous.cleaned:
+            raise ValueError("reparse() cần Document thô của bản cũ, không phải bản đã làm sạch")
+        
+        source = self._open_source(pdf)
+        file_name = source_name(source, file_name or previous.file_name)
+        logger.info(f"🔁 Re-parsing PDF: {file_name if isinstance(source, memoryview) else source}")
+        
+        old_pages = {}
+        for page in previous.pages:
+            if page.content_hash:
+                old_pages.setdefault(page.content_hash, page)
+        
+        with open_fitz(source) as pdf_doc:
+            metadata = self._extract_metadata(pdf_doc, file_name)
+            hashes = [self.page_hash(pdf_doc, i) for i in range(pdf_doc.page_count)]
+            changed = [i for i, h in enumerate(hashes) if h not in old_pages]
+            
+            extracted = {}
+            if changed:
+                window = self.BOUNDED_WINDOW if self.bounded_memory else None
+                for page in self._iter_page_results(source, pdf_doc, window, changed, file_name):
+                    extracted[page.page] = page
+            else:
+                # Không trang nào phải trích xuất: bỏ profile của lần parse trước
+                self.page_timings = []
+                self.profile = ParseProfile.from_timings(file_name, [], 0.0)
+        
+        pages = self._new_page_list(source)
+        for i, page_hash in enumerate(hashes):
+            page = extracted.get(i + 1)
+            if page is None:
+                page = old_pages[page_hash].model_copy(update={'page': i + 1})
+                self._attach_table_loader(page, source)
+            pages.append(page)
+        
+        new_hashes = set(hashes)
+        diff = DocumentDiff(
+            changed_pages=[i + 1 for i in changed],
+            removed_pages=[p.page for p in previous.pages if p.content_hash not in new_hashes],
+            reused_pages=len(hashes) - len(changed)
+        )
+        logger.info(
+            f"✅ {len(diff.changed_pages)} trang thay đổi, {diff.reused_pages} trang dùng lại, "
+            f"{len(diff.removed_pages)} trang bị xóa"
+        )
+        
+        doc = self._make_document(file_name, metadata, pages)
+        if self.cache is not None and not (self.profile and self.profile.degraded_pages):
+            key = self.cache.make_key(source, self._cache_settings())
+            self.cache.put(key, doc)
+        return doc, diff
+    
+    @staticmethod
+    def page_hash(pdf_doc: fitz.Document, page_index: int) -> str:
+        """
+        Hash nội dung một trang: content stream đã giải nén, kích thước/xoay
+        trang và dữ liệu thô (chưa giải mã) của ảnh, XObject mà trang dùng
+        
+        Không render hay dựng layout nên rẻ; ảnh scan được thay cũng làm
+        đổi hash dù content stream giống hệt.
+        """
+        page = pdf_doc[page_index]
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{tuple(page.rect)}|{page.rotation}|".encode('utf-8'))
+        digest.update(page.read_contents())
+        
+        xrefs = sorted(
+            {img[0] for img in page.get_images(full=True)}
+            | {xobj[0] for xobj in page.get_xobjects()}
+        )
+        for xref in xrefs:
+            if xref > 0 and pdf_doc.xref_is_stream(xref):
+                digest.update(pdf_doc.xref_stream_raw(xref) or b'')
+        return digest.hexdigest()
+    
+    def read_outline(self, pdf: PDFSource) -> List[OutlineEntry]:
+        """
+        Đọc mục lục (chương/bài) của PDF để người dùng chọn phần cần ra đề
+        
+        Args:
+            pdf: Đường dẫn file PDF hoặc buffer
+            
+        Returns:
+            List OutlineEntry theo thứ tự trang
+        """
+        with open_fitz(self._open_source(pdf)) as pdf_doc:
+            return self._read_outline(pdf_doc)
+    
+    def _read_outline(self, pdf_doc: fitz.Document) -> List[OutlineEntry]:
+        """
+        Mục lục từ bookmark của PDF; nếu không có thì dò tiêu đề
+        PHẦN/CHƯƠNG/BÀI ở đầu dòng bằng lớp text của PyMuPDF (không OCR)
+        """
+        num_pages = pdf_doc.page_count
+        headings = [
+            (level, title.strip(), page)
+            for level, title, page in pdf_doc.get_toc(simple=True)
+            if 1 <= page <= num_pages
+        ]
+        if not headings:
+            headings = self._scan_headings(pdf_doc)
+        
+        return build_outline(headings, num_pages)
+    
+    @staticmethod
+    def _scan_headings(pdf_doc: fitz.Document, max_per_page: int = 2) -> List[Tuple[int, str, int]]:
+        """
+        Dò tiêu đề chương/bài trong text từng trang
+        
+        Trang có nhiều hơn `max_per_page` tiêu đề coi là trang mục lục, bỏ qua.
+        
+        Returns:
+            List of (level, title, page) - page 1-indexed
+        """
+        headings = []
+        for i in range(pdf_doc.page_count):
+            matches = OUTLINE_HEADING_PATTERN.findall(pdf_doc[i].get_text())
+            if len(matches) > max_per_page:
+                continue
+            for title, kind in matches:
+                headings.append((HEADING_LEVELS[kind], ' '.join(title.split()), i + 1))
+        return headings
+    
+    def select_pages(
+        self,
+        pdf_doc: fitz.Document,
+        chapters: Optional[List[str]] = None,
+        page_ranges: Optional[List[Tuple[int, int]]] = None
+    ) -> Optional[List[int]]:
+        """
+        Chọn các trang cần parse theo tiêu đề chương/bài và/hoặc khoảng trang
+        
+        Tiêu đề khớp khi trùng hoặc là tiền tố của tiêu đề trong mục lục
+        (không phân biệt hoa thường): "Chương 2" khớp "CHƯƠNG 2: HÀM SỐ"
+        nhưng không khớp "Chương 20".
+        
+        Args:
+            pdf_doc: PDF đã mở
+            chapters: Tiêu đề chương/bài cần lấy
+            page_ranges: Các khoảng trang (start, end), 1-indexed, gồm cả hai đầu
+            
+        Returns:
+            Chỉ số trang (0-indexed, tăng dần), hoặc None nếu không lọc gì
+        """
+        if not chapters and not page_ranges:
+            return None
+        
+        num_pages = pdf_doc.page_count
+        selected = set()
+        
+        for start, end in page_ranges or []:
+            if start < 1 or end < start:
+                raise ValueError(f"Khoảng trang không hợp lệ: {start}-{end}")
+            selected.update(range(start - 1, min(end, num_pages)))
+        
+        if chapters:
+            outline = self._read_outline(pdf_doc)
+            for chapter in chapters:
+                matched = [e for e in outline if _title_matches(e.title, chapter)]
+                if not matched:
+                    logger.warning(f"⚠️ Không tìm thấy trong mục lục: {chapter}")
+                for entry in matched:
+                    selected.update(range(entry.page_start - 1, entry.page_end))
+        
+        if not selected:
+            raise ValueError("Không có trang nào được chọn để parse")
+        
+        logger.info(f"   📑 Chọn {len(selected)}/{num_pages} trang")
+        return sorted(selected)
+    
+    def _select_source_pages(
+        self,
+        source: Union[str, memoryview],
+        chapters: Optional[List[str]],
+        page_ranges: Optional[List[Tuple[int, int]]]
+    ) -> Optional[List[int]]:
+        """select_pages() trên nguồn chưa mở (không mở PDF nếu không lọc)"""
+        if not chapters and not page_ranges:
+            return None
+        with open_fitz(source) as pdf_doc:
+            return self.select_pages(pdf_doc, chapters, page_ranges)
+    
+    def _new_page_list(self, source: Union[str, memoryview]):
+        """List thường, hoặc PageStore trên đĩa ở chế độ bounded-memory"""
+        if not self.bounded_memory:
+            return []
+        return PageStore(self.page_store_dir, self.table_loader(source))
+    
+    @staticmethod
+    def _make_document(file_name: str, metadata: DocumentMetadata, pages) -> Document:
+        """Tạo Document; PageStore được gắn nguyên (không nạp hết trang vào RAM)"""
+        outline = build_section_outline(pages)
+        if isinstance(pages, PageStore):
+            return Document.model_construct(
+                doc_id=str(uuid.uuid4()),
+                file_name=file_name,
+                metadata=metadata,
+                pages=pages,
+                outline=outline,
+                created_at=datetime.now()
+            )
+        
+        return Document(
+            doc_id=str(uuid.uuid4()),
+            file_name=file_name,
+            metadata=metadata,
+            pages=pages,
+            outline=outline
+        )
+    
+    def _open_source(self, pdf: PDFSource) -> Union[str, memoryview]:
+        """Chuẩn hóa nguồn PDF; với đường dẫn thì kiểm tra file tồn tại"""
+        source = normalize_source(pdf)
+        if isinstance(source, str):
+            self._check_path(source)
+        return source
+    
+    def _check_path(self, pdf_path: str) -> Path:
+        """Kiểm tra file tồn tại"""
+        pdf_path_obj = Path(pdf_path)
+        if not pdf_path_obj.exists():
+            raise FileNotFoundError(f"File không tồn tại: {pdf_path}")
+        return pdf_path_obj
+    
+    def _extract_metadata(self, pdf_doc: fitz.Document, file_name: str) -> DocumentMetadata:
+        """Trích xuất metadata từ PDF đã mở"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                info = pdf.metadata or {}
-                
-                # Cố gắng đoán subject/grade từ title/filename
-                title = info.get('Title', '') or Path(pdf_path).stem
-                subject, grade = self._infer_subject_grade(title)
-                
-                return DocumentMetadata(
-                    subject=subject,
-                    grade=grade,
-                    author=info.get('Author')
-                )
+            info = pdf_doc.metadata or {}
+            
+            # Cố gắng đoán subject/grade từ title/filename
+            title = info.get('title', '') or Path(file_name).stem
+            subject, grade = self._infer_subject_grade(title)
+            
+            return DocumentMetadata(
+                subject=subject,
+                grade=grade,
+                author=info.get('author') or None
+            )
         except Exception as e:
             logger.warning(f"⚠️ Không extract được metadata: {e}")
             return DocumentMetadata()
     
-    def _infer_subject_grade(self, text: str) -> Tuple[Optional[str], Optional[int]]:
+    @staticmethod
+    def _infer_subject_grade(text: str) -> Tuple[Optional[str], Optional[int]]:
         """Đoán môn học và khối từ text"""
         text_lower = text.lower()
         
@@ -115,85 +627,1151 @@ class PDFParser:
         
         return subject, grade
     
-    def _extract_pages(self, pdf_path: str) -> List[DocumentPage]:
-        """Trích xuất text từ tất cả các trang"""
-        pages = []
+    def _extract_pages(
+        self,
+        source: Union[str, memoryview],
+        pdf_doc: fitz.Document,
+        selected: Optional[List[int]] = None,
+        file_name: Optional[str] = None
+    ) -> List[DocumentPage]:
+        """Trích xuất text từ tất cả các trang (hoặc các trang được chọn)"""
+        if not self.bounded_memory:
+            # Một cửa sổ duy nhất: mọi trang scan được gửi sang OCR cùng lúc
+            return list(self._iter_page_results(source, pdf_doc, None, selected, file_name))
         
-        # Try text-based extraction first
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-                tables = page.extract_tables() or []
-                
-                # Check if page needs OCR
-                if len(text.strip()) < 50:  # Very little text
-                    logger.info(f"   Page {i}: Text quá ít, thử OCR...")
-                    text = self._ocr_page(pdf_path, i - 1)  # 0-indexed
-                
-                pages.append(DocumentPage(
-                    page=i,
-                    text=text,
-                    tables=[{"data": t} for t in tables]
-                ))
+        pages = self._new_page_list(source)
+        for page in self._iter_page_results(source, pdf_doc, self.BOUNDED_WINDOW, selected, file_name):
+            pages.append(page)
+        return pages
+    
+    def _over_memory_target(self) -> bool:
+        """
+        Kiểm tra RSS so với memory_target_mb; nếu vượt thì dọn cache PyMuPDF
+        và báo để caller bỏ cache pdfminer của tài liệu pdfplumber đang mở
+        """
+        if self.memory_target_mb is None:
+            return False
+        
+        rss = _current_rss_mb()
+        if rss <= self.memory_target_mb:
+            return False
+        
+        gc.collect()
+        fitz.TOOLS.store_shrink(100)
+        logger.debug(f"   🧹 RSS {rss:.0f}MB > {self.memory_target_mb}MB, dọn cache")
+        return True
+    
+    def _iter_page_results(
+        self,
+        source: Union[str, memoryview],
+        pdf_doc: fitz.Document,
+        window: Optional[int],
+        selected: Optional[List[int]] = None,
+        file_name: Optional[str] = None
+    ) -> Iterator[DocumentPage]:
+        """
+        Trích xuất, OCR theo cửa sổ và yield trang theo thứ tự
+        
+        Args:
+            window: Số trang mỗi cửa sổ (None = cả tài liệu)
+            selected: Chỉ số trang cần xử lý (None = mọi trang)
+            file_name: Tên file ghi vào ParseProfile
+        """
+        num_pages = pdf_doc.page_count if selected is None else len(selected)
+        window = window or max(1, num_pages)
+        self.page_timings = []
+        self.profile = None
+        
+        # Buffer: OCR ngay trên tài liệu đã mở thay vì mở lại theo đường dẫn
+        ocr_source = source if isinstance(source, str) else pdf_doc
+        
+        # Chỉ tính thời gian parser chạy, không tính thời gian caller xử lý trang đã yield
+        wall_time = 0.0
+        resumed = time.perf_counter()
+        
+        # xref -> hash ảnh, để ảnh lặp ở nhiều trang (logo) chỉ trích một lần
+        image_keys: Dict[int, Optional[str]] = {}
+        
+        guards = self._open_guards(source)
+        try:
+            pending = []
+            batches = self._iter_extracted_batches(source, pdf_doc, window, selected, guards)
+            for batch in batches:
+                pending.extend(batch)
+                if len(pending) < window:
+                    continue
                 
-                logger.debug(f"   Page {i}: {len(text)} chars")
+                self._ocr_scanned_pages(ocr_source, pending, guards)
+                for page, timing in pending:
+                    self._finish_page(page, timing, source, pdf_doc, num_pages, image_keys)
+                    wall_time += time.perf_counter() - resumed
+                    yield page
+                    resumed = time.perf_counter()
+                pending = []
+            
+            if pending:
+                self._ocr_scanned_pages(ocr_source, pending, guards)
+                for page, timing in pending:
+                    self._finish_page(page, timing, source, pdf_doc, num_pages, image_keys)
+                    wall_time += time.perf_counter() - resumed
+                    yield page
+                    resumed = time.perf_counter()
+        finally:
+            if guards is not None:
+                guards.close()
         
-        return pages
+        wall_time += time.perf_counter() - resumed
+        self.profile = ParseProfile.from_timings(
+            file_name or source_name(source), self.page_timings, wall_time
+        )
+        self._log_timings()
     
-    def _ocr_page(self, pdf_path: str, page_index: int) -> str:
-        """OCR một trang PDF (nếu scan)"""
+    def _finish_page(
+        self,
+        page: DocumentPage,
+        timing: PageTiming,
+        source: Union[str, memoryview],
+        pdf_doc: fitz.Document,
+        num_pages: int,
+        image_keys: Dict[int, Optional[str]]
+    ) -> None:
+        """Gắn hash/bảng hoãn/ảnh cho trang đã xong, ghi timing và báo progress"""
+        page.content_hash = self.page_hash(pdf_doc, page.page - 1)
+        self._attach_table_loader(page, source)
+        if self.image_store is not None:
+            page.images = self.image_store.extract_page_images(pdf_doc, page.page - 1, image_keys)
+        timing.chars = len(page.text)
+        self.page_timings.append(timing)
+        self._notify(timing, len(self.page_timings), num_pages)
+    
+    def _notify(self, timing: PageTiming, done: int, total: int) -> None:
+        """Gọi progress callback; lỗi của callback không được làm hỏng parse"""
+        if self.progress is None:
+            return
         try:
-            # Render page to image using PyMuPDF
-            doc = fitz.open(pdf_path)
-            page = doc[page_index]
+            self.progress(timing, done, total)
+        except Exception as e:
+            logger.warning(f"⚠️ Progress callback lỗi ở trang {timing.page}: {e}")
+    
+    def _report_cached(self, file_name: str, pages) -> None:
+        """Profile + progress cho tài liệu lấy từ cache (không trang nào phải trích xuất)"""
+        timings = [PageTiming(page=page.page, chars=len(page.text)) for page in pages]
+        self.page_timings = timings
+        for n, timing in enumerate(timings, start=1):
+            self._notify(timing, n, len(timings))
+        self.profile = ParseProfile.from_timings(file_name, timings, 0.0)
+        self.profile.cache_hit = True
+    
+    def _iter_extracted_batches(
+        self,
+        source: Union[str, memoryview],
+        pdf_doc: fitz.Document,
+        window: int,
+        selected: Optional[List[int]] = None,
+        guards: Optional[PageGuardPool] = None
+    ) -> Iterator[List[Tuple[DocumentPage, PageTiming]]]:
+        """Yield kết quả trích xuất (chưa OCR) theo từng khoảng trang, đúng thứ tự"""
+        runs = self._page_runs(pdf_doc.page_count, selected)
+        
+        if self.detect_scanned and self.classify_document(pdf_doc) == 'scanned':
+            logger.info("   🖨️ PDF scan: bỏ qua pdfplumber, OCR trực tiếp")
+            for start, stop in self._split_runs(runs, window):
+                yield self._scanned_placeholders(pdf_doc, start, stop)
+                self._release_window_caches()
+            return
+        
+        if guards is not None:
+            # Khoảng nhỏ: khoảng vượt ngân sách phải chờ timeout x số trang rồi chạy lại từng trang
+            yield from self._extract_pages_guarded(guards, self._split_runs(runs, self.min_pages_per_task))
+            return
+        
+        # Buffer trong RAM không chia sẻ được với process con mà không copy
+        if isinstance(source, str) and self.workers > 1:
+            ranges = self._split_page_ranges(runs)
+            if len(ranges) > 1:
+                yield from self._extract_pages_parallel(source, ranges)
+                return
+        
+        if self.backend == 'pymupdf':
+            for start, stop in self._split_runs(runs, window):
+                yield self._extract_page_range_fast(source, pdf_doc, start, stop)
+                self._release_window_caches()
+            return
+        
+        # Mở pdfplumber một lần cho mọi cửa sổ: mở lại phải dựng lại cả cây trang
+        with open_plumber(source) as pdf:
+            for start, stop in self._split_runs(runs, window):
+                yield self._extract_plumber_range(source, pdf, start, stop)
+                self._release_window_caches(pdf)
+    
+    def _release_window_caches(self, pdf: Optional[pdfplumber.PDF] = None) -> None:
+        """
+        Bounded-memory: cửa sổ trước đã OCR và yield xong, bỏ ảnh/font MuPDF
+        đã cache và object pdfminer của tài liệu pdfplumber đang mở
+        """
+        if not self.bounded_memory:
+            return
+        fitz.TOOLS.store_shrink(100)
+        if pdf is not None:
+            _release_plumber_caches(pdf)
+    
+    def _open_guards(self, source: Union[str, memoryview]) -> Optional[PageGuardPool]:
+        """
+        Các process con chạy trích xuất + OCR có ngân sách thời gian/bộ nhớ
+        (None nếu không đặt ngân sách hoặc PDF từ buffer)
+        """
+        if self.page_timeout is None and self.page_memory_mb is None:
+            return None
+        if not isinstance(source, str):
+            logger.debug("   PDF từ buffer: bỏ qua ngân sách trang (cần đường dẫn file)")
+            return None
+        
+        options = {
+            **self._worker_options(),
+            # OCR chạy ngay trong process con, giữ DPI/chế độ/thread dải của engine
+            'ocr_workers': 1,
+            'ocr_dpi': self.ocr_engine.dpi,
+            'ocr_lang': self.ocr_engine.lang,
+            'ocr_mode': self.ocr_engine.mode,
+            'ocr_band_threads': self.ocr_engine.band_threads,
+            'ocr_cache': self.ocr_engine.cache,
+        }
+        size = max(self.workers, self.ocr_engine.workers, 1)
+        return PageGuardPool(size, options, source, self.page_timeout, self.page_memory_mb)
+    
+    def _extract_pages_guarded(
+        self,
+        guards: PageGuardPool,
+        ranges: List[Tuple[int, int]]
+    ) -> Iterator[List[Tuple[DocumentPage, PageTiming]]]:
+        """
+        Trích xuất các khoảng trang song song trên các PageGuard, yield đúng thứ tự
+        
+        Khoảng vượt ngân sách được chạy lại từng trang; trang vẫn vượt (hoặc
+        làm process con chết) được thay bằng text PyMuPDF, cũng lấy trong
+        process con, và đánh dấu page.degraded = lý do.
+        """
+        futures = [(start, stop, time.perf_counter(), guards.submit('extract', start, stop))
+                   for start, stop in ranges]
+        for start, stop, t0, future in futures:
+            status, results = future.result()
+            if status == 'ok':
+                yield results
+                continue
+            
+            # Chạy lại từng trang để chỉ cắt trang thủ phạm
+            if stop - start == 1:
+                retries = [(start, t0, None)]
+            else:
+                retries = [(i, time.perf_counter(), guards.submit('extract', i, i + 1))
+                           for i in range(start, stop)]
+            batch = []
+            for i, t1, retry in retries:
+                if retry is not None:
+                    status, results = retry.result()
+                    if status == 'ok':
+                        batch.extend(results)
+                        continue
+                batch.append(self._degraded_page(guards, i, status, time.perf_counter() - t1))
+            yield batch
+    
+    @staticmethod
+    def _degraded_page(
+        guards: PageGuardPool,
+        page_index: int,
+        reason: str,
+        elapsed: float
+    ) -> Tuple[DocumentPage, PageTiming]:
+        """
+        Trang thay thế khi trích xuất đầy đủ bị cắt: text thô PyMuPDF lấy
+        trong process con có ngân sách (rỗng nếu cũng vượt ngân sách)
+        """
+        logger.warning(f"⚠️ Trang {page_index + 1} vượt ngân sách ({reason}), chỉ lấy text PyMuPDF")
+        status, text = guards.submit('text', page_index).result()
+        if status != 'ok':
+            logger.warning(f"⚠️ PyMuPDF không đọc được trang {page_index + 1} ({status})")
+            text = ""
+        return (
+            DocumentPage(page=page_index + 1, text=text, degraded=reason),
+            PageTiming(page=page_index + 1, total_time=elapsed, degraded=reason)
+        )
+    
+    @staticmethod
+    def classify_document(
+        pdf_doc: fitz.Document,
+        sample_pages: int = 5,
+        min_chars: int = 50,
+        min_image_coverage: float = 0.5
+    ) -> str:
+        """
+        Phân loại nhanh tài liệu dựa trên vài trang mẫu (PyMuPDF, không dựng layout)
+        
+        Returns:
+            'scanned' (mọi trang mẫu chỉ có ảnh), 'text' (không trang mẫu nào
+            là ảnh) hoặc 'mixed'
+        """
+        num_pages = pdf_doc.page_count
+        if num_pages == 0:
+            return 'text'
+        
+        count = min(sample_pages, num_pages)
+        indices = sorted({round(k * (num_pages - 1) / max(1, count - 1)) for k in range(count)})
+        
+        image_only = 0
+        for i in indices:
+            page = pdf_doc[i]
+            if len(page.get_text().strip()) >= min_chars:
+                continue
+            page_area = abs(page.rect) or 1
+            coverage = sum(
+                abs(fitz.Rect(info['bbox']) & page.rect) for info in page.get_image_info()
+            ) / page_area
+            if coverage >= min_image_coverage:
+                image_only += 1
+        
+        if image_only == len(indices):
+            return 'scanned'
+        return 'mixed' if image_only else 'text'
+    
+    def _scanned_placeholders(
+        self,
+        pdf_doc: fitz.Document,
+        start: int,
+        stop: int
+    ) -> List[Tuple[DocumentPage, PageTiming]]:
+        """
+        Trang của PDF scan: chỉ lấy lớp text rẻ của PyMuPDF (thường rỗng),
+        trang ít text sẽ được OCR sau đó
+        """
+        results = []
+        for i in range(start, stop):
+            t0 = time.perf_counter()
+            text = pdf_doc[i].get_text()
+            elapsed = time.perf_counter() - t0
+            results.append((
+                DocumentPage(page=i + 1, text=text),
+                PageTiming(page=i + 1, text_time=elapsed, total_time=elapsed)
+            ))
+        return results
+    
+    @staticmethod
+    def _page_runs(num_pages: int, selected: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+        """Gom các trang được chọn thành các khoảng liên tiếp [start, stop)"""
+        if selected is None:
+            return [(0, num_pages)] if num_pages else []
+        
+        runs = []
+        for i in selected:
+            if runs and runs[-1][1] == i:
+                runs[-1] = (runs[-1][0], i + 1)
+            else:
+                runs.append((i, i + 1))
+        return runs
+    
+    @staticmethod
+    def _split_runs(runs: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+        """Chia mỗi khoảng trang thành các đoạn tối đa `size` trang"""
+        return [
+            (start, min(start + size, stop))
+            for run_start, stop in runs
+            for start in range(run_start, stop, size)
+        ]
+    
+    def _split_page_ranges(self, runs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Chia các khoảng trang cần xử lý thành các khoảng [start, stop) cho worker"""
+        # Chia nhỏ hơn số worker để cân bằng tải (trang scan chậm hơn nhiều)
+        num_pages = sum(stop - start for start, stop in runs)
+        size = max(self.min_pages_per_task, math.ceil(num_pages / (self.workers * 4)))
+        return self._split_runs(runs, size)
+    
+    def _extract_pages_parallel(
+        self,
+        pdf_path: str,
+        ranges: List[Tuple[int, int]]
+    ) -> Iterator[List[Tuple[DocumentPage, PageTiming]]]:
+        """Trích xuất các khoảng trang bằng process pool, yield đúng thứ tự trang"""
+        workers = min(self.workers, len(ranges))
+        logger.info(f"   ⚡ Trích xuất song song: {len(ranges)} khoảng trang, {workers} workers")
+        
+        options = self._worker_options()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extract_range_worker, options, pdf_path, start, stop)
+                for start, stop in ranges
+            ]
+            for future in futures:
+                yield future.result()
+    
+    def _extract_page_range(
+        self,
+        source: Union[str, memoryview],
+        start: int,
+        stop: int
+    ) -> List[Tuple[DocumentPage, PageTiming]]:
+        """Trích xuất các trang [start, stop) - mỗi lần gọi tự mở PDF"""
+        if self.backend == 'pymupdf':
+            with open_fitz(source) as pdf_doc:
+                return self._extract_page_range_fast(source, pdf_doc, start, stop)
+        
+        with open_plumber(source) as pdf:
+            return self._extract_plumber_range(source, pdf, start, stop)
+    
+    def _extract_plumber_range(
+        self,
+        source: Union[str, memoryview],
+        pdf: pdfplumber.PDF,
+        start: int,
+        stop: int
+    ) -> List[Tuple[DocumentPage, PageTiming]]:
+        """Trích xuất các trang [start, stop) bằng tài liệu pdfplumber đã mở"""
+        results = []
+        defer = self._defers_tables(source)
+        
+        for i in range(start, stop):
+            page = pdf.pages[i]
+            t0 = time.perf_counter()
+            text = page.extract_text() or ""
+            t1 = time.perf_counter()
+            has_tables = self._plumber_looks_like_table(page)
+            tables = [] if defer else page.extract_tables() or []
+            t2 = time.perf_counter()
             
-            # Render at 300 DPI for better OCR
-            mat = fitz.Matrix(300/72, 300/72)
-            pix = page.get_pixmap(matrix=mat)
+            # Giải phóng layout đã cache của trang
+            page.close()
             
-            # Convert to PIL Image
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            results.append((
+                DocumentPage(
+                    page=i + 1,
+                    text=text,
+                    tables=[{"data": t} for t in tables],
+                    has_tables=has_tables or bool(tables),
+                    tables_loaded=not (defer and has_tables)
+                ),
+                PageTiming(
+                    page=i + 1,
+                    text_time=t1 - t0,
+                    table_time=t2 - t1,
+                    total_time=t2 - t0
+                )
+            ))
             
-            # Convert to OpenCV format for preprocessing
-            img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+            logger.debug(f"   Page {i + 1}: {len(text)} chars")
             
-            # Preprocess: grayscale + threshold
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            # Vượt ngưỡng RSS: bỏ object pdfminer đã cache mà không phải mở lại PDF
+            if self._over_memory_target():
+                _release_plumber_caches(pdf)
+        
+        return results
+    
+    def _extract_page_range_fast(
+        self,
+        source: Union[str, memoryview],
+        pdf_doc: fitz.Document,
+        start: int,
+        stop: int
+    ) -> List[Tuple[DocumentPage, PageTiming]]:
+        """
+        Fast path: text bằng PyMuPDF, bảng chỉ trích ở trang có dấu hiệu bảng
+        
+        Trang nghi có bảng dùng find_tables() của PyMuPDF; bản PyMuPDF cũ
+        không có find_tables thì gom các trang đó sang pdfplumber một lượt.
+        """
+        results = []
+        fallback_pages = []
+        defer = self._defers_tables(source)
+        
+        for i in range(start, stop):
+            page = pdf_doc[i]
+            t0 = time.perf_counter()
+            # Text và tiêu đề (theo font) lấy trong cùng một lượt get_text("dict")
+            text, headings = page_text_and_headings(page)
+            t1 = time.perf_counter()
             
-            # OCR
-            text = pytesseract.image_to_string(Image.fromarray(thresh), lang='vie+eng')
+            tables = []
+            has_tables = self._looks_like_table(page)
+            if has_tables and not defer:
+                if hasattr(page, 'find_tables'):
+                    tables = [t.extract() for t in page.find_tables().tables]
+                else:
+                    fallback_pages.append(i)
+            t2 = time.perf_counter()
             
-            doc.close()
-            return text.strip()
+            results.append((
+                DocumentPage(
+                    page=i + 1,
+                    text=text,
+                    tables=[{"data": t} for t in tables],
+                    has_tables=has_tables,
+                    tables_loaded=not (defer and has_tables),
+                    headings=headings
+                ),
+                PageTiming(
+                    page=i + 1,
+                    text_time=t1 - t0,
+                    table_time=t2 - t1,
+                    total_time=t2 - t0
+                )
+            ))
             
-        except Exception as e:
-            logger.error(f"❌ OCR failed for page {page_index + 1}: {e}")
-            return ""
+            logger.debug(f"   Page {i + 1}: {len(text)} chars")
+            self._over_memory_target()
+        
+        if fallback_pages:
+            with open_plumber(source) as pdf:
+                for i in fallback_pages:
+                    t0 = time.perf_counter()
+                    tables = pdf.pages[i].extract_tables() or []
+                    page, timing = results[i - start]
+                    page.tables = [{"data": t} for t in tables]
+                    timing.table_time += time.perf_counter() - t0
+                    timing.total_time += time.perf_counter() - t0
+        
+        return results
+    
+    def _defers_tables(self, source: Union[str, memoryview]) -> bool:
+        """Có hoãn trích bảng không (buffer thì không: loader sẽ giữ buffer sống)"""
+        return self.defer_tables and isinstance(source, str)
+    
+    def table_loader(self, pdf: PDFSource) -> Optional[Callable[[int], List[Dict[str, Any]]]]:
+        """
+        Hàm trích bảng hoãn theo số trang của file này (None nếu nguồn là buffer)
+        
+        Dùng cho PageStore tự lưu trang (vd. main.py ở chế độ bounded-memory)
+        để trang đọc lại từ đĩa vẫn gọi được page.load_tables().
+        """
+        source = normalize_source(pdf)
+        if not isinstance(source, str):
+            return None
+        return functools.partial(_load_page_tables, self._worker_options(), source)
+    
+    def _attach_table_loader(self, page: DocumentPage, source: Union[str, memoryview]) -> None:
+        """Gắn hàm trích bảng cho trang đang hoãn để page.load_tables() dùng"""
+        if not page.tables_loaded and isinstance(source, str):
+            page._table_loader = self.table_loader(source)
+    
+    def load_tables(self, pdf: PDFSource, pages: Iterable[DocumentPage]) -> None:
+        """
+        Trích bảng cho các trang đang hoãn (has_tables, chưa tables_loaded),
+        mở PDF một lần cho cả lượt
+        
+        Args:
+            pdf: Đường dẫn file PDF hoặc buffer đã parse ra các trang này
+            pages: Các trang cần bảng (vd. document.pages)
+        """
+        pending = [page for page in pages if not page.tables_loaded]
+        if not pending:
+            return
+        
+        tables = self._extract_tables(normalize_source(pdf), [page.page - 1 for page in pending])
+        for page in pending:
+            page.tables = tables[page.page - 1]
+            page.tables_loaded = True
+    
+    def _extract_tables(
+        self,
+        source: Union[str, memoryview],
+        page_indices: List[int]
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Trích đầy đủ bảng của các trang (0-indexed) theo backend đang dùng"""
+        t0 = time.perf_counter()
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        
+        remaining = list(page_indices)
+        if self.backend == 'pymupdf':
+            with open_fitz(source) as pdf_doc:
+                remaining = []
+                for i in page_indices:
+                    page = pdf_doc[i]
+                    if hasattr(page, 'find_tables'):
+                        results[i] = [{"data": t.extract()} for t in page.find_tables().tables]
+                    else:
+                        remaining.append(i)
+        
+        if remaining:
+            with open_plumber(source) as pdf:
+                for i in remaining:
+                    page = pdf.pages[i]
+                    results[i] = [{"data": t} for t in page.extract_tables() or []]
+                    page.close()
+        
+        logger.debug(f"   📊 Trích bảng {len(page_indices)} trang: {time.perf_counter() - t0:.2f}s")
+        return results
+    
+    @staticmethod
+    def _plumber_looks_like_table(page, min_lines: int = 4) -> bool:
+        """
+        _looks_like_table() cho trang pdfplumber: đếm cạnh ngang/dọc từ các
+        line/rect/curve đã parse cùng text, không chạy bộ dò bảng
+        """
+        horizontal = vertical = 0
+        for edge in page.edges:
+            if edge['orientation'] == 'h':
+                horizontal += 1
+            else:
+                vertical += 1
+        return horizontal >= min_lines and vertical >= 2
+    
+    @staticmethod
+    def _looks_like_table(page: fitz.Page, min_lines: int = 4) -> bool:
+        """
+        Đoán nhanh trang có bảng không dựa trên nét kẻ ngang/dọc và hình chữ nhật
+        
+        Không cần dựng layout như pdfplumber, chỉ đọc danh sách đường vẽ.
+        """
+        horizontal = vertical = rects = 0
+        for path in page.get_cdrawings():
+            for item in path.get('items', []):
+                kind = item[0]
+                if kind == 're':
+                    rects += 1
+                elif kind == 'l':
+                    p1, p2 = item[1], item[2]
+                    if abs(p1[1] - p2[1]) < 1:
+                        horizontal += 1
+                    elif abs(p1[0] - p2[0]) < 1:
+                        vertical += 1
+            if rects >= min_lines or (horizontal >= min_lines and vertical >= 2):
+                return True
+        return False
+    
+    def _ocr_scanned_pages(
+        self,
+        source: Union[str, fitz.Document],
+        results: List[Tuple[DocumentPage, PageTiming]],
+        guards: Optional[PageGuardPool] = None
+    ) -> None:
+        """Gửi tất cả các trang ít text sang OCR engine (hoặc các PageGuard) trong một lượt"""
+        scanned = {
+            page.page - 1: (page, timing)
+            for page, timing in results
+            # Very little text; bỏ qua trang đã bị cắt vì vượt ngân sách
+            if len(page.text.strip()) < 50 and not timing.ocr_triggered and page.degraded is None
+        }
+        if not scanned:
+            return
+        
+        logger.info(f"   Text quá ít ở {len(scanned)} trang, thử OCR...")
+        if guards is not None:
+            ocr_results = self._ocr_pages_guarded(guards, scanned)
+        else:
+            ocr_results = self.ocr_engine.ocr_pages(source, list(scanned))
+        
+        for page_index, result in ocr_results.items():
+            page, timing = scanned[page_index]
+            page.text = result.text
+            # Text OCR không có thông tin font, vị trí tiêu đề cũ không còn đúng
+            page.headings = None
+            timing.ocr_time = result.seconds
+            timing.total_time += result.seconds
+            timing.ocr_triggered = True
+            timing.ocr_dpi = result.dpi or None
+            timing.ocr_cache_hit = result.cache_hit
+            logger.debug(f"   Page {page.page}: OCR {len(result.text)} chars @ {result.dpi} DPI")
+    
+    def _ocr_pages_guarded(
+        self,
+        guards: PageGuardPool,
+        scanned: Dict[int, Tuple[DocumentPage, PageTiming]]
+    ) -> Dict[int, OCRPageResult]:
+        """
+        OCR theo batch (batch_size của OCREngine) song song trên các PageGuard
+        
+        Batch vượt ngân sách được chạy lại từng trang; trang vẫn vượt giữ
+        nguyên text và bị đánh dấu page.degraded = lý do.
+        """
+        indices = sorted(scanned)
+        size = self.ocr_engine.batch_size
+        futures = [
+            (batch, guards.submit('ocr', batch))
+            for batch in (indices[i:i + size] for i in range(0, len(indices), size))
+        ]
+        
+        ocr_results: Dict[int, OCRPageResult] = {}
+        for batch, future in futures:
+            status, results = future.result()
+            if status == 'ok':
+                ocr_results.update(results)
+                continue
+            
+            if len(batch) == 1:
+                retries = [(batch[0], None)]
+            else:
+                retries = [(i, guards.submit('ocr', [i])) for i in batch]
+            for i, retry in retries:
+                if retry is not None:
+                    status, results = retry.result()
+                    if status == 'ok':
+                        ocr_results.update(results)
+                        continue
+                self._mark_ocr_degraded(scanned[i], status)
+        return ocr_results
+    
+    @staticmethod
+    def _mark_ocr_degraded(item: Tuple[DocumentPage, PageTiming], reason: str) -> None:
+        page, timing = item
+        logger.warning(f"⚠️ OCR trang {page.page} vượt ngân sách ({reason}), giữ text PyMuPDF")
+        page.degraded = reason
+        timing.degraded = reason
+    
+    def _log_timings(self) -> None:
+        """Log tổng thời gian và các trang chậm nhất"""
+        profile = self.profile
+        if profile is None or not profile.pages:
+            return
+        
+        logger.info(
+            f"   ⏱️  {profile.pages} trang: {profile.wall_time:.2f}s "
+            f"(text {profile.text_time:.2f}s, bảng {profile.table_time:.2f}s, "
+            f"OCR {profile.ocr_time:.2f}s / {profile.ocr_pages} trang)"
+        )
+        logger.debug("   Trang chậm nhất: " + ", ".join(f"p{page}" for page in profile.slowest_pages))
+        if profile.degraded_pages:
+            logger.warning(f"   ⚠️ {len(profile.degraded_pages)} trang vượt ngân sách: {profile.degraded_pages}")
+    
+    def _ocr_page(self, source: Union[str, fitz.Document], page_index: int) -> str:
+        """OCR một trang PDF (nếu scan)"""
+        result = self.ocr_engine.ocr_pages(source, [page_index]).get(page_index)
+        return result.text if result else ""
+
+
+def build_outline(headings: List[Tuple[int, str, int]], num_pages: int) -> List[OutlineEntry]:
+    """
+    Dựng mục lục từ danh sách (level, title, page) theo thứ tự trang
+    
+    Mỗi mục kéo dài tới trước mục kế tiếp cùng cấp hoặc cấp cao hơn.
+    """
+    outline = []
+    for i, (level, title, page) in enumerate(headings):
+        page_end = num_pages
+        for next_level, _, next_page in headings[i + 1:]:
+            if next_level <= level:
+                page_end = max(page, next_page - 1)
+                break
+        outline.append(OutlineEntry(level=level, title=title, page_start=page, page_end=page_end))
+    return outline
+
+
+def page_text_and_headings(page: fitz.Page) -> Tuple[str, List[HeadingMark]]:
+    """
+    Text của trang (giống hệt page.get_text()) kèm tiêu đề phát hiện theo font
+    
+    Cỡ chữ thân bài là cỡ phổ biến nhất tính theo số ký tự. Một dòng là tiêu
+    đề nếu ngắn và có cỡ chữ lớn hơn hẳn thân bài, hoặc in đậm toàn bộ và bắt
+    đầu bằng PHẦN/CHƯƠNG/BÀI/MỤC + số - dòng thân bài bắt đầu bằng "Bài..."
+    không bị nhận nhầm. Các dòng tiêu đề liền nhau cùng khối, cùng cấp được gộp.
+    
+    Returns:
+        (text, list of HeadingMark với vị trí trong text)
+    """
+    data = page.get_text('dict', flags=fitz.TEXTFLAGS_TEXT)
+    
+    parts: List[str] = []
+    lines = []  # (block, offset, text, size, bold)
+    sizes: Counter = Counter()
+    offset = 0
+    for block_no, block in enumerate(data['blocks']):
+        if block['type'] != 0:
+            continue
+        for line in block['lines']:
+            spans = line['spans']
+            line_text = ''.join(span['text'] for span in spans)
+            visible = [span for span in spans if span['text'].strip()]
+            if visible:
+                main_span = max(visible, key=lambda span: len(span['text']))
+                bold = all(span['flags'] & 16 or 'Bold' in span['font'] for span in visible)
+                lines.append((block_no, offset, line_text, main_span['size'], bold))
+                for span in visible:
+                    sizes[round(span['size'], 1)] += len(span['text'])
+            parts.append(line_text)
+            parts.append('\n')
+            offset += len(line_text) + 1
+    
+    text = ''.join(parts)
+    if not sizes:
+        return text, []
+    body_size = sizes.most_common(1)[0][0]
+    
+    headings: List[HeadingMark] = []
+    last_block = None
+    for block_no, start, line_text, size, bold in lines:
+        title = ' '.join(line_text.split())
+        level = _heading_level(title, size, bold, body_size)
+        if level is None:
+            last_block = None
+            continue
+        
+        previous = headings[-1] if headings else None
+        if (
+            previous is not None and last_block == block_no and previous.level == level
+            and len(previous.title) + len(title) < MAX_HEADING_CHARS
+        ):
+            # Tiêu đề dài xuống dòng trong cùng một khối
+            previous.title = f"{previous.title} {title}"
+            previous.char_end = start + len(line_text)
+        else:
+            headings.append(HeadingMark(
+                level=level, title=title, char_start=start, char_end=start + len(line_text)
+            ))
+        last_block = block_no
+    
+    return text, headings
+
+
+def _heading_level(title: str, size: float, bold: bool, body_size: float) -> Optional[int]:
+    """Cấp tiêu đề của một dòng (None nếu là thân bài)"""
+    if not title or len(title) > MAX_HEADING_CHARS or not any(c.isalpha() for c in title):
+        return None
+    
+    keyword = _HEADING_KEYWORD.match(title)
+    ratio = size / body_size if body_size else 1.0
+    if keyword and (bold or ratio >= HEADING_SIZE_RATIO):
+        return HEADING_LEVELS[keyword.group(1).upper()]
+    if ratio >= HEADING_SIZE_RATIO:
+        return 1 if ratio >= 1.6 else 2 if ratio >= 1.3 else 3
+    return None
+
+
+def build_section_outline(pages: Iterable[DocumentPage]) -> List[OutlineEntry]:
+    """
+    Mục lục toàn tài liệu từ tiêu đề của các trang (một lượt qua trang)
+    
+    Mỗi mục kéo dài tới ngay trước tiêu đề kế tiếp cùng cấp hoặc cấp cao
+    hơn, kể cả khi tiêu đề đó ở trang sau. Trang không có thông tin font
+    (headings=None) không đóng góp tiêu đề.
+    """
+    marks = []  # (level, title, page, char_start)
+    text_lengths: Dict[int, int] = {}
+    for page in pages:
+        text_lengths[page.page] = len(page.text)
+        for mark in page.headings or []:
+            marks.append((mark.level, mark.title, page.page, mark.char_start))
+    if not marks:
+        return []
+    
+    last_page = max(text_lengths)
+    outline = []
+    # Ngăn xếp các mục đang mở; mục bị đóng khi gặp tiêu đề cùng cấp hoặc cao hơn
+    open_entries: List[OutlineEntry] = []
+    
+    def close(entry: OutlineEntry, page: int, char_start: int) -> None:
+        if char_start == 0 and page > entry.page_start:
+            # Tiêu đề kế tiếp ở đầu trang: mục kết thúc ở cuối trang trước
+            page -= 1
+            while page > entry.page_start and page not in text_lengths:
+                page -= 1
+            char_start = text_lengths.get(page, 0)
+        entry.page_end, entry.char_end = page, char_start
+    
+    for level, title, page, char_start in marks:
+        while open_entries and open_entries[-1].level >= level:
+            close(open_entries.pop(), page, char_start)
+        entry = OutlineEntry(
+            level=level, title=title, page_start=page, page_end=page, char_start=char_start
+        )
+        outline.append(entry)
+        open_entries.append(entry)
+    
+    for entry in open_entries:
+        entry.page_end, entry.char_end = last_page, text_lengths[last_page]
+    return outline
+
+
+def _title_matches(title: str, selector: str) -> bool:
+    """Tiêu đề mục lục khớp với tiêu đề người dùng chọn (tiền tố, không phân biệt hoa thường)"""
+    title = ' '.join(title.split()).casefold()
+    selector = ' '.join(selector.split()).casefold()
+    if not selector or not title.startswith(selector):
+        return False
+    return len(title) == len(selector) or not title[len(selector)].isalnum()
+
+
+def _release_plumber_caches(pdf: pdfplumber.PDF) -> None:
+    """
+    Bỏ các object pdfminer cache ở cấp tài liệu (content stream, ảnh... của
+    mọi trang đã đọc)
+
+    pdfplumber giữ chúng tới khi đóng tài liệu nên bộ nhớ tăng theo số trang
+    (page.close() chỉ bỏ layout của trang). Object được đọc lại từ file khi
+    trang sau cần tới. Font đã dựng vẫn giữ: số font ít, dựng lại thì chậm.
+    """
+    for cache in (getattr(pdf.doc, '_cached_objs', None), getattr(pdf.doc, '_parsed_objs', None)):
+        if cache is not None:
+            cache.clear()
+
+
+def _current_rss_mb() -> float:
+    """RSS hiện tại của process (MB)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    
+    # Không có /proc (macOS, Windows): dùng đỉnh RSS thay thế
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS trả về byte, Linux trả về KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _load_page_tables(options: dict, pdf_path: str, page_number: int) -> List[Dict[str, Any]]:
+    """Trích bảng một trang đã hoãn (dùng làm loader của DocumentPage)"""
+    return PDFParser(**options)._extract_tables(pdf_path, [page_number - 1])[page_number - 1]
+
+
+def _extract_range_worker(
+    options: dict,
+    pdf_path: str,
+    start: int,
+    stop: int
+) -> List[Tuple[DocumentPage, PageTiming]]:
+    """Hàm chạy trong process con: tự mở PDF và trích xuất một khoảng trang"""
+    return PDFParser(**options)._extract_page_range(pdf_path, start, stop)
+
+
+# Pattern của TextCleaner, biên dịch một lần khi import
+_MULTI_NEWLINE = re.compile(r'\n{3,}')
+_MULTI_SPACE = re.compile(r' {2,}')
+# Neo ^ theo dòng nhanh hơn nhánh (?:^|\n) vì không phải thử ở mọi vị trí
+_PAGE_NUMBER_LINE = re.compile(r'^[ \t]*(?:Trang|Page)[ \t]+\d+[ \t]*(?:\n|\Z)', re.MULTILINE)
+_DIGITS = re.compile(r'\d+')
+
+
+def _clean_chunk(texts: List[str], with_keys: bool = True) -> List[Tuple[str, Set[str]]]:
+    """Hàm chạy trong process con: làm sạch một nhóm trang, kèm khóa dòng của từng trang"""
+    results = []
+    for text in texts:
+        text = TextCleaner.clean(text)
+        results.append((text, TextCleaner._page_keys(text) if with_keys else set()))
+    return results
+
+
+def _strip_chunk(texts: List[str], repeated: Set[str]) -> List[str]:
+    """Hàm chạy trong process con: xóa dòng lặp lại của một nhóm trang"""
+    return [TextCleaner.remove_repeated_lines(text, repeated) for text in texts]
 
 
 class TextCleaner:
     """Làm sạch text sau khi parse"""
     
+    # Dòng xuất hiện ở >= tỷ lệ này số trang (và ít nhất REPEAT_MIN_PAGES trang)
+    # coi là header/footer/watermark
+    REPEAT_MIN_RATIO = 0.5
+    REPEAT_MIN_PAGES = 3
+    # Số dòng đầu/cuối trang có chữ số được so khớp sau khi thay chữ số bằng '#'
+    # (số trang, "Trang 3/20", "- 12 -")
+    EDGE_LINES = 2
+    # Dòng giữa trang chỉ xét khi đủ dài, tránh xóa "A.", "Câu 1."...
+    MIN_BODY_LINE = 12
+    # clean_pages(): chỉ chia process khi tài liệu đủ lớn để bù chi phí pickle
+    PARALLEL_MIN_PAGES = 200
+    CHUNK_PAGES = 64
+    
     @staticmethod
     def clean(text: str) -> str:
-        """Chuẩn hóa text"""
+        """Chuẩn hóa text một trang (header/footer lặp lại xử lý ở cấp tài liệu)"""
         # Remove multiple newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        if '\n\n\n' in text:
+            text = _MULTI_NEWLINE.sub('\n\n', text)
         
         # Remove multiple spaces
-        text = re.sub(r' {2,}', ' ', text)
+        if '  ' in text:
+            text = _MULTI_SPACE.sub(' ', text)
         
         # Remove page numbers patterns
-        text = re.sub(r'(?:^|\n)\s*(?:Trang|Page)\s+\d+\s*(?:\n|$)', '\n', text)
+        text = _PAGE_NUMBER_LINE.sub('', text)
         
-        # Remove header/footer repetitions (simple heuristic)
+        return text.strip()
+    
+    @classmethod
+    def clean_document(cls, document: Document, workers: int = 1) -> Document:
+        """
+        Làm sạch mọi trang rồi xóa các dòng lặp lại trên phần lớn số trang
+        (tên trường, tiêu đề đề cương, watermark...). Sửa trực tiếp document.
+        
+        Args:
+            document: Document đã parse
+            workers: Số process dùng cho tài liệu lớn (xem clean_pages())
+        """
+        cls.clean_pages(document.pages, workers=workers)
+        document.cleaned = True
+        return document
+    
+    @classmethod
+    def clean_pages(cls, pages, workers: int = 1, remove_repeated: bool = True):
+        """
+        Làm sạch cả lô trang: clean() từng trang và đếm tần suất dòng trong
+        cùng một lượt, rồi xóa header/footer lặp lại
+        
+        Tài liệu từ PARALLEL_MIN_PAGES trang trở lên và workers > 1 được chia
+        thành các nhóm CHUNK_PAGES trang xử lý song song bằng process pool.
+        
+        Args:
+            pages: List DocumentPage hoặc PageStore, sửa trực tiếp
+            workers: Số process (1 = tuần tự)
+            remove_repeated: Có xóa dòng lặp lại giữa các trang không
+            
+        Returns:
+            Chính `pages`
+        """
+        texts = [page.text for page in pages]
+        chunks = [texts[i:i + cls.CHUNK_PAGES] for i in range(0, len(texts), cls.CHUNK_PAGES)]
+        parallel = workers > 1 and len(texts) >= cls.PARALLEL_MIN_PAGES
+        
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks))) if parallel else None
+        try:
+            if executor is not None:
+                cleaned = [
+                    item
+                    for chunk in executor.map(_clean_chunk, chunks, [remove_repeated] * len(chunks))
+                    for item in chunk
+                ]
+            else:
+                cleaned = _clean_chunk(texts, remove_repeated)
+            
+            texts = [text for text, _ in cleaned]
+            repeated: Set[str] = set()
+            if remove_repeated:
+                counts: Counter = Counter()
+                for _, keys in cleaned:
+                    counts.update(keys)
+                threshold = cls._repeat_threshold(len(texts))
+                repeated = {key for key, count in counts.items() if count >= threshold}
+            
+            if repeated:
+                logger.info(f"   🧹 Xóa {len(repeated)} dòng header/footer lặp lại")
+                if executor is not None:
+                    chunks = [texts[i:i + cls.CHUNK_PAGES] for i in range(0, len(texts), cls.CHUNK_PAGES)]
+                    texts = [
+                        text
+                        for chunk in executor.map(_strip_chunk, chunks, [repeated] * len(chunks))
+                        for text in chunk
+                    ]
+                else:
+                    texts = _strip_chunk(texts, repeated)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        for i, (page, text) in enumerate(zip(pages, texts)):
+            page.text = text
+            # Ghi lại để PageStore (bounded-memory) lưu bản đã sửa
+            pages[i] = page
+        return pages
+    
+    @classmethod
+    def strip_repeated_lines(
+        cls,
+        pages: Iterable[DocumentPage],
+        warmup: int = 10
+    ) -> Iterator[DocumentPage]:
+        """
+        Bản streaming của bước xóa header/footer: đếm tần suất dòng dồn qua
+        các trang, giữ lại `warmup` trang đầu để có đủ thống kê rồi mới yield
+        
+        Args:
+            pages: Các trang theo thứ tự (vd. từ PDFParser.iter_pages)
+            warmup: Số trang gom trước khi bắt đầu yield
+            
+        Yields:
+            DocumentPage đã xóa các dòng lặp lại
+        """
+        counts: Counter = Counter()
+        seen = 0
+        buffered: List[DocumentPage] = []
+        
+        def flush():
+            threshold = cls._repeat_threshold(seen)
+            for page in buffered:
+                page.text = cls._strip_lines(page.text, lambda key: counts[key] >= threshold)
+                yield page
+            buffered.clear()
+        
+        for page in pages:
+            counts.update(cls._page_keys(page.text))
+            seen += 1
+            buffered.append(page)
+            if seen >= warmup:
+                yield from flush()
+        
+        yield from flush()
+    
+    @classmethod
+    def find_repeated_lines(cls, texts: Iterable[str]) -> Set[str]:
+        """
+        Đếm (một lượt) số trang chứa mỗi dòng đã chuẩn hóa
+        
+        Returns:
+            Tập khóa dòng lặp lại, dùng cho remove_repeated_lines()
+        """
+        counts: Counter = Counter()
+        num_pages = 0
+        for text in texts:
+            counts.update(cls._page_keys(text))
+            num_pages += 1
+        
+        threshold = cls._repeat_threshold(num_pages)
+        return {key for key, count in counts.items() if count >= threshold}
+    
+    @classmethod
+    def remove_repeated_lines(cls, text: str, repeated: Set[str]) -> str:
+        """Xóa khỏi text các dòng thuộc tập find_repeated_lines()"""
+        if not repeated:
+            return text
+        return cls._strip_lines(text, repeated.__contains__)
+    
+    @classmethod
+    def _repeat_threshold(cls, num_pages: int) -> float:
+        """Số trang tối thiểu để một dòng bị coi là lặp lại"""
+        if num_pages < cls.REPEAT_MIN_PAGES:
+            return math.inf
+        return max(cls.REPEAT_MIN_PAGES, math.ceil(num_pages * cls.REPEAT_MIN_RATIO))
+    
+    @classmethod
+    def _line_keys(cls, text: str) -> List[Tuple[str, List[str]]]:
+        """
+        Khóa so khớp của từng dòng: dòng đầu/cuối trang có chữ số thì bỏ chữ
+        số ('e:'), dòng đủ dài so khớp nguyên văn ('b:'); đều đã gộp khoảng
+        trắng, chữ thường
+        """
         lines = text.split('\n')
-        if len(lines) > 10:
-            # Remove first/last 2 lines if they look like headers
-            if len(lines[0]) < 50 and len(lines[1]) < 50:
-                lines = lines[2:]
-            if len(lines[-1]) < 50 and len(lines[-2]) < 50:
-                lines = lines[:-2]
-        
-        return '\n'.join(lines).strip()
+        # casefold cả trang một lần thay vì từng dòng
+        norm_lines = text.casefold().split('\n')
+        nonblank = [i for i, norm in enumerate(norm_lines) if norm.strip()]
+        edge = set(nonblank[:cls.EDGE_LINES] + nonblank[-cls.EDGE_LINES:])
+        
+        result = []
+        for i, (line, norm) in enumerate(zip(lines, norm_lines)):
+            # Dòng ngắn ở giữa trang không có khóa; tiêu đề chương/bài không
+            # bao giờ là header/footer (SectionAwareStrategy cần giữ lại, kể cả
+            # khi strip_repeated_lines mới thấy vài trang đầu của chương)
+            if (len(norm) < cls.MIN_BODY_LINE and i not in edge) or HEADING_PATTERN.match(line):
+                result.append((line, []))
+                continue
+            norm = norm.strip()
+            if '  ' in norm or '\t' in norm:
+                norm = ' '.join(norm.split())
+            keys = []
+            if norm:
+                if i in edge:
+                    masked = _DIGITS.sub('#', norm)
+                    if masked != norm:
+                        keys.append('e:' + masked)
+                if len(norm) >= cls.MIN_BODY_LINE:
+                    keys.append('b:' + norm)
+            result.append((line, keys))
+        return result
+    
+    @classmethod
+    def _page_keys(cls, text: str) -> Set[str]:
+        """Các khóa dòng của một trang (mỗi khóa đếm một lần mỗi trang)"""
+        return {key for _, keys in cls._line_keys(text) for key in keys}
+    
+    @classmethod
+    def _strip_lines(cls, text: str, is_repeated: Callable[[str], bool]) -> str:
+        kept = [
+            line for line, keys in cls._line_keys(text)
+            if not any(is_repeated(key) for key in keys)
+        ]
+        return '\n'.join(kept).strip()
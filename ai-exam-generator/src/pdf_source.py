@@ -0,0 +1,128 @@
+"""
+Nguồn PDF: đường dẫn file hoặc buffer trong RAM (bytes, memoryview, mmap)
+"""
+import io
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+
+PDFSource = Union[str, Path, bytes, bytearray, memoryview, mmap.mmap]
+
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# Tên mặc định khi parse từ buffer mà không truyền file_name
+DEFAULT_BUFFER_NAME = 'document.pdf'
+
+
+def is_buffer(source) -> bool:
+    """Nguồn là buffer trong RAM (không phải đường dẫn)"""
+    return isinstance(source, BUFFER_TYPES)
+
+
+def normalize_source(source: PDFSource) -> Union[str, memoryview]:
+    """
+    Chuẩn hóa nguồn: đường dẫn -> str, buffer -> memoryview (không copy)
+
+    memoryview dùng chung vùng nhớ của bytes/bytearray/mmap gốc, nên caller
+    phải giữ buffer (và không đóng mmap) cho tới khi parse xong.
+    """
+    if is_buffer(source):
+        view = memoryview(source)
+        if not view.contiguous:
+            raise ValueError("Buffer PDF phải liên tục (contiguous)")
+        return view.cast('B')
+    return str(source)
+
+
+def source_name(source: Union[str, memoryview], file_name: Optional[str] = None) -> str:
+    """Tên file hiển thị của nguồn"""
+    if file_name:
+        return Path(file_name).name
+    if isinstance(source, memoryview):
+        return DEFAULT_BUFFER_NAME
+    return Path(source).name
+
+
+def open_fitz(source: Union[str, memoryview]) -> fitz.Document:
+    """Mở bằng PyMuPDF; buffer được đọc trực tiếp qua stream=, không copy"""
+    if isinstance(source, memoryview):
+        return fitz.open(stream=source, filetype='pdf')
+    return fitz.open(source)
+
+
+@contextmanager
+def open_plumber(source: Union[str, memoryview]) -> Iterator[pdfplumber.PDF]:
+    """
+    Mở bằng pdfplumber (dùng với `with`); buffer được bọc trong reader chỉ
+    đọc, không copy
+
+    pdfplumber không đóng stream do caller truyền vào, còn object của pdfminer
+    giữ reader trong vòng tham chiếu tới lần GC sau. Reader được đóng ngay sau
+    document để trả lại buffer: mmap gốc đóng được khi parse xong.
+    """
+    if not isinstance(source, memoryview):
+        with pdfplumber.open(source) as pdf:
+            yield pdf
+        return
+
+    reader = BufferReader(source)
+    try:
+        with pdfplumber.open(reader) as pdf:
+            yield pdf
+    finally:
+        reader.close()
+
+
+class BufferReader(io.RawIOBase):
+    """
+    File-like chỉ đọc trên memoryview
+
+    Khác io.BytesIO (copy toàn bộ dữ liệu khi nhận memoryview/mmap), reader
+    này chỉ giữ con trỏ vị trí; mỗi lần read chỉ copy đúng đoạn được đọc.
+    """
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        # View riêng để close() giải phóng mà không ảnh hưởng view của caller
+        self._view = memoryview(view)
+        self._pos = 0
+
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        n = len(chunk)
+        buffer[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"whence không hợp lệ: {whence}")
+        if pos < 0:
+            raise ValueError(f"Vị trí âm: {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
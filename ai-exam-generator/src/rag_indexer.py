@@ -1,138 +1,54 @@
 """
 Module chia text thành chunks và tạo RAG index
 """
-import re
+import time
 import uuid
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
 from loguru import logger
 import numpy as np
 import faiss
+import tiktoken
 from openai import OpenAI
 import pickle
 from pathlib import Path
 
-from .models import Document, Chunk, SourceTrace
+from .models import Chunk, SourceTrace
 from .config import get_config
+from .chunking import ChunkingEngine, get_encoding, make_strategy
 
 
-class TextChunker:
-    """Chia text thành chunks có ngữ nghĩa"""
+class TextChunker(ChunkingEngine):
+    """Chia text thành chunks có ngữ nghĩa (ChunkingEngine section-aware theo cấu hình)"""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        include_tables: bool = False,
+        unit: str = 'chars',
+        encoding_model: Optional[str] = None
+    ):
         """
         Args:
-            chunk_size: Kích thước chunk (ký tự)
-            chunk_overlap: Độ chồng lấn giữa các chunks
+            chunk_size: Kích thước chunk (ký tự, hoặc token khi unit='tokens')
+            chunk_overlap: Độ chồng lấn giữa các chunks (cùng đơn vị với chunk_size)
+            include_tables: Thêm mỗi bảng của trang thành một chunk riêng
+                (trang hoãn trích bảng sẽ được trích lúc này)
+            unit: 'chars' hoặc 'tokens' (đếm bằng tokenizer tiktoken của model
+                embedding, chunk không bao giờ vượt chunk_size token)
+            encoding_model: Model embedding để chọn tokenizer (None = cl100k_base)
         """
+        super().__init__(make_strategy(chunk_size, chunk_overlap, unit, encoding_model), include_tables)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.unit = unit
+        self.encoding_model = encoding_model
     
-    def chunk_document(self, document: Document) -> List[Chunk]:
-        """
-        Chia document thành chunks
-        
-        Args:
-            document: Document đã parse
-            
-        Returns:
-            List of chunks
-        """
-        logger.info(f"📦 Chunking document: {document.file_name}")
-        
-        chunks = []
-        
-        for page in document.pages:
-            # Detect sections (CHƯƠNG, BÀI, MỤC)
-            sections = self._detect_sections(page.text)
-            
-            if sections:
-                # Chunk theo sections
-                for section_title, section_text in sections:
-                    section_chunks = self._chunk_text(
-                        section_text,
-                        page.page,
-                        section_title
-                    )
-                    chunks.extend(section_chunks)
-            else:
-                # Chunk theo sliding window
-                page_chunks = self._chunk_text(
-                    page.text,
-                    page.page,
-                    None
-                )
-                chunks.extend(page_chunks)
-        
-        logger.info(f"✅ Created {len(chunks)} chunks")
-        return chunks
-    
-    def _detect_sections(self, text: str) -> List[Tuple[str, str]]:
-        """
-        Phát hiện các section (CHƯƠNG, BÀI, MỤC)
-        
-        Returns:
-            List of (section_title, section_text)
-        """
-        sections = []
-        
-        # Pattern để tìm tiêu đề
-        pattern = r'(?:^|\n)((?:CHƯƠNG|BÀI|MỤC|PHẦN)\s+[IVXLCDM\d]+[:\.]?\s*[^\n]+)'
-        
-        matches = list(re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE))
-        
-        if not matches:
-            return []
-        
-        for i, match in enumerate(matches):
-            title = match.group(1).strip()
-            start = match.end()
-            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-            content = text[start:end].strip()
-            
-            if content:
-                sections.append((title, content))
-        
-        return sections
-    
-    def _chunk_text(
-        self,
-        text: str,
-        page: int,
-        section: str = None
-    ) -> List[Chunk]:
-        """Chia text thành chunks bằng sliding window"""
-        chunks = []
-        text_length = len(text)
-        start = 0
-        
-        while start < text_length:
-            end = start + self.chunk_size
-            
-            # Tìm điểm ngắt tự nhiên (dấu câu)
-            if end < text_length:
-                # Tìm dấu câu gần nhất
-                for sep in ['\n\n', '.\n', '. ', '\n']:
-                    last_sep = text.rfind(sep, start, end)
-                    if last_sep != -1:
-                        end = last_sep + len(sep)
-                        break
-            
-            chunk_text = text[start:end].strip()
-            
-            if chunk_text:
-                chunk = Chunk(
-                    chunk_id=f"p{page}_c{len(chunks):03d}",
-                    page=page,
-                    section=section,
-                    text=chunk_text,
-                    char_start=start,
-                    char_end=end
-                )
-                chunks.append(chunk)
-            
-            start = end - self.chunk_overlap
-        
-        return chunks
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """Tokenizer của model embedding (tải lười ở lần dùng đầu tiên)"""
+        return get_encoding(self.encoding_model)
 
 
 class RAGIndexer:
@@ -177,6 +93,66 @@ class RAGIndexer:
         
         logger.info(f"✅ Index built with {self.index.ntotal} vectors")
     
+    def build_index_stream(self, chunks: Iterable[Chunk], batch_size: int = 64) -> List[Chunk]:
+        """
+        Tạo FAISS index từ luồng chunks, embed theo từng batch
+        
+        Batch đang embed chạy ở thread nền trong khi luồng chunks (parse,
+        chunking) tiếp tục sinh batch sau. Index tìm kiếm được ngay sau batch đầu.
+        
+        Args:
+            chunks: Luồng chunks (vd. từ TextChunker.chunk_pages)
+            batch_size: Số chunks mỗi lần gọi embedding
+            
+        Returns:
+            Toàn bộ chunks đã index
+        """
+        logger.info(f"🔍 Building RAG index (streaming, batch {batch_size})...")
+        
+        self.chunks = []
+        self.index = None
+        t0 = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            in_flight = None
+            batch = []
+            
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) < batch_size:
+                    continue
+                
+                if in_flight is not None:
+                    self._add_to_index(*in_flight.result(), t0)
+                in_flight = executor.submit(self._embed_batch, batch)
+                batch = []
+            
+            if in_flight is not None:
+                self._add_to_index(*in_flight.result(), t0)
+            if batch:
+                self._add_to_index(*self._embed_batch(batch), t0)
+        
+        total = self.index.ntotal if self.index is not None else 0
+        logger.info(f"✅ Index built with {total} vectors in {time.perf_counter() - t0:.2f}s")
+        return self.chunks
+    
+    def _embed_batch(self, batch: List[Chunk]) -> Tuple[List[Chunk], List[List[float]]]:
+        """Embed một batch chunks"""
+        return batch, self._get_embeddings([c.text for c in batch])
+    
+    def _add_to_index(self, batch: List[Chunk], embeddings: List[List[float]], t0: float) -> None:
+        """Thêm một batch đã embed vào index (tạo index ở batch đầu tiên)"""
+        for chunk, emb in zip(batch, embeddings):
+            chunk.embedding = emb
+        
+        embeddings_array = np.array(embeddings, dtype='float32')
+        if self.index is None:
+            self.index = faiss.IndexFlatL2(embeddings_array.shape[1])
+            logger.info(f"   ⚡ Chunk đầu tiên tìm kiếm được sau {time.perf_counter() - t0:.2f}s")
+        
+        self.index.add(embeddings_array)
+        self.chunks.extend(batch)
+    
     def search(self, query: str, top_k: int = 5) -> List[Chunk]:
         """
         Tìm kiếm chunks liên quan
@@ -0,0 +1,32 @@
+"""
+PDFParser ở chế độ bounded-memory: RSS không tăng theo số trang
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_memory import compare, measure
+from benchmarks.corpus import make_figure_pdf
+from src.pdf_parser import PDFParser
+
+
+TARGET_MB = 20
+
+
+@pytest.fixture(scope='module')
+def figure_pdf(tmp_path_factory):
+    return make_figure_pdf(str(tmp_path_factory.mktemp('bounded') / 'figures.pdf'), 120)
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="cần /proc để đo RSS hiện tại")
+@pytest.mark.parametrize('backend', PDFParser.BACKENDS)
+def test_bounded_memory_stays_within_target(figure_pdf, backend):
+    default = measure(figure_pdf, backend, False, TARGET_MB, timeout=300)
+    bounded = measure(figure_pdf, backend, True, TARGET_MB, timeout=300)
+
+    assert bounded['pages'] == default['pages'] == 120
+    assert compare(default, bounded, TARGET_MB) == {
+        'default_exceeds_target': True,
+        'bounded_within_target': True,
+        'bounded_below_default': True,
+    }, (default, bounded)
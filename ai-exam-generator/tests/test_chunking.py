@@ -0,0 +1,63 @@
+"""
+ChunkingEngine: chunk theo ngân sách token
+"""
+import random
+
+import pytest
+
+from src.chunking import SectionAwareStrategy, SlidingWindowStrategy, TokenBudgetStrategy
+from src.models import DocumentPage
+from benchmarks.corpus import make_page_texts
+from benchmarks.golden_encoding import GOLDEN_ENCODING, load_golden_encoding
+
+
+def _vietnamese_texts():
+    rng = random.Random(7)
+    # Ký tự hiếm không có trong bảng merge: mỗi ký tự thành nhiều token byte
+    rare = "ỸỹỴỵẴẵẪẫỠỡỮữ"
+    texts = make_page_texts(3, seed=7)
+    texts.append(''.join(rng.choice(rare + "aăâ") for _ in range(900)))
+    texts.append("Phương trình bậc hai" + "ẵữ" * 400 + ". Hết bài.\n" + "Nghiệm" * 150)
+    return texts
+
+
+@pytest.mark.parametrize('chunk_size,chunk_overlap', [(16, 0), (16, 8), (32, 12), (64, 16), (9, 5)])
+def test_token_chunks_fit_budget_and_advance(chunk_size, chunk_overlap):
+    encoding = load_golden_encoding()
+    strategy = TokenBudgetStrategy(chunk_size, chunk_overlap, encoding_model=GOLDEN_ENCODING)
+
+    for text in _vietnamese_texts():
+        spans = strategy.split(text)
+
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        for (_, prev_end), (start, end) in zip(spans, spans[1:]):
+            assert start <= prev_end < end
+        for start, end in spans:
+            assert len(encoding.encode_ordinary(text[start:end])) <= chunk_size
+
+
+def _sections(text):
+    strategy = SectionAwareStrategy(SlidingWindowStrategy(200, 0))
+    spans, _ = strategy.split_page(DocumentPage(page=1, text=text), None)
+    return [section for section, _, _ in spans]
+
+
+@pytest.mark.parametrize('heading', [
+    "CHƯƠNG 2: HÀM SỐ BẬC NHẤT",
+    "Chương 2: Hàm số bậc nhất",
+    "Bài 3. Phương trình bậc hai",
+    "MỤC II",
+    "Chapter 1 Introduction",
+])
+def test_heading_fallback_starts_section(heading):
+    assert _sections(f"Lời nói đầu.\n{heading}\nNội dung của phần này.") == [None, heading]
+
+
+@pytest.mark.parametrize('line', [
+    "Bài 3 trang 45 là bài tập về nhà của tuần này.",
+    "Chương 2 giới thiệu hàm số bậc nhất.",
+    "Bài 3.5 trong sách bài tập.",
+    "Bài 3: " + "rất dài " * 20,
+])
+def test_body_line_is_not_heading(line):
+    assert _sections(f"Lời nói đầu.\n{line}\nNội dung tiếp theo.") == [None]
@@ -0,0 +1,23 @@
+"""
+ChunkingEngine: output khớp golden đã duyệt (benchmarks/golden/chunking.json)
+
+Ghi lại golden khi cố ý đổi thuật toán: python -m benchmarks.check_chunking_golden --update
+"""
+import json
+
+import pytest
+
+from benchmarks.check_chunking_golden import GOLDEN_PATH, golden_cases, golden_pages, run_case
+from benchmarks.golden_encoding import load_golden_encoding
+
+
+@pytest.fixture(scope='module')
+def golden():
+    load_golden_encoding()
+    return json.loads(GOLDEN_PATH.read_text(encoding='utf-8'))
+
+
+@pytest.mark.parametrize('name', list(golden_cases()))
+def test_chunking_matches_golden(name, golden):
+    assert name in golden, "Cấu hình chưa có trong golden, chạy --update"
+    assert run_case(golden_cases()[name](), golden_pages()) == golden[name]
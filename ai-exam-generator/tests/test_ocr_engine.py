@@ -0,0 +1,17 @@
+"""
+OCREngine: OCR trang scan theo batch
+"""
+from src import ocr_engine
+from src.ocr_engine import OCREngine
+from benchmarks.corpus import make_scanned_pdf
+
+
+def test_inline_ocr_does_not_keep_document_open(tmp_path, monkeypatch):
+    pdf_path = make_scanned_pdf(str(tmp_path / 'scan.pdf'), 3, dpi=50)
+    monkeypatch.setattr(ocr_engine, '_recognize_batch', lambda images, lang: ["chữ"] * len(images))
+
+    with OCREngine(workers=1, batch_size=2) as engine:
+        results = engine.ocr_pages(pdf_path, [0, 1, 2])
+
+    assert [results[i].text for i in range(3)] == ["chữ"] * 3
+    assert ocr_engine._WORKER_STATE['doc'] is None
@@ -0,0 +1,99 @@
+"""
+OfficeIngester: nội dung DOCX nằm trong content control (w:sdt) và w:customXml,
+thứ tự và text slide PPTX
+"""
+import zipfile
+
+from src.office_ingester import OfficeIngester
+
+
+NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+PPTX_NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+)
+REL_NS = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+
+
+def _p(text: str) -> str:
+    return f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+
+
+def _tbl(*cells: str) -> str:
+    row = ''.join(f'<w:tc>{_p(cell)}</w:tc>' for cell in cells)
+    return f'<w:tbl><w:tr>{row}</w:tr></w:tbl>'
+
+
+def _write_docx(path, body: str) -> str:
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('word/document.xml', f'<w:document {NS}><w:body>{body}</w:body></w:document>')
+    return str(path)
+
+
+def test_docx_keeps_sdt_and_custom_xml_content(tmp_path):
+    docx_path = _write_docx(tmp_path / 'sdt.docx', ''.join([
+        _p("Đoạn mở đầu"),
+        f'<w:sdt><w:sdtPr/><w:sdtContent>{_p("Đoạn trong content control")}'
+        f'{_tbl("Nội dung", "Nhận biết")}</w:sdtContent></w:sdt>',
+        f'<w:customXml>{_p("Đoạn trong customXml")}</w:customXml>',
+        _tbl("Hệ phương trình", "2"),
+    ]))
+
+    page, = OfficeIngester().parse(docx_path).pages
+
+    assert page.text.split('\n') == [
+        "Đoạn mở đầu",
+        "Đoạn trong content control",
+        "Nội dung | Nhận biết",
+        "Đoạn trong customXml",
+        "Hệ phương trình | 2",
+    ]
+    assert [t['data'] for t in page.tables] == [[["Nội dung", "Nhận biết"]], [["Hệ phương trình", "2"]]]
+
+
+def _sp(*lines: str, placeholder: str = '') -> str:
+    ph = f'<p:ph type="{placeholder}"/>' if placeholder else ''
+    paras = ''.join(f'<a:p><a:r><a:t>{line}</a:t></a:r></a:p>' for line in lines)
+    return f'<p:sp><p:nvSpPr><p:nvPr>{ph}</p:nvPr></p:nvSpPr><p:txBody>{paras}</p:txBody></p:sp>'
+
+
+def _write_pptx(path, slides) -> str:
+    """slides: (tên file slide, nội dung spTree) theo thứ tự trình chiếu"""
+    ids = ''.join(f'<p:sldId id="{256 + i}" r:id="rId{i}"/>' for i in range(len(slides)))
+    rels = ''.join(
+        f'<Relationship Id="rId{i}" Target="slides/{name}"/>' for i, (name, _) in enumerate(slides)
+    )
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr(
+            'ppt/presentation.xml',
+            f'<p:presentation {PPTX_NS}><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>'
+        )
+        zf.writestr('ppt/_rels/presentation.xml.rels', f'<Relationships {REL_NS}>{rels}</Relationships>')
+        for name, tree in slides:
+            zf.writestr(
+                f'ppt/slides/{name}',
+                f'<p:sld {PPTX_NS}><p:cSld><p:spTree>{tree}</p:spTree></p:cSld></p:sld>'
+            )
+    return str(path)
+
+
+def test_pptx_follows_presentation_order(tmp_path):
+    # Thứ tự trình chiếu khác thứ tự tên file; tiêu đề nằm sau thân bài trong XML
+    pptx_path = _write_pptx(tmp_path / 'slides.pptx', [
+        ('slide2.xml', _sp("Khái niệm", "Ví dụ") + _sp("CHƯƠNG 1. Mở đầu", placeholder='title')),
+        ('slide1.xml', _sp("Bài 1. Hàm số", placeholder='ctrTitle') + _sp("Tập xác định")),
+        ('slide3.xml', _sp("Ghi chú cuối")),
+    ])
+
+    document = OfficeIngester().parse(pptx_path)
+
+    assert [page.page for page in document.pages] == [1, 2, 3]
+    assert [page.text.split('\n') for page in document.pages] == [
+        ["CHƯƠNG 1. Mở đầu", "Khái niệm", "Ví dụ"],
+        ["Bài 1. Hàm số", "Tập xác định"],
+        ["Ghi chú cuối"],
+    ]
+    assert [[h.title for h in page.headings] for page in document.pages] == [
+        ["CHƯƠNG 1. Mở đầu"], ["Bài 1. Hàm số"], []
+    ]
@@ -0,0 +1,73 @@
+"""
+PDFParser với ngân sách thời gian/bộ nhớ mỗi trang (PageGuardPool)
+
+Các test thay hàm trong process cha nên cần process con được fork.
+"""
+import multiprocessing
+import time
+
+import fitz
+import pytest
+
+from src import ocr_engine
+from src.ocr_engine import OCRPageResult
+from src.pdf_parser import PDFParser
+from benchmarks.corpus import make_scanned_pdf, make_text_pdf
+
+
+pytestmark = pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork', reason="cần start method 'fork'"
+)
+
+
+def _texts(pages):
+    return [page.text for page in pages]
+
+
+def test_guarded_parse_matches_unguarded(tmp_path):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 4)
+
+    with PDFParser(ocr_workers=0) as parser:
+        expected = _texts(parser.parse(pdf_path).pages)
+    with PDFParser(workers=2, min_pages_per_task=1, ocr_workers=0, page_timeout=60) as parser:
+        pages = parser.parse(pdf_path).pages
+
+    assert _texts(pages) == expected
+    assert parser.profile.degraded_pages == []
+
+
+def test_slow_page_degrades_to_pymupdf_text(tmp_path, monkeypatch):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 3)
+    extract = PDFParser._extract_page_range
+
+    def hang_on_page_two(self, source, start, stop):
+        if start <= 1 < stop:
+            time.sleep(60)
+        return extract(self, source, start, stop)
+
+    monkeypatch.setattr(PDFParser, '_extract_page_range', hang_on_page_two)
+    with PDFParser(ocr_workers=0, page_timeout=2) as parser:
+        pages = parser.parse(pdf_path).pages
+
+    with fitz.open(pdf_path) as pdf_doc:
+        raw_text = pdf_doc[1].get_text()
+    assert [page.degraded for page in pages] == [None, 'timeout', None]
+    assert pages[1].text == raw_text
+    assert parser.profile.degraded_pages == [2]
+
+
+def test_scanned_document_keeps_classifier_and_ocr_batches(tmp_path, monkeypatch):
+    pdf_path = make_scanned_pdf(str(tmp_path / 'scan.pdf'), 6, dpi=50)
+
+    def fake_ocr(source, page_indices, *args):
+        return [(i, OCRPageResult(text=f"batch of {len(page_indices)}", seconds=0.0)) for i in page_indices]
+
+    monkeypatch.setattr(ocr_engine, '_ocr_batch_worker', fake_ocr)
+    with PDFParser(ocr_workers=2, page_timeout=60) as parser:
+        placeholders = parser._scanned_placeholders
+        calls = []
+        monkeypatch.setattr(parser, '_scanned_placeholders', lambda *a: calls.append(a) or placeholders(*a))
+        pages = parser.parse(pdf_path).pages
+
+    assert calls
+    assert _texts(pages) == ["batch of 4"] * 4 + ["batch of 2"] * 2
@@ -0,0 +1,28 @@
+"""
+PageStore: trang đọc lại từ đĩa ở chế độ bounded-memory
+"""
+from src.chunking import ChunkingEngine
+from src.pdf_parser import PDFParser
+from benchmarks.corpus import make_table_pdf
+
+
+def _table_chunks(pages) -> int:
+    engine = ChunkingEngine.from_settings(include_tables=True)
+    return sum(1 for chunk in engine.chunk_pages(pages) if '_t' in chunk.chunk_id)
+
+
+def test_bounded_memory_keeps_deferred_table_loader(tmp_path):
+    pdf_path = make_table_pdf(str(tmp_path / 'tables.pdf'), 3)
+
+    with PDFParser(defer_tables=True, ocr_workers=0) as parser:
+        expected = _table_chunks(parser.parse(pdf_path).pages)
+
+    with PDFParser(
+        defer_tables=True,
+        bounded_memory=True,
+        page_store_dir=str(tmp_path),
+        ocr_workers=0
+    ) as parser:
+        pages = parser.parse(pdf_path).pages
+        assert all(page.has_tables and not page.tables_loaded for page in pages)
+        assert _table_chunks(pages) == expected > 0
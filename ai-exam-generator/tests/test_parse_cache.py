@@ -0,0 +1,32 @@
+"""
+ParseCache: cache Document đã parse theo nội dung file + cấu hình parser
+"""
+from src.page_store import PageStore
+from src.parse_cache import ParseCache
+from src.pdf_parser import PDFParser
+from benchmarks.corpus import make_text_pdf
+
+
+def test_detect_scanned_is_part_of_cache_key(tmp_path):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 2)
+    cache = ParseCache(str(tmp_path / 'cache'))
+
+    for detect_scanned in (True, False, True):
+        with PDFParser(ocr_workers=0, detect_scanned=detect_scanned, cache=cache) as parser:
+            parser.parse(pdf_path)
+
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_bounded_document_round_trips_through_page_store(tmp_path):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 3)
+    cache = ParseCache(str(tmp_path / 'cache'))
+
+    with PDFParser(ocr_workers=0, bounded_memory=True, cache=cache) as parser:
+        parsed = parser.parse(pdf_path)
+        cached = parser.parse(pdf_path)
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert isinstance(cached.pages, PageStore)
+    assert [page.model_dump() for page in cached.pages] == [page.model_dump() for page in parsed.pages]
+    assert cached.outline == parsed.outline
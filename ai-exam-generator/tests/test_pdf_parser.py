@@ -0,0 +1,51 @@
+"""
+PDFParser: parse lại tài liệu đã có
+"""
+import fitz
+import pytest
+
+from src.pdf_parser import PDFParser, TextCleaner
+from benchmarks.corpus import make_text_pdf
+
+
+def test_reparse_unchanged_resets_profile(tmp_path):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 2)
+
+    with PDFParser(ocr_workers=0) as parser:
+        previous = parser.parse(pdf_path)
+        assert parser.profile.pages == 2
+
+        _, diff = parser.reparse(pdf_path, previous)
+
+        assert diff.changed_pages == [] and diff.reused_pages == 2
+        assert parser.profile.pages == 0
+        assert parser.page_timings == []
+
+
+def test_reparse_matches_fresh_parse(tmp_path):
+    old_path = make_text_pdf(str(tmp_path / 'old.pdf'), 3)
+    new_path = str(tmp_path / 'new.pdf')
+    with fitz.open(old_path) as doc:
+        doc[1].insert_text((72, 800), "Trang 2 đã sửa")
+        doc.save(new_path)
+
+    with PDFParser(ocr_workers=0) as parser:
+        previous = parser.parse(old_path)
+        document, diff = parser.reparse(new_path, previous)
+        fresh = parser.parse(new_path)
+
+    assert diff.changed_pages == [2] and diff.reused_pages == 2
+    # Trang dùng lại và trang trích xuất lại cùng là text thô
+    assert [p.text for p in document.pages] == [p.text for p in fresh.pages]
+    assert not document.cleaned
+
+
+def test_reparse_rejects_cleaned_document(tmp_path):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 2)
+
+    with PDFParser(ocr_workers=0) as parser:
+        previous = TextCleaner.clean_document(parser.parse(pdf_path))
+        assert previous.cleaned
+
+        with pytest.raises(ValueError):
+            parser.reparse(pdf_path, previous)
@@ -0,0 +1,21 @@
+"""
+Parse PDF từ buffer trong RAM (bytes, mmap)
+"""
+import mmap
+
+import pytest
+
+from src.pdf_parser import PDFParser
+from benchmarks.corpus import make_text_pdf
+
+
+@pytest.mark.parametrize('backend', PDFParser.BACKENDS)
+def test_mmap_closes_after_parse(tmp_path, backend):
+    pdf_path = make_text_pdf(str(tmp_path / 'text.pdf'), 3)
+
+    with PDFParser(backend=backend, ocr_workers=0) as parser:
+        expected = [page.text for page in parser.parse(pdf_path).pages]
+        with open(pdf_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pages = parser.parse(mm, file_name='text.pdf').pages
+
+    assert [page.text for page in pages] == expected
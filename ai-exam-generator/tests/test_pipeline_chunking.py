@@ -0,0 +1,85 @@
+"""
+Chunking của ExamPipeline (ExamPipeline.iter_chunks = ChunkingEngine.from_settings(chunk_size, 0)):
+chi phí tăng tuyến tính theo số trang, trang/offset của chunk đúng
+"""
+import time
+
+import pytest
+
+from src.chunking import ChunkingEngine
+from src.models import DocumentPage
+from benchmarks.corpus import make_page_texts
+
+
+PAGES = 1000
+CHUNK_SIZE = 500
+# Thời gian mỗi trang của 2N trang tối đa gấp MAX_RATIO lần N trang (bậc hai sẽ ~2)
+MAX_RATIO = 1.5
+
+
+@pytest.fixture(scope='module')
+def texts():
+    return make_page_texts(PAGES)
+
+
+def _pages(texts, num_pages):
+    return [DocumentPage(page=i + 1, text=text) for i, text in enumerate(texts[:num_pages])]
+
+
+def _chunk(pages):
+    return list(ChunkingEngine.from_settings(chunk_size=CHUNK_SIZE, chunk_overlap=0).chunk_pages(pages))
+
+
+def _scanned_chars(pages):
+    """Tổng độ dài các đoạn [start, end) mà strategy cửa sổ phải chia"""
+    engine = ChunkingEngine.from_settings(chunk_size=CHUNK_SIZE, chunk_overlap=0)
+    window = engine.strategy.window
+    split = window.split
+    scanned = 0
+
+    def counting_split(text, start=0, end=None):
+        nonlocal scanned
+        scanned += (len(text) if end is None else end) - start
+        return split(text, start, end)
+
+    window.split = counting_split
+    list(engine.chunk_pages(pages))
+    return scanned
+
+
+def _best_seconds(pages, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        _chunk(pages)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_chunks_keep_page_and_offsets(texts):
+    pages = _pages(texts, PAGES)
+    chunks = _chunk(pages)
+
+    assert {chunk.page for chunk in chunks} == {page.page for page in pages}
+    for chunk in chunks:
+        assert pages[chunk.page - 1].text[chunk.char_start:chunk.char_end] == chunk.text
+
+
+def test_chunk_work_grows_linearly(texts):
+    half, full = _pages(texts, PAGES // 2), _pages(texts, PAGES)
+    chars_half = sum(len(page.text) for page in half)
+    chars_full = sum(len(page.text) for page in full)
+
+    # Mỗi ký tự được chia đúng một lần, không quét lại phần trước của tài liệu
+    assert _scanned_chars(half) == chars_half
+    assert _scanned_chars(full) == chars_full
+
+
+def test_chunk_time_grows_linearly(texts):
+    half, full = _pages(texts, PAGES // 2), _pages(texts, PAGES)
+    _chunk(half)
+
+    per_page_half = _best_seconds(half) / len(half)
+    per_page_full = _best_seconds(full) / len(full)
+
+    assert per_page_full <= per_page_half * MAX_RATIO
@@ -0,0 +1,37 @@
+"""
+TextCleaner: xóa header/footer lặp lại, bản batch và bản streaming
+"""
+import pytest
+
+from src.models import DocumentPage
+from src.pdf_parser import TextCleaner
+
+
+HEADER = "TRƯỜNG THCS NGUYỄN DU - ĐỀ CƯƠNG ÔN TẬP"
+HEADINGS = [
+    "CHƯƠNG 1: HỆ PHƯƠNG TRÌNH BẬC NHẤT HAI ẨN",
+    "Chương 1: Hệ phương trình bậc nhất hai ẩn",
+    "MỤC 2: CÁC PHƯƠNG PHÁP GIẢI",
+]
+
+
+def _pages(heading):
+    """20 trang: header mọi trang, tiêu đề lặp ở 5 trang đầu"""
+    pages = []
+    for i in range(20):
+        lines = [HEADER]
+        if i < 5:
+            lines.append(heading)
+        lines.append(f"Ghi chú riêng của mục {chr(ord('A') + i)} trong đề cương.")
+        pages.append(DocumentPage(page=i + 1, text='\n'.join(lines)))
+    return pages
+
+
+@pytest.mark.parametrize('heading', HEADINGS)
+def test_streaming_matches_batch_for_heading_in_warmup(heading):
+    batch = [page.text for page in TextCleaner.clean_pages(_pages(heading))]
+    streamed = [page.text for page in TextCleaner.strip_repeated_lines(_pages(heading))]
+
+    assert streamed == batch
+    assert all(HEADER not in text and "Ghi chú riêng" in text for text in streamed)
+    assert all(text.startswith(heading) for text in streamed[:5])